@@ -0,0 +1,126 @@
+import timeit
+import numpy as np
+
+from sensor.data_parsing import ImageCompensationMethod, compensate_raw_image, get_calibration_factors
+from sensor.calibration import SensorCalibration
+
+SIZES = [16, 32, 64, 128]
+REPEATS = 200
+
+
+# Copy of the per field implementation previously used by Sensor, image maximum taken over all fields
+def legacy_compensate_raw_image(rows, columns, image_to_compensate, calibration_image, compensation_method):
+    compensated_image = [[0 for x in range(columns)] for y in range(rows)]
+
+    if compensation_method == ImageCompensationMethod.input_shifted_by_max_value:
+        image_max_value = max(max(row) for row in image_to_compensate)
+        for i in range(columns):
+            for j in range(rows):
+                compensated_image[i][j] = image_to_compensate[i][j] + 4095 - image_max_value
+
+    elif compensation_method == ImageCompensationMethod.input_shifted_by_calibration_value:
+        for i in range(columns):
+            for j in range(rows):
+                compensated_image[i][j] = image_to_compensate[i][j] + 4095 - calibration_image[i][j]
+
+    elif compensation_method == ImageCompensationMethod.input_scaled_by_calibration_value:
+        for i in range(columns):
+            for j in range(rows):
+                compensated_image[i][j] = image_to_compensate[i][j] * (4095 / calibration_image[i][j])
+
+    elif compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_A \
+            or compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_B \
+            or compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_C:
+        if compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_A:
+            filter_value = 4000  # A
+        elif compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_B:
+            filter_value = 3950  # B
+        else:
+            filter_value = 3900  # C
+
+        for i in range(columns):
+            for j in range(rows):
+                compensated_image[i][j] = image_to_compensate[i][j]
+                if compensated_image[i][j] > filter_value:
+                    compensated_image[i][j] = filter_value
+                compensated_image[i][j] = int(compensated_image[i][j] * 4095 / filter_value)
+
+    elif compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A \
+            or compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_B:
+        if compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A:
+            mult_value = 0.99  # A
+        else:
+            mult_value = 0.98  # B
+
+        for i in range(columns):
+            for j in range(rows):
+                compensated_image[i][j] = image_to_compensate[i][j]
+                if compensated_image[i][j] > mult_value * calibration_image[i][j]:
+                    compensated_image[i][j] = mult_value * calibration_image[i][j]
+                compensated_image[i][j] = compensated_image[i][j] * 4095 / (mult_value * calibration_image[i][j])
+
+    else:
+        for i in range(columns):
+            for j in range(rows):
+                compensated_image[i][j] = image_to_compensate[i][j]
+    return compensated_image
+
+
+def make_frames(size):
+    calibration = np.random.randint(3700, 4096, size=(size, size)).astype(np.uint16)
+    frame = np.random.randint(1000, 4096, size=(size, size)).astype(np.uint16)
+    return frame, calibration
+
+
+if __name__ == "__main__":
+    # Equivalence with the old implementation, on python ints like serial used to deliver
+    for seed in range(20):
+        np.random.seed(seed)
+        frame, calibration = make_frames(16)
+        for method in ImageCompensationMethod:
+            expected = np.array(legacy_compensate_raw_image(16, 16, frame.tolist(), calibration.tolist(), method))
+            result = compensate_raw_image(16, 16, frame, calibration, method)
+            assert np.allclose(result, expected, rtol=1e-6, atol=1e-3), method
+    print("All compensation methods are equivalent")
+
+    for size in SIZES:
+        frame, calibration = make_frames(size)
+        out = np.empty((size, size), dtype=np.float32)
+        frame_list = frame.tolist()
+        calibration_list = calibration.tolist()
+        print("Size " + str(size) + "x" + str(size))
+
+        for method in ImageCompensationMethod:
+            factors = get_calibration_factors(calibration, method)
+            repeats = max(1, REPEATS * 16 * 16 // (size * size))
+            legacy_time = timeit.timeit(lambda: legacy_compensate_raw_image(size, size, frame_list, calibration_list,
+                                                                            method), number=repeats) / repeats
+            vectorized_time = timeit.timeit(lambda: compensate_raw_image(size, size, frame, calibration, method, out,
+                                                                         factors), number=REPEATS) / REPEATS
+            print("\t" + method.name.ljust(50) + str(round(legacy_time * 1e6, 1)).rjust(10) + " us" +
+                  str(round(vectorized_time * 1e6, 1)).rjust(10) + " us" +
+                  str(round(legacy_time / vectorized_time, 1)).rjust(8) + "x")
+
+    # Calibration object: factors computed once per calibration or full lookup table per field
+    frame, calibration = make_frames(16)
+    out = np.empty((16, 16), dtype=np.float32)
+    print("Calibration 16x16")
+    print("\t" + "method".ljust(50) + "recomputed".rjust(13) + "factors".rjust(13) + "lut".rjust(13))
+    for method in ImageCompensationMethod:
+        if method == ImageCompensationMethod.input_shifted_by_max_value:
+            continue
+        factors_calibration = SensorCalibration(16, 16, method)
+        factors_calibration.update(calibration)
+        lut_calibration = SensorCalibration(16, 16, method, use_lut=True)
+        lut_calibration.update(calibration)
+        expected = compensate_raw_image(16, 16, frame, calibration, method)
+        assert np.allclose(lut_calibration.compensate(frame, out), expected, rtol=1e-6, atol=1e-3), method
+
+        per_frame_time = timeit.timeit(lambda: compensate_raw_image(16, 16, frame, calibration, method, out),
+                                       number=REPEATS) / REPEATS
+        factors_time = timeit.timeit(lambda: factors_calibration.compensate(frame, out), number=REPEATS) / REPEATS
+        lut_time = timeit.timeit(lambda: lut_calibration.compensate(frame, out), number=REPEATS) / REPEATS
+        update_time = timeit.timeit(lambda: lut_calibration.update(calibration), number=5) / 5
+        print("\t" + method.name.ljust(50) + str(round(per_frame_time * 1e6, 1)).rjust(10) + " us" +
+              str(round(factors_time * 1e6, 1)).rjust(10) + " us" + str(round(lut_time * 1e6, 1)).rjust(10) +
+              " us\tlut rebuild " + str(round(update_time * 1e3, 1)) + " ms")
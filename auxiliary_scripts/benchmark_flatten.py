@@ -0,0 +1,64 @@
+import timeit
+import numpy as np
+
+from sensor.data_parsing import flatten, parse_data_to_np_image
+
+REPEATS = 2000
+
+
+# Copy of recursive flatten and checks previously used on every frame
+def legacy_flatten(seq):
+    out_list = []
+    for element in seq:
+        element_type = type(element)
+        if element_type is tuple or element_type is list or element_type is np.ndarray:
+            for element_in_element in legacy_flatten(element):
+                out_list.append(element_in_element)
+        else:
+            out_list.append(element)
+    return out_list
+
+
+def legacy_needs_cast(raw_data):
+    for i in legacy_flatten(raw_data):
+        if not i <= 255:
+            return True
+    return False
+
+
+def legacy_is_item_placed(extracted_image):
+    for i in legacy_flatten(extracted_image):
+        if i > 10:
+            return True
+    else:
+        return False
+
+
+def print_result(name, legacy_time, new_time):
+    print(name.ljust(30) + str(round(legacy_time / REPEATS * 1e6, 2)).rjust(10) + " us" +
+          str(round(new_time / REPEATS * 1e6, 2)).rjust(10) + " us" + str(round(legacy_time / new_time, 1)).rjust(8) + "x")
+
+
+if __name__ == "__main__":
+    raw_frame = np.random.randint(3000, 4096, size=(16, 16)).astype(np.uint16)
+    empty_image = np.zeros((16, 16), dtype=np.uint8)
+    nested = [[1, (2, 3)], np.arange(6).reshape(2, 3), [[[4]], 5]]
+    out = np.empty((16, 16), dtype=np.uint8)
+
+    assert flatten(nested) == legacy_flatten(nested)
+    assert flatten(raw_frame) == legacy_flatten(raw_frame)
+    assert legacy_needs_cast(raw_frame) == bool(np.max(raw_frame) > 255)
+    assert legacy_is_item_placed(empty_image) == bool(np.any(empty_image > 10))
+
+    print("call site".ljust(30) + "before".rjust(13) + "after".rjust(13))
+    print_result("parse_data_to_np_image check", timeit.timeit(lambda: legacy_needs_cast(raw_frame), number=REPEATS),
+                 timeit.timeit(lambda: np.max(raw_frame) > 255, number=REPEATS))
+    # Empty table is the worst case, every field is checked
+    print_result("is_item_placed", timeit.timeit(lambda: legacy_is_item_placed(empty_image), number=REPEATS),
+                 timeit.timeit(lambda: np.any(empty_image > 10), number=REPEATS))
+    print_result("flatten of array", timeit.timeit(lambda: legacy_flatten(raw_frame), number=REPEATS),
+                 timeit.timeit(lambda: flatten(raw_frame), number=REPEATS))
+    print_result("flatten of nested lists", timeit.timeit(lambda: legacy_flatten(nested), number=REPEATS),
+                 timeit.timeit(lambda: flatten(nested), number=REPEATS))
+    print("parse_data_to_np_image:\t" + str(round(timeit.timeit(
+        lambda: parse_data_to_np_image(16, 16, raw_frame, out), number=REPEATS) / REPEATS * 1e6, 2)) + " us")
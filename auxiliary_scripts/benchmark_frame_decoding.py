@@ -0,0 +1,93 @@
+import timeit
+import numpy as np
+
+from connection.frame_parsing import decode_csv_frame, decode_binary_frame, encode_binary_frame
+
+ROWS = 16
+COLUMNS = 16
+MAX_VALUE = 4095
+REPEATS = 2000
+BAUDRATE = 115200
+
+
+# Copy of the parsing loop previously used in Serial.run
+def legacy_decode(input_msg, rows, columns, max_possible_value):
+    pressure_map = [[0 for x in range(columns)] for y in range(rows)]
+    input_msg = input_msg.decode('utf-8').lstrip('\0')
+    if len(input_msg) > 0 and input_msg[0] != '\r' and input_msg[0] != '\n' and input_msg[0] != '\0':
+        lines = input_msg.strip().split('|')
+        try:
+            lines.remove('')
+        except:
+            pass
+        if len(lines) is not rows:
+            return None
+
+        i = 0
+        for line in lines:
+            list_of_values = line.strip().split(',')
+            if len(list_of_values) is not columns:
+                return None
+
+            j = 0
+            for value in list_of_values:
+                try:
+                    field_pressure = float(value)
+                    if field_pressure > max_possible_value:
+                        raise Exception("Read value is too high")
+                    pressure_map[j][i] = field_pressure
+                except:
+                    return None
+                j = j + 1
+            i = i + 1
+        return pressure_map
+    return None
+
+
+def make_csv_frame(values):
+    # Values are indexed [column][row] as in the pressure map
+    return ('|'.join(','.join(str(v) for v in row) for row in values.T) + '|\r\n').encode('ascii')
+
+
+if __name__ == "__main__":
+    frame = np.random.randint(3000, MAX_VALUE + 1, size=(COLUMNS, ROWS), dtype=np.uint16)
+    msg = make_csv_frame(frame)
+
+    # Both decoders have to return the same map
+    assert np.array_equal(np.array(legacy_decode(msg, ROWS, COLUMNS, MAX_VALUE)), frame)
+    assert np.array_equal(decode_csv_frame(msg, ROWS, COLUMNS, MAX_VALUE), frame)
+
+    # Both decoders have to reject the same broken frames
+    too_high = frame.copy()
+    too_high[3, 5] = MAX_VALUE + 1
+    broken_frames = [msg.replace(b'|', b'', 1), msg.replace(b',', b'', 1), make_csv_frame(too_high),
+                     msg.replace(b',', b',x', 1), b'\r\n']
+    for broken in broken_frames:
+        assert legacy_decode(broken, ROWS, COLUMNS, MAX_VALUE) is None
+        assert decode_csv_frame(broken, ROWS, COLUMNS, MAX_VALUE) is None
+
+    out = np.empty((COLUMNS, ROWS), dtype=np.uint16)
+    legacy_time = timeit.timeit(lambda: legacy_decode(msg, ROWS, COLUMNS, MAX_VALUE), number=REPEATS)
+    vectorized_time = timeit.timeit(lambda: decode_csv_frame(msg, ROWS, COLUMNS, MAX_VALUE, out), number=REPEATS)
+
+    print("Frame size: " + str(len(msg)) + " B")
+    print("Legacy loop:\t" + str(round(legacy_time / REPEATS * 1e6, 1)) + " us/frame")
+    print("Vectorized:\t" + str(round(vectorized_time / REPEATS * 1e6, 1)) + " us/frame")
+    print("Speedup:\t" + str(round(legacy_time / vectorized_time, 2)) + "x")
+
+    # Binary protocol, link rate counts start and stop bit of every byte
+    print("Csv link limit:\t" + str(round(BAUDRATE / 10.0 / len(msg), 1)) + " frames/s")
+    for sample_bits in [16, 12]:
+        binary_msg = encode_binary_frame(frame, 7, sample_bits)
+        decoded, counter = decode_binary_frame(binary_msg, ROWS, COLUMNS, MAX_VALUE)
+        assert np.array_equal(decoded, frame) and counter == 7
+
+        corrupted_msg = bytearray(binary_msg)
+        corrupted_msg[20] ^= 0x01
+        assert decode_binary_frame(bytes(corrupted_msg), ROWS, COLUMNS, MAX_VALUE) is None
+
+        binary_time = timeit.timeit(lambda: decode_binary_frame(binary_msg, ROWS, COLUMNS, MAX_VALUE, out),
+                                    number=REPEATS)
+        print("Binary " + str(sample_bits) + " bit:\t" + str(round(binary_time / REPEATS * 1e6, 1)) + " us/frame\t" +
+              str(len(binary_msg)) + " B\tlink limit: " + str(round(BAUDRATE / 10.0 / len(binary_msg), 1)) +
+              " frames/s")
@@ -0,0 +1,90 @@
+import sys
+import time
+import subprocess
+import numpy as np
+
+from sensor.params import Params, ImageMask, mask_borderer
+from item.classifier.position_recognition import recognise_position, recognise_position_by_stretching
+
+CALLS = 2000
+IMPORTS = 5
+
+
+def mask_borderer_reference(mask):
+    # Previous implementation, field by field
+    bordered_mask = np.copy(mask)
+    for i in range(1, mask.shape[0] - 1):
+        for j in range(1, mask.shape[1] - 1):
+            if not mask[i, j]:
+                bordered_mask[i - 1:i + 2, j - 1:j + 2] = 0
+            if i == 1 or j == 1 or i == mask.shape[0] - 2 or j == mask.shape[1] - 2:
+                bordered_mask[i, j] = 0
+    return bordered_mask
+
+
+def measure_import(statement):
+    # Fresh interpreter for every import, numpy and cv2 are imported before measuring
+    code = "import time, numpy, cv2\nstart = time.perf_counter()\n" + statement + \
+           "\nprint(time.perf_counter() - start)"
+    times = []
+    for k in range(IMPORTS):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.split()[-1]))
+    return str(round(min(times) * 1e3, 1)) + " ms"
+
+
+def measure(function):
+    start_time = time.perf_counter()
+    for k in range(CALLS):
+        function()
+    return str(round((time.perf_counter() - start_time) / CALLS * 1e6, 2)) + " us"
+
+
+class SmallTableParams(Params):
+    # Rectangular table of 12x14 fields, stretched outline is computed from outline
+    rows = 14
+    columns = 12
+    table_outline = ((0, 0), (13, 0), (13, 11), (0, 11))
+    stretched_table_outline = None
+
+
+if __name__ == "__main__":
+    passed = True
+    np.random.seed(0)
+
+    # Vectorized borderer against the loop, on table masks and random ones
+    masks = [ImageMask().getEMask(), ImageMask().getEMaskWithBorder(), ImageMask(SmallTableParams).getEMask()]
+    masks += [np.int64(np.random.random((18, 18)) < p) for p in np.linspace(0.5, 0.99, 200)]
+    same = all(np.array_equal(mask_borderer(mask), mask_borderer_reference(mask)) for mask in masks)
+    print("Borderer same as loop on " + str(len(masks)) + " masks: " + str(same))
+    passed = same and passed
+
+    # Masks of the same geometry are computed once
+    first = ImageMask().getEMaskWithDoubleBorder()
+    shared = ImageMask().getEMaskWithDoubleBorder() is first
+    print("Masks shared by geometry: " + str(shared))
+    passed = shared and passed
+
+    # Table with its own outline
+    small_mask = ImageMask(SmallTableParams)
+    image = np.zeros((14, 12))
+    image[5:8, 4:7] = 100
+    placement = recognise_position(image, small_mask.getMask(), small_mask.getFieldSize(), small_mask)
+    print("Small table: mask " + str(small_mask.getMask().shape) + ", stretched " +
+          str(small_mask.getStretchedMask().shape) + ", placement " + placement.name)
+    passed = small_mask.getStretchedMask().shape == (35, 18) and passed
+
+    print("Import of sensor.params: " + measure_import("import sensor.params"))
+    print("Import and all masks (computed at import before): " + measure_import(
+        "from sensor.params import ImageMask\nmask = ImageMask()\nmask.getEMaskWithDoubleBorder()\n"
+        "mask.getDistanceToEdge([10.0, 10.0])"))
+
+    image = np.zeros((16, 16))
+    image[6:9, 6:9] = 100
+    print("ImageMask() and getMask(): " + measure(lambda: ImageMask().getMask()))
+    print("Stretching recognition per frame, table mask: " + measure(
+        lambda: recognise_position_by_stretching(image, None, [1.5, 2.5])))
+    print("Recognition per frame, table mask: " + measure(lambda: recognise_position(image, None, [1.5, 2.5])))
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,65 @@
+import os
+import time
+import numpy as np
+
+# Suppress tensorflow noncritical warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+from keras.models import load_model
+
+from item.classifier.inference_backends import InferenceBackend, TFLiteRunner, create_inference_runner
+from item.classifier.weight_estimation import mean_absolute_percentage_square_error
+from debug.latency import LatencyStatistics
+
+CLASSIFIER_MODEL_PATH = "item/classifier/models/classifier_model.keras"
+WEIGHT_MODEL_PATH = "item/classifier/models/weight_model.keras"
+BATCH_SIZES = [1, 4]
+CALLS = 500
+WARMUP = 20
+
+
+def benchmark_runner(runner, images):
+    latency = LatencyStatistics("", window=CALLS)
+    for k in range(WARMUP):
+        runner.predict(images)
+    for k in range(CALLS):
+        start_time = time.perf_counter()
+        runner.predict(images)
+        latency.add(time.perf_counter() - start_time)
+    return latency
+
+
+def create_runner(model, model_path, backend):
+    # Quantized model can't be made from keras model, it is loaded when quantize_models.py made it
+    if backend is InferenceBackend.tflite_int8:
+        int8_path = os.path.splitext(model_path)[0] + "_int8.tflite"
+        if not os.path.isfile(int8_path):
+            return None
+        return TFLiteRunner.from_file(int8_path)
+    return create_inference_runner(model, backend)
+
+
+def benchmark_model(name, model, model_path):
+    print(name)
+    reference_runner = create_inference_runner(model, InferenceBackend.keras_predict)
+    for batch_size in BATCH_SIZES:
+        images = np.random.randint(0, 255, size=(batch_size, 16, 16)).astype(np.float32)
+        reference = reference_runner.predict(images)
+        for backend in InferenceBackend:
+            runner = create_runner(model, model_path, backend)
+            if runner is None:
+                print("\tbatch " + str(batch_size) + "\t" + backend.name.ljust(14) +
+                      "skipped, no quantized model (run auxiliary_scripts/quantize_models.py)")
+                continue
+            difference = np.max(np.abs(runner.predict(images) - reference))
+            latency = benchmark_runner(runner, images)
+            print("\tbatch " + str(batch_size) + "\t" + backend.name.ljust(14) +
+                  "p50=" + str(round(latency.get_percentile(50) * 1e3, 3)) + " ms\t" +
+                  "p99=" + str(round(latency.get_percentile(99) * 1e3, 3)) + " ms\t" +
+                  "max diff=" + str(difference))
+
+
+if __name__ == "__main__":
+    benchmark_model("Classifier", load_model(CLASSIFIER_MODEL_PATH), CLASSIFIER_MODEL_PATH)
+    benchmark_model("Weight model", load_model(WEIGHT_MODEL_PATH, custom_objects={
+        'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error}), WEIGHT_MODEL_PATH)
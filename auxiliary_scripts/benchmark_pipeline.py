@@ -0,0 +1,92 @@
+import time
+import argparse
+import threading
+
+from connection.frame_recording import FrameRecorder
+from connection.replay import ReplaySerial
+from sensor.sensor import Sensor
+from auxiliary_scripts.fake_controller import make_pressure_map
+
+
+def make_recording(filename, frames, frame_rate=50.0):
+    # Synthetic recording, so pipeline can be measured without table
+    recorder = FrameRecorder(filename)
+    for k in range(frames):
+        recorder.record(make_pressure_map(k), k / frame_rate)
+    recorder.close()
+
+
+def wait_for_replay(replay):
+    while not replay.replay_finished:
+        time.sleep(0.01)
+
+
+def benchmark_sensor(filename):
+    # Serial thread and node thread work of every frame, without ROS and recognition
+    replay = ReplaySerial(filename, speed=0.0)
+    sensor = Sensor(filename, ser=replay)
+    sensor.set_lockstep(True)
+
+    processed = []
+
+    def consume():
+        while not replay.replay_finished or sensor.frame_mailbox.ready_full:
+            sensor.frame_mailbox.wait_for_frame(0.01)
+            if sensor.process_new_frame():
+                processed.append(sensor.frame_mailbox.front_frame_id)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    start_time = time.perf_counter()
+    consumer.start()
+    sensor.connect_to_controller()
+    wait_for_replay(replay)
+    consumer.join()
+    elapsed = time.perf_counter() - start_time
+
+    print("Sensor pipeline:\t" + str(len(processed)) + " frames in " + str(round(elapsed, 3)) + " s (" +
+          str(round(len(processed) / elapsed, 1)) + " frames/s)")
+    print(sensor.get_frame_statistics())
+
+
+def benchmark_table(filename):
+    # Whole table node with recognition, requires running roscore and trained models
+    from nodes.table import TableNode
+
+    replay = ReplaySerial(filename, speed=0.0)
+    sensor = Sensor(filename, ser=replay)
+    sensor.set_lockstep(True)
+    node = TableNode(node_name="SmartTableBenchmark", topic_prefix="/table_benchmark", default_turn_on=True)
+    node.set_sensor(sensor)
+
+    start_time = time.perf_counter()
+    sensor.connect_to_controller()
+    wait_for_replay(replay)
+    elapsed = time.perf_counter() - start_time
+    # Let recognition worker finish the last frame
+    time.sleep(0.5)
+    node.exitFlag = True
+    node.wait()
+    node.recognition_worker.stop()
+
+    statistics = sensor.get_frame_statistics()
+    print("Table pipeline:\t\t" + str(statistics["consumed"]) + " frames in " + str(round(elapsed, 3)) + " s (" +
+          str(round(statistics["consumed"] / elapsed, 1)) + " frames/s)")
+    print(statistics)
+    print(node.recognizer.get_statistics())
+    print(node.recognition_worker.get_statistics())
+    print(node.recognition_latency.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording", help="Frame recording made with smart_table.py --record")
+    parser.add_argument("--make", type=int, metavar="FRAMES", help="Create synthetic recording first")
+    parser.add_argument("--table", action="store_true", help="Benchmark whole table node (needs roscore)")
+    args = parser.parse_args()
+
+    if args.make is not None:
+        make_recording(args.recording, args.make)
+
+    benchmark_sensor(args.recording)
+    if args.table:
+        benchmark_table(args.recording)
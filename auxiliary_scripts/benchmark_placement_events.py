@@ -0,0 +1,125 @@
+import os
+import time
+import argparse
+import threading
+import numpy as np
+
+from connection.frame_recording import FrameRecorder
+from connection.replay import ReplaySerial
+from sensor.sensor import Sensor
+from sensor.params import ImageMask
+from sensor.placement_events import PlacementEventDetector
+from item.item import Item, ItemType, ItemPlacement
+from nodes.prediction_smoother import PredictionSmoother
+from item.classifier.position_recognition import recognise_position
+from auxiliary_scripts.fake_controller import make_pressure_map
+
+NOISE = 3
+mask = ImageMask()
+
+
+def make_workload_recordings(directory, frames):
+    # Idle: empty table, static: item lying still, active: item put down, moved around and taken off
+    empty = np.full((16, 16), 4000, dtype=np.int32)
+    workloads = {
+        "idle": lambda k: empty,
+        "static": lambda k: make_pressure_map(0),
+        "active": lambda k: make_pressure_map(k) if k % 100 < 60 else empty,
+    }
+
+    filenames = {}
+    for name, make_frame in workloads.items():
+        filename = os.path.join(directory, name + ".stfr")
+        recorder = FrameRecorder(filename)
+        # First frame is empty table used for calibration
+        recorder.record(empty, 0.0)
+        for k in range(frames):
+            frame = make_frame(k) + np.random.randint(-NOISE, NOISE + 1, size=(16, 16))
+            recorder.record(np.clip(frame, 0, 4095), (k + 1) * 0.02)
+        recorder.close()
+        filenames[name] = filename
+    return filenames
+
+
+class Recognition:
+    # Stand-in for recognition of one frame, numpy model is used when given, position recognition always runs
+    def __init__(self, model_path=None):
+        self.model = None
+        if model_path is not None:
+            from item.classifier.numpy_inference import NumpyModel
+            self.model = NumpyModel(model_path)
+
+    def recognise(self, item):
+        placement = recognise_position(item.getExtractedImage(), mask.getMask(), [1.5, 2.5])
+        if self.model is not None:
+            self.model.predict(np.expand_dims(item.getExtractedImage(), axis=0))
+        return placement
+
+
+def benchmark(filename, recognition, event_driven):
+    # CPU time of node thread spent on every frame, sensor thread is not counted
+    replay = ReplaySerial(filename, speed=0.0)
+    sensor = Sensor(filename, ser=replay)
+    sensor.set_lockstep(True)
+    detector = PlacementEventDetector()
+    smoother = PredictionSmoother()
+    result = {"frames": 0, "recognized": 0, "cpu": 0.0}
+
+    def consume():
+        start_time = time.thread_time()
+        while not replay.replay_finished or sensor.frame_mailbox.ready_full:
+            sensor.frame_mailbox.wait_for_frame(0.01)
+            if not sensor.process_new_frame():
+                continue
+            item = Item(mask.getMask())
+            item.image = np.array(sensor.image_actual_calibrated)
+            item.setExtractedImage()
+            result["frames"] += 1
+
+            # Empty table is not recognized in both modes, the same as in table node
+            if event_driven:
+                detector.update(item.getExtractedImage())
+                if not detector.needs_recognition() and smoother.is_settled():
+                    continue
+                placed = detector.placed
+            else:
+                placed = np.any(item.getExtractedImage() > 10)
+            placement = ItemPlacement.unknown
+            if placed:
+                placement = recognition.recognise(item)
+                result["recognized"] += 1
+            smoother.update(placed, ItemType.unknown if placed else ItemType.none, placement, 0)
+        result["cpu"] = time.thread_time() - start_time
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    sensor.connect_to_controller()
+    while not replay.replay_finished:
+        time.sleep(0.01)
+    consumer.join()
+    result["events"] = detector.get_statistics()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recordings", nargs="*", help="Frame recordings made with smart_table.py --record")
+    parser.add_argument("--make", type=int, metavar="FRAMES",
+                        help="Create idle, static and active recordings in current directory first")
+    parser.add_argument("--model", help="Numpy model (.npz) run as recognition of frame")
+    args = parser.parse_args()
+
+    recordings = {os.path.splitext(os.path.basename(f))[0]: f for f in args.recordings}
+    if args.make is not None:
+        recordings.update(make_workload_recordings(os.getcwd(), args.make))
+    recognition = Recognition(args.model)
+
+    print("Workload\tMode\t\tFrames\tRecognized\tCPU per frame [us]")
+    for name, filename in recordings.items():
+        for event_driven in [False, True]:
+            result = benchmark(filename, recognition, event_driven)
+            print(name + "\t\t" + ("events" if event_driven else "per frame") + "\t" + str(result["frames"]) +
+                  "\t" + str(result["recognized"]) + "\t\t" +
+                  str(round(result["cpu"] / max(result["frames"], 1) * 1e6, 1)))
+            if event_driven:
+                print("\t\t" + str(result["events"]))
@@ -0,0 +1,45 @@
+import time
+import tracemalloc
+import numpy as np
+
+from sensor.sensor import Sensor
+
+FRAMES = 2000
+WARMUP = 200
+
+
+def feed_frames(sensor, frames, n):
+    # Same calls as serial thread and table node make for every frame
+    for k in range(n):
+        sensor.new_data_received(16, 16, frames[k % len(frames)])
+        sensor.process_new_frame()
+
+
+if __name__ == "__main__":
+    sensor = Sensor()
+    frames = [np.random.randint(3000, 4096, size=(16, 16)).astype(np.uint16) for x in range(16)]
+    feed_frames(sensor, frames, WARMUP)
+
+    start_time = time.perf_counter()
+    feed_frames(sensor, frames, FRAMES)
+    frame_time = (time.perf_counter() - start_time) / FRAMES
+
+    tracemalloc.start()
+    feed_frames(sensor, frames, WARMUP)
+    snapshot_before = tracemalloc.take_snapshot()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+
+    feed_frames(sensor, frames, FRAMES)
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    print("Frames:\t\t\t\t" + str(FRAMES))
+    print("Time per frame:\t\t\t" + str(round(frame_time * 1e6, 1)) + " us")
+    print("Retained per frame:\t\t" + str(round((memory_after - memory_before) / FRAMES, 2)) + " B")
+    print("Transient peak:\t\t\t" + str(memory_peak - memory_before) + " B")
+
+    print("Biggest growth:")
+    for stat in snapshot_after.compare_to(snapshot_before, 'lineno')[:5]:
+        print("\t" + str(stat))
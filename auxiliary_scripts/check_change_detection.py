@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import numpy as np
+
+from connection.frame_recording import FrameRecorder
+from connection.replay import ReplaySerial
+from sensor.sensor import Sensor
+from sensor.params import ImageMask
+from sensor.frame_change import FrameChangeDetector
+from item.item import Item
+from auxiliary_scripts.fake_controller import make_pressure_map
+
+FRAMES = 400
+NOISE = 3
+mask = ImageMask()
+
+
+def make_static_sequence():
+    # Empty table for calibration, then the same item lying still, only ADC noise changes
+    frames = [np.full((16, 16), 4000, dtype=np.uint16)]
+    item_frame = make_pressure_map(0)
+    for k in range(FRAMES):
+        frames.append(item_frame + np.random.randint(-NOISE, NOISE + 1, size=item_frame.shape))
+    return frames
+
+
+def make_dynamic_sequence():
+    # Item is moved every few frames, every move has to be recognized
+    frames = [np.full((16, 16), 4000, dtype=np.uint16)]
+    for k in range(FRAMES):
+        frames.append(make_pressure_map(k // 4 * 10) + np.random.randint(-NOISE, NOISE + 1, size=(16, 16)))
+    return frames
+
+
+def replay_sequence(frames):
+    # Frames go through recording, replay, sensor and item extraction, the same way as in table node
+    filename = os.path.join(tempfile.mkdtemp(), "sequence.stfr")
+    recorder = FrameRecorder(filename)
+    for k, frame in enumerate(frames):
+        recorder.record(frame, k * 0.02)
+    recorder.close()
+
+    replay = ReplaySerial(filename, speed=0.0)
+    sensor = Sensor(filename, ser=replay)
+    sensor.set_lockstep(True)
+    detector = FrameChangeDetector()
+    recognized = []
+
+    def consume():
+        while not replay.replay_finished or sensor.frame_mailbox.ready_full:
+            sensor.frame_mailbox.wait_for_frame(0.01)
+            if not sensor.process_new_frame():
+                continue
+            item = Item(mask.getMask())
+            item.image = sensor.image_actual_calibrated
+            item.setExtractedImage()
+            changed = detector.is_changed(item.getExtractedImage())
+            if changed:
+                detector.update(item.getExtractedImage())
+            recognized.append(changed)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    sensor.connect_to_controller()
+    while not replay.replay_finished:
+        time.sleep(0.01)
+    consumer.join()
+    return detector, recognized
+
+
+if __name__ == "__main__":
+    passed = True
+
+    detector, recognized = replay_sequence(make_static_sequence())
+    print("Static:\t\thits: " + str(detector.hits) + "\tmisses: " + str(detector.misses) +
+          "\thit rate: " + str(round(detector.get_hit_rate(), 3)))
+    # Only the first frame with item needs recognition
+    passed = passed and detector.misses == 1 and len(recognized) == FRAMES
+
+    detector, recognized = replay_sequence(make_dynamic_sequence())
+    print("Dynamic:\thits: " + str(detector.hits) + "\tmisses: " + str(detector.misses) +
+          "\thit rate: " + str(round(detector.get_hit_rate(), 3)))
+    # Item moves on every fourth frame, each move must be recognized, frames in between must not
+    moves = [k % 4 == 0 and np.any(make_pressure_map(k // 4 * 10) != make_pressure_map((k // 4 - 1) * 10))
+             for k in range(FRAMES)]
+    moves[0] = True
+    passed = passed and recognized == moves
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
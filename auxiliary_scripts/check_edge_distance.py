@@ -0,0 +1,75 @@
+import sys
+import time
+import numpy as np
+
+from item.classifier.position_recognition import get_distance_to_mask
+from sensor.params import ImageMask, EDGE_LOOKUP_SUBDIVISION
+
+POINTS = 20000
+CALLS = 2000
+mask = ImageMask()
+
+
+def get_nearest_reference(point):
+    # Closest field outside of the table by comparing all of them, in stretched mask coordinates
+    e_mask = np.pad(mask.getStretchedMask(), [(1, 1), (1, 1)], mode='constant', constant_values=0)
+    rows, columns = np.where(e_mask == 0)
+    distances = np.hypot(columns - 1 - point[0], rows - 1 - point[1])
+    return distances.min()
+
+
+def measure(function, points):
+    start_time = time.perf_counter()
+    for k in range(CALLS):
+        function(points[k % len(points)].tolist())
+    return (time.perf_counter() - start_time) / CALLS
+
+
+if __name__ == "__main__":
+    passed = True
+    np.random.seed(0)
+    stretched_mask = mask.getStretchedMask()
+    height, width = stretched_mask.shape
+
+    # Lookup on fields of the grid, including margin
+    grid_error = 0.0
+    for row in range(-1, height + 1):
+        for column in range(-1, width + 1):
+            nearest = mask.getNearestEdgePoint([float(column), float(row)])
+            grid_error = max(grid_error, abs(np.hypot(nearest[0] - column, nearest[1] - row) -
+                                             get_nearest_reference([column, row])))
+    print("Lookup on grid:\t\tmax difference: " + str(grid_error))
+    passed = grid_error < 1e-9 and passed
+
+    # Lookup on points between fields, also out of the table on its margin
+    points = np.column_stack([np.random.uniform(-1, width, POINTS), np.random.uniform(-1, height, POINTS)])
+    distance_error = 0.0
+    nearest_error = 0.0
+    for point in points:
+        reference = round(float(get_distance_to_mask(stretched_mask, list(point))), 2)
+        distance_error = max(distance_error, abs(mask.getDistanceToEdge(point) - reference))
+        nearest = mask.getNearestEdgePoint(point)
+        nearest_error = max(nearest_error, abs(np.hypot(nearest[0] - point[0], nearest[1] - point[1]) -
+                                               get_nearest_reference(point)))
+    print("Distance to edge:\tmax difference: " + str(distance_error))
+    print("Nearest edge point:\tmax difference: " + str(nearest_error))
+    passed = distance_error == 0.0 and nearest_error < 1e-9 and passed
+
+    previous_time = measure(lambda x: get_distance_to_mask(stretched_mask, x), points)
+    current_time = measure(mask.getDistanceToEdge, points)
+    # Most cells have one candidate, so lookup is one index, the others compare few candidates
+    candidates = mask.getEdgeCandidates()
+    cell_sizes = [len(cell) for row in candidates for cell in row]
+    sizes = [len(candidates[int((point[1] + 1.0) * EDGE_LOOKUP_SUBDIVISION)]
+                           [int((point[0] + 1.0) * EDGE_LOOKUP_SUBDIVISION)]) for point in points]
+    single = [point for point, size in zip(points, sizes) if size == 1]
+    multiple = [point for point, size in zip(points, sizes) if size > 1]
+    print("Cells with one candidate: " + str(round(np.mean(np.array(cell_sizes) == 1) * 100, 1)) +
+          "%, max candidates: " + str(max(cell_sizes)))
+    print("Time per point: one candidate " + str(round(measure(mask.getDistanceToEdge, single) * 1e6, 2)) +
+          " us, more candidates " + str(round(measure(mask.getDistanceToEdge, multiple) * 1e6, 2)) + " us")
+    print("Time per point: all fields " + str(round(previous_time * 1e6, 1)) + " us, precomputed " +
+          str(round(current_time * 1e6, 1)) + " us (" + str(round(previous_time / current_time, 1)) + "x)")
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+from item.item_utils import loadItems
+from item.item import ItemPlacement
+from item.classifier.position_recognition import recognise_position, recognise_position_by_stretching, \
+    PositionRecognizer
+from sensor.params import ImageMask
+
+CALLS = 500
+mask = ImageMask()
+
+
+def make_synthetic_images(count):
+    # Round and rectangular objects anywhere on the table, also partially out of it
+    images = []
+    rows, columns = np.indices((16, 16))
+    while len(images) < count:
+        row, column = np.random.uniform(-1, 16, size=2)
+        if np.random.random() < 0.5:
+            radius = np.random.uniform(0.8, 3.5)
+            image = np.maximum(0, 1 - np.hypot(rows - row, (columns - column) * 0.6) / radius)
+        else:
+            size_rows, size_columns = np.random.uniform(0.6, 4, size=2)
+            image = np.float64((np.abs(rows - row) < size_rows) & (np.abs(columns - column) < size_columns))
+        image = np.uint8(image * np.random.uniform(20, 255)) * mask.getMask()
+        if np.count_nonzero(image) > 0:
+            images.append(image)
+    return images
+
+
+def measure(function, images):
+    start_time = time.perf_counter()
+    for k in range(CALLS):
+        function(images[k % len(images)])
+    return (time.perf_counter() - start_time) / CALLS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="c_img_v2", help="Labelled images, synthetic ones are used when missing")
+    parser.add_argument("--synthetic", type=int, default=2000, help="Number of synthetic images")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        images = [item.getExtractedImage() for item in loadItems(args.path, mask.getMask())]
+        images = [image for image in images if np.any(image > 0)]
+        print("Labelled images: " + str(len(images)))
+    else:
+        np.random.seed(0)
+        images = make_synthetic_images(args.synthetic)
+        print("Synthetic images: " + str(len(images)))
+
+    placements = list(ItemPlacement)
+    confusion = np.zeros((len(placements), len(placements)), dtype=int)
+    for image in images:
+        previous = recognise_position_by_stretching(image, mask.getMask(), [1.5, 2.5])
+        current = recognise_position(image, mask.getMask(), [1.5, 2.5])
+        confusion[placements.index(previous), placements.index(current)] += 1
+
+    agreement = np.trace(confusion) / len(images)
+    print("Agreement: " + str(round(agreement * 100, 2)) + "%")
+    print("Previous \\ current\t" + "\t".join(p.name for p in placements))
+    for k, placement in enumerate(placements):
+        if np.any(confusion[k]):
+            print(placement.name + "\t\t\t" + "\t".join(str(v) for v in confusion[k]))
+
+    recognizer = PositionRecognizer()
+    previous_time = measure(lambda x: recognise_position_by_stretching(x, mask.getMask(), [1.5, 2.5]), images)
+    current_time = measure(recognizer.recognise, images)
+    print("Time per frame: stretching " + str(round(previous_time * 1e6, 1)) + " us, real dimensions " +
+          str(round(current_time * 1e6, 1)) + " us (" + str(round(previous_time / current_time, 1)) + "x)")
+
+    # Interpolation of cv2 is fixed point, so results may differ only on the very border of conditions
+    passed = agreement >= 0.99
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,99 @@
+import sys
+import random
+import numpy as np
+
+from nodes.prediction_smoother import PredictionSmoother
+from sensor.placement_events import PlacementEventDetector
+from item.item import ItemType, ItemPlacement
+
+FRAME_PERIOD = 0.02
+SETTLING_FRAMES = 6
+LYING_FRAMES = 200
+EMPTY_FRAMES = 50
+FLICKER = 0.1
+WEIGHT_NOISE = 30
+
+
+def make_sequence(item_type, placement, weight):
+    # Empty table, hand putting item down with random results, item lying with occasional misclassification
+    sequence = [(False, ItemType.none, ItemPlacement.unknown, 0)] * EMPTY_FRAMES
+    for k in range(SETTLING_FRAMES):
+        sequence.append((True, random.choice([ItemType.hand_any, ItemType.unknown, item_type]),
+                         random.choice(list(ItemPlacement)), weight * random.uniform(1.0, 1.8)))
+    for k in range(LYING_FRAMES):
+        frame_type = item_type if random.random() > FLICKER else ItemType.unknown
+        frame_placement = placement if random.random() > FLICKER else ItemPlacement.edge
+        sequence.append((True, frame_type, frame_placement, weight + random.uniform(-WEIGHT_NOISE, WEIGHT_NOISE)))
+    sequence += [(False, ItemType.none, ItemPlacement.unknown, 0)] * EMPTY_FRAMES
+    return sequence
+
+
+def simulate_placement(keep_until_settled, dropped_job=1, frames=100):
+    # Item put down in one step, the first recognition sees hand and one of the following jobs is dropped,
+    # as recognition worker does when it is busy
+    detector = PlacementEventDetector()
+    smoother = PredictionSmoother()
+    image = np.zeros((16, 16))
+    submitted = 0
+    for k in range(frames):
+        if k == 10:
+            image[6:9, 6:9] = 100
+        detector.update(image)
+        if not detector.needs_recognition() and (not keep_until_settled or smoother.is_settled()):
+            continue
+        submitted += 1
+        if submitted == dropped_job + 1:
+            continue
+        if not detector.placed:
+            smoother.update(False, ItemType.none, ItemPlacement.unknown, 0)
+        elif submitted == 1:
+            smoother.update(True, ItemType.hand_any, ItemPlacement.center, 900)
+        else:
+            smoother.update(True, ItemType.mug_full, ItemPlacement.center, 700)
+    return smoother.placed, submitted
+
+
+if __name__ == "__main__":
+    passed = True
+    random.seed(0)
+    sequence = make_sequence(ItemType.mug_full, ItemPlacement.center, 700)
+    put_down_frame = EMPTY_FRAMES
+
+    # Every frame published four values before
+    raw_messages = 4 * len(sequence)
+
+    smoother = PredictionSmoother()
+    messages = 0
+    placed_frame = None
+    placed_changes = 0
+    for k, frame in enumerate(sequence):
+        changed = smoother.update(*frame)
+        messages += len(changed)
+        if "placed" in changed:
+            placed_changes += 1
+            if smoother.placed and placed_frame is None:
+                placed_frame = k
+                # Values read by consumer together with placed status have to be settled already
+                passed = passed and smoother.type is ItemType.mug_full and \
+                    smoother.placement is ItemPlacement.center and abs(smoother.weight - 700) < 150
+
+    print("Messages raw: " + str(raw_messages) + "\tsmoothed: " + str(messages))
+    settle_time = (placed_frame - put_down_frame) * FRAME_PERIOD
+    # Usage table used to wait for second measurement polled every second
+    print("Settled after: " + str(round(settle_time, 3)) + " s\tsleep based wait: 2.0 s")
+    print("Weight: " + str(smoother.weight) + "\tplaced changes: " + str(placed_changes))
+
+    # Only put down and take off are reported, weight follows noise only above tolerance
+    passed = passed and placed_changes == 2 and not smoother.placed and smoother.weight == 0
+    passed = passed and messages < raw_messages / 20 and settle_time < 2.0
+
+    # Recognition stops only when results settled, not after fixed number of frames
+    placed_by_frames, submitted_by_frames = simulate_placement(False)
+    placed_until_settled, submitted_until_settled = simulate_placement(True)
+    print("Misclassified and dropped job, placed: recognition of settling frames " + str(placed_by_frames) + " (" +
+          str(submitted_by_frames) + " jobs), until settled " + str(placed_until_settled) + " (" +
+          str(submitted_until_settled) + " jobs)")
+    passed = passed and placed_until_settled
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
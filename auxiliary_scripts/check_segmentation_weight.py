@@ -0,0 +1,56 @@
+import sys
+import numpy as np
+
+from sensor.params import ImageMask
+from sensor.data_parsing import cast_data_to_uint8
+from item.item import Item
+from item.segmentation import segment_items
+from item.classifier.weight_estimation import estimate_weight
+
+FRAMES = 200
+TOLERANCE = 1e-9
+mask = ImageMask()
+
+
+def make_item(raw_image):
+    # Item as table node makes it from compensated raw image
+    item = Item(mask.getMask())
+    item.image = cast_data_to_uint8(16, 16, raw_image)
+    item.image_extracted_raw = raw_image
+    item.setExtractedImage()
+    return item
+
+
+def make_frame(count):
+    # Fields without pressure have raw value 4095, objects lie on the table separated by at least one free field
+    raw_image = np.full((16, 16), 4095.0)
+    corners = [(4, 1), (4, 9), (9, 1), (9, 9)]
+    for row, column in corners[:count]:
+        size_rows, size_columns = np.random.randint(2, 5, size=2)
+        raw_image[row:row + size_rows, column:column + size_columns] = \
+            np.random.uniform(2000, 3800, size=(size_rows, size_columns))
+    return raw_image
+
+
+if __name__ == "__main__":
+    passed = True
+    np.random.seed(0)
+
+    max_difference = 0.0
+    objects_found = 0
+    for k in range(FRAMES):
+        count = k % 3 + 2
+        item = make_item(make_frame(count))
+        objects = segment_items(item)
+        objects_found += len(objects)
+        whole_weight = estimate_weight(item.image_extracted_raw)
+        objects_weight = sum(estimate_weight(x.image_extracted_raw) for x in objects)
+        passed = passed and len(objects) == count and all(estimate_weight(x.image_extracted_raw) > 0 for x in objects)
+        max_difference = max(max_difference, abs(objects_weight - whole_weight) / whole_weight)
+
+    print("Frames: " + str(FRAMES) + "\tobjects: " + str(objects_found))
+    print("Sum of object weights vs whole frame weight, max relative difference: " + str(max_difference))
+    passed = passed and max_difference < TOLERANCE
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
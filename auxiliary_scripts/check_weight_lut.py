@@ -0,0 +1,88 @@
+import sys
+import time
+import numpy as np
+
+from item.classifier.weight_estimation import estimate_weight, sum_weight_of_fields, HYPERBOLE_A, HYPERBOLE_X0, \
+    HYPERBOLE_Y, DIVIDER_RESISTANCE, WEIGHT_MULTIPLIER
+
+FRAMES = 2000
+CALLS = 2000
+TOLERANCE = 1e-9
+
+
+def estimate_weight_reference(raw_calibrated_image, max_value=4095):
+    # Previous implementation, field by field
+    weight = 0
+
+    for row in raw_calibrated_image:
+        for tile in row:
+            normalized_pressure = round(tile * (4095 / max_value), 1)
+            try:
+                if normalized_pressure >= 4095.0:
+                    continue
+                resistance = (DIVIDER_RESISTANCE * normalized_pressure) / (4095.0 - normalized_pressure)
+                weight += (HYPERBOLE_X0 + (HYPERBOLE_A / (resistance - HYPERBOLE_Y)))
+            except ZeroDivisionError:
+                continue
+
+    if weight <= 0.0:
+        return 0.0
+
+    weight = weight * WEIGHT_MULTIPLIER
+    return weight
+
+
+def make_frames(max_value, integer):
+    # Mostly empty fields with few pressed ones, as on the table with item on it
+    frames = np.full((FRAMES, 16, 16), float(max_value))
+    pressed = np.random.random(frames.shape) < 0.1
+    frames[pressed] = np.random.uniform(1000, max_value, size=np.count_nonzero(pressed))
+    frames += np.random.uniform(-20, 20, size=frames.shape)
+    frames = np.minimum(frames, 4200)
+    if integer:
+        frames = np.round(frames)
+    return frames
+
+
+def compare(name, frames, max_value):
+    errors = []
+    for frame in frames:
+        # Previous implementation gave NaN for not finite fields, they are fields without pressure now
+        reference = estimate_weight_reference(np.where(np.isfinite(frame), frame, 4095.0), max_value)
+        weight = estimate_weight(frame, max_value)
+        errors.append(abs(weight - reference) / max(abs(reference), 1.0))
+    print(name + ":\tmax relative difference: " + str(max(errors)))
+    return max(errors) < TOLERANCE
+
+
+def measure(function, frame):
+    start_time = time.perf_counter()
+    for k in range(CALLS):
+        function(frame)
+    return (time.perf_counter() - start_time) / CALLS
+
+
+if __name__ == "__main__":
+    passed = True
+    np.random.seed(0)
+
+    for max_value in [4095, 4000, 3950, 3900]:
+        passed = compare("Integer frames, max " + str(max_value), make_frames(max_value, True), max_value) and passed
+    # Compensated images are floats, rounding to 0.1 may differ on exact halves, so they are only reported
+    compare("Float frames, max 4095", make_frames(4095, False), 4095)
+
+    # Fields out of the table range
+    edge_frame = np.array([[0, 1, 3, 4, 4094, 4095, 4096, 5000, -1, -7, 3.7, 3.6, 4094.95, 4094.94, 100, 200]] * 16)
+    edge_frame[::2, -3:] = [np.nan, np.inf, -np.inf]
+    for max_value in [4095, 4000]:
+        passed = compare("Edge values, max " + str(max_value), [edge_frame], max_value) and passed
+        print("\tsum of fields: " + str(sum_weight_of_fields(edge_frame, max_value)))
+
+    frame = make_frames(4095, True)[0]
+    reference_time = measure(estimate_weight_reference, frame)
+    lut_time = measure(estimate_weight, frame)
+    print("Time per frame: loop " + str(round(reference_time * 1e6, 1)) + " us, lookup table " +
+          str(round(lut_time * 1e6, 1)) + " us (" + str(round(reference_time / lut_time, 1)) + "x)")
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+import numpy as np
+
+# Suppress tensorflow noncritical warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+from item.classifier.numpy_inference import NumpyModel, export_model_to_npz
+from debug.latency import LatencyStatistics
+
+MODEL_PATHS = ["item/classifier/models/classifier_model.keras",
+               "item/classifier/models/weight_model.keras",
+               "item/classifier/models/multihead_model.keras"]
+IMAGES_PATH = "c_img_v2"
+TOLERANCE = 1e-4
+CALLS = 500
+
+# Runs in fresh interpreter, prints import time and peak memory of loading model and predicting single image
+RUNTIME_PROBE = """
+import os, sys, time, resource
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+start_time = time.perf_counter()
+from item.classifier.image_recognition import Classifier
+classifier = Classifier()
+classifier.import_model(sys.argv[1])
+classifier.predict(__import__('numpy').zeros((1, 16, 16)))
+print(round(time.perf_counter() - start_time, 2), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,
+      'tensorflow' in sys.modules)
+"""
+
+
+def load_keras_model(model_path):
+    from keras.models import load_model
+    from item.classifier.weight_estimation import mean_absolute_percentage_square_error
+
+    return load_model(model_path, custom_objects={
+        'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+
+
+def load_test_images():
+    # Real extracted images when dataset is available, random ones otherwise
+    images = [np.random.randint(0, 255, size=(16, 16)).astype(np.float32) for x in range(64)]
+    if os.path.isdir(IMAGES_PATH):
+        from item.item_utils import loadItems
+        from sensor.params import ImageMask
+
+        images += [np.array(item.image_extracted) for item in loadItems(IMAGES_PATH, ImageMask().getMask())]
+    return np.array(images, dtype=np.float32)
+
+
+def as_list(outputs):
+    return outputs if isinstance(outputs, list) else [outputs]
+
+
+def compare_outputs(keras_model, numpy_model, images):
+    keras_outputs = as_list(keras_model.predict(images, verbose=0))
+    numpy_outputs = as_list(numpy_model.predict(images))
+    passed = True
+    for keras_output, numpy_output in zip(keras_outputs, numpy_outputs):
+        # Relative to output scale, weight model returns grams and classifier probabilities
+        difference = np.max(np.abs(keras_output - numpy_output)) / max(1.0, np.max(np.abs(keras_output)))
+        same_class = np.mean(np.argmax(keras_output, axis=1) == np.argmax(numpy_output, axis=1))
+        print("\tmax relative difference: " + str(difference) + "\targmax agreement: " + str(same_class))
+        passed = passed and difference < TOLERANCE
+    return passed
+
+
+def measure_latency(function, image):
+    latency = LatencyStatistics("", window=CALLS)
+    for k in range(CALLS):
+        start_time = time.perf_counter()
+        function(image)
+        latency.add(time.perf_counter() - start_time)
+    return latency
+
+
+def probe_runtime(model_path):
+    result = subprocess.run([sys.executable, "-c", RUNTIME_PROBE, model_path], capture_output=True, text=True)
+    return result.stdout.strip().splitlines()[-1].split() if result.returncode == 0 else ["failed"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check-only", action="store_true", help="Compare already exported models")
+    args = parser.parse_args()
+
+    images = load_test_images()
+    all_passed = True
+    for model_path in MODEL_PATHS:
+        if not os.path.exists(model_path):
+            continue
+        numpy_path = os.path.splitext(model_path)[0] + ".npz"
+        keras_model = load_keras_model(model_path)
+        if not args.check_only:
+            export_model_to_npz(keras_model, numpy_path)
+        numpy_model = NumpyModel(numpy_path)
+
+        print(model_path + " -> " + numpy_path)
+        all_passed = compare_outputs(keras_model, numpy_model, images) and all_passed
+
+        keras_latency = measure_latency(lambda x: keras_model(x, training=False), images[:1])
+        numpy_latency = measure_latency(numpy_model.predict, images[:1])
+        print("\tp50 keras call: " + str(round(keras_latency.get_percentile(50) * 1e3, 3)) + " ms" +
+              "\tp50 numpy: " + str(round(numpy_latency.get_percentile(50) * 1e3, 3)) + " ms")
+
+    classifier_path = MODEL_PATHS[0]
+    for path in [classifier_path, os.path.splitext(classifier_path)[0] + ".npz"]:
+        print("Fresh process with " + path + " [s, MB, tensorflow imported]: " + " ".join(probe_runtime(path)))
+
+    print("PASSED" if all_passed else "FAILED, outputs differ more than " + str(TOLERANCE))
+    sys.exit(0 if all_passed else 1)
@@ -0,0 +1,98 @@
+import os
+import tty
+import time
+import argparse
+import threading
+import numpy as np
+
+from connection.frame_parsing import FrameProtocol, encode_binary_frame
+
+
+def make_pressure_map(frame_nr, rows=16, columns=16):
+    # Empty table reads close to max value, item moves slowly around the center of the table
+    pressure_map = np.full((columns, rows), 4000, dtype=np.uint16)
+    x = int(columns / 2 + 3 * np.sin(frame_nr / 20.0))
+    y = int(rows / 2 + 3 * np.cos(frame_nr / 20.0))
+    pressure_map[x - 2:x + 2, y - 2:y + 2] = 2500
+    return pressure_map
+
+
+def encode_csv_frame(pressure_map):
+    return ('|'.join(','.join(str(v) for v in row) for row in np.asarray(pressure_map).T) + '|\r\n').encode('ascii')
+
+
+class FakeController(threading.Thread):
+    # Pretends to be sensor controller on the other side of pseudo-terminal
+    def __init__(self, frame_protocol=FrameProtocol.csv, sample_bits=16, frame_rate=0.0, frames=None):
+        super(FakeController, self).__init__(daemon=True)
+        self.frame_protocol = frame_protocol
+        self.sample_bits = sample_bits
+        self.frame_rate = frame_rate
+        self.frames = frames
+        self.frames_sent = 0
+        self.exitFlag = False
+
+        self.master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        self.port_name = os.ttyname(slave_fd)
+        self.slave_fd = slave_fd
+
+    def encode(self, pressure_map):
+        if self.frame_protocol is FrameProtocol.binary:
+            return encode_binary_frame(pressure_map, self.frames_sent, self.sample_bits)
+        return encode_csv_frame(pressure_map)
+
+    def run(self):
+        while not self.exitFlag:
+            if self.frames is not None:
+                pressure_map = self.frames[self.frames_sent % len(self.frames)]
+            else:
+                pressure_map = make_pressure_map(self.frames_sent)
+            os.write(self.master_fd, self.encode(pressure_map))
+            self.frames_sent += 1
+
+            if self.frame_rate > 0.0:
+                time.sleep(1.0 / self.frame_rate)
+
+    def stop(self):
+        self.exitFlag = True
+        self.join(1.0)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+
+def check_serial_throughput(controller, seconds):
+    # Connects real Serial reader to the fake controller and counts delivered frames
+    from connection.connection import Serial
+
+    received = []
+    ser = Serial(controller.frame_protocol)
+    ser.set_data_receiver(lambda rows, columns, pressure_map: received.append(pressure_map.sum()))
+    controller.start()
+    ser.connect_to_controller(controller.port_name)
+    time.sleep(seconds)
+    ser.exitFlag = True
+    ser.wait()
+    controller.stop()
+    return len(received), ser.lost_frames, ser.frame_latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--binary", action="store_true", help="Send binary frames instead of csv lines")
+    parser.add_argument("--bits", type=int, default=16, help="Sample size of binary frames: 12 or 16")
+    parser.add_argument("--rate", type=float, default=50.0, help="Frames per second, 0 sends as fast as possible")
+    parser.add_argument("--check", type=float, default=0.0, metavar="SECONDS",
+                        help="Read frames with Serial for given time and print throughput")
+    args = parser.parse_args()
+
+    fake = FakeController(FrameProtocol.binary if args.binary else FrameProtocol.csv, args.bits, args.rate)
+    if args.check > 0.0:
+        frames_received, frames_lost, frame_latency = check_serial_throughput(fake, args.check)
+        print("Received: " + str(round(frames_received / args.check, 1)) + " frames/s\tLost: " + str(frames_lost))
+        print(frame_latency.summary())
+    else:
+        print("Fake controller is available at: " + fake.port_name)
+        fake.start()
+        while 1:
+            time.sleep(60)
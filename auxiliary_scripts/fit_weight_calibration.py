@@ -0,0 +1,97 @@
+import os
+import time
+import random
+import numpy as np
+
+# Suppress tensorflow noncritical warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+from keras.models import load_model
+
+from item.item_utils import loadItems, selectDesiredItems, selectDesiredPlacement
+from item.item import ItemType, ItemPlacement
+from item.classifier.image_utils import ImageParser, splitDataToTraining
+from item.classifier.weight_estimation import estimate_weight, mean_absolute_percentage_square_error
+from item.classifier.weight_calibration import fit_weight_calibration, CellWeightCalibration
+from item.classifier.inference_backends import InferenceBackend, create_inference_runner
+from sensor.params import ImageMask
+
+# Definitions
+path = "c_img_v2"
+weight_model_path = "item/classifier/models/weight_model.keras"
+calibration_path = "item/classifier/models/weight_calibration.npz"
+ridges = [0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0]
+latency_calls = 500
+mask = ImageMask()
+parser = ImageParser()
+
+
+def get_errors(predicted, real):
+    relative = np.abs(predicted - real) / real * 100
+    return "avg err: " + str(round(float(np.mean(np.abs(predicted - real))), 1)) + " g\tavg % err: " + \
+        str(round(float(np.mean(relative)), 2)) + "%\tmax % err: " + str(round(float(np.max(relative)), 2)) + "%"
+
+
+def get_raw_image(image):
+    # Dataset keeps only extracted images, raw calibrated values are restored as the sensor would cast them
+    return 4095.0 - np.asarray(image, dtype=np.float64) * 4095.0 / 255.0
+
+
+def measure_latency(function, image):
+    start_time = time.perf_counter()
+    for k in range(latency_calls):
+        function(image)
+    return str(round((time.perf_counter() - start_time) / latency_calls * 1e6, 1)) + " us"
+
+
+# Load items, the same set as weight model is trained on
+itemList = loadItems(path, mask.getMask())
+itemList = selectDesiredItems(itemList, [ItemType.book, ItemType.food_tray, ItemType.mug_full, ItemType.mug_empty,
+                                         ItemType.plate_full, ItemType.plate_empty, ItemType.phone, ItemType.drug,
+                                         ItemType.hand_any, ItemType.hand_hard, ItemType.hand_mid, ItemType.hand_light])
+itemList = selectDesiredPlacement(itemList, [ItemPlacement.center, ItemPlacement.side])
+itemList = [item for item in itemList if int(item.weight) > 0]
+random.seed(0)
+random.shuffle(itemList)
+[trainingSet, validationSet, testSet] = splitDataToTraining(itemList, 7, 2, 1)
+
+x_train = parser.parseImagesToArray(trainingSet)
+y_train = parser.parseWeightsToArray(trainingSet).astype(float)
+x_val = parser.parseImagesToArray(validationSet)
+y_val = parser.parseWeightsToArray(validationSet).astype(float)
+x_test = parser.parseImagesToArray(testSet)
+y_test = parser.parseWeightsToArray(testSet).astype(float)
+
+# Strength of pulling fields to the shared curve is chosen on validation set
+best_ridge = None
+best_error = None
+for ridge in ridges:
+    calibration = CellWeightCalibration(fit_weight_calibration(x_train, y_train, ridge))
+    error = float(np.mean(np.abs(calibration.estimate_many(x_val) - y_val) / y_val))
+    print("Ridge: " + str(ridge) + "\tvalidation avg % err: " + str(round(error * 100, 2)) + "%")
+    if best_error is None or error < best_error:
+        best_ridge = ridge
+        best_error = error
+
+# Final calibration uses training and validation images
+calibration = CellWeightCalibration(fit_weight_calibration(np.concatenate([x_train, x_val]),
+                                                           np.concatenate([y_train, y_val]), best_ridge))
+calibration.save(calibration_path)
+print("Calibration with ridge " + str(best_ridge) + " saved to: " + calibration_path)
+
+# Report on test set
+weight_model = load_model(weight_model_path, custom_objects={
+    'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+weight_runner = create_inference_runner(weight_model, InferenceBackend.tf_function)
+
+y_hyperbola = np.array([estimate_weight(get_raw_image(image)) for image in x_test])
+y_neuron = weight_runner.predict(x_test).ravel()
+y_calibrated = calibration.estimate_many(x_test)
+
+print("Test images: " + str(len(x_test)))
+print("Hyperbola (internal):\t" + get_errors(y_hyperbola, y_test) + "\tlatency: " +
+      measure_latency(lambda x: estimate_weight(get_raw_image(x)), x_test[0]))
+print("Weight model (neuron):\t" + get_errors(y_neuron, y_test) + "\tlatency: " +
+      measure_latency(lambda x: weight_runner.predict(np.expand_dims(x, axis=0)), x_test[0]))
+print("Fields calibration:\t" + get_errors(y_calibrated, y_test) + "\tlatency: " +
+      measure_latency(calibration.estimate, x_test[0]))
@@ -0,0 +1,128 @@
+import os
+import time
+import pickle
+import random
+import numpy as np
+
+# Suppress tensorflow noncritical warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+from keras.models import load_model
+
+from item.item_utils import loadItems, selectDesiredItems, selectDesiredPlacement
+from item.item import ItemType, ItemPlacement
+from item.classifier.image_utils import ImageParser, splitDataToTraining
+from item.classifier.image_recognition import Classifier
+from item.classifier.weight_estimation import mean_absolute_percentage_square_error
+from item.classifier.inference_backends import InferenceBackend, TFLiteRunner, create_inference_runner
+from item.classifier.quantization import export_int8_model
+from sensor.params import ImageMask
+from debug.latency import LatencyStatistics
+
+# Definitions
+path = "c_img_v2"
+classifier_model_path = "item/classifier/models/classifier_model.keras"
+weight_model_path = "item/classifier/models/weight_model.keras"
+representative_size = 300
+latency_calls = 500
+mask = ImageMask()
+parser = ImageParser()
+
+
+def get_int8_path(model_path):
+    return os.path.splitext(model_path)[0] + "_int8.tflite"
+
+
+def get_labels(itemlist, output_types):
+    # One hot labels in order of model outputs, items of other types are skipped
+    labels = np.zeros((len(itemlist), len(output_types)))
+    for i, item in enumerate(itemlist):
+        labels[i, output_types.index(item.type.value)] = 1
+    return labels
+
+
+def get_weight_error(predicted_weights, weights):
+    weighted = weights > 0
+    return np.mean(np.abs(predicted_weights.ravel()[weighted] - weights[weighted]) / weights[weighted]) * 100
+
+
+def measure_latency(runner, image):
+    latency = LatencyStatistics("", window=latency_calls)
+    for k in range(latency_calls):
+        start_time = time.perf_counter()
+        runner.predict(image)
+        latency.add(time.perf_counter() - start_time)
+    return "p50=" + str(round(latency.get_percentile(50) * 1e3, 3)) + " ms\tp99=" + \
+        str(round(latency.get_percentile(99) * 1e3, 3)) + " ms"
+
+
+def print_runner_comparison(name, model, int8_runner, image):
+    float_tflite = TFLiteRunner(model)
+    print(name)
+    print("\tkeras tf.function:\t" + measure_latency(create_inference_runner(model, InferenceBackend.tf_function),
+                                                       image))
+    print("\ttflite float32:\t\t" + measure_latency(float_tflite, image) + "\t" +
+          str(len(float_tflite.model_content) // 1024) + " kB")
+    print("\ttflite int8:\t\t" + measure_latency(int8_runner, image) + "\t" +
+          str(len(int8_runner.model_content) // 1024) + " kB")
+
+
+# Load items, the same way as for training
+itemList = loadItems(path, mask.getMask())
+itemList = selectDesiredItems(itemList, [ItemType.book, ItemType.mug_full, ItemType.mug_empty,
+                                         ItemType.plate_full, ItemType.plate_empty, ItemType.phone, ItemType.drug,
+                                         ItemType.hand_any, ItemType.hand_hard, ItemType.hand_mid, ItemType.hand_light])
+itemList = selectDesiredPlacement(itemList, [ItemPlacement.center, ItemPlacement.side, ItemPlacement.edge])
+for item in itemList:
+    if item.type == ItemType.mug_empty or item.type == ItemType.mug_full:
+        item.type = ItemType.mug_any
+    if item.type == ItemType.plate_empty or item.type == ItemType.plate_full:
+        item.type = ItemType.plate_any
+    if item.type == ItemType.hand_light or item.type == ItemType.hand_mid or item.type == ItemType.hand_hard:
+        item.type = ItemType.hand_any
+random.seed(0)
+random.shuffle(itemList)
+
+# Quantization is calibrated on training part, float and int8 models are compared only on images not used for it
+[calibrationSet, validationSet, testSet] = splitDataToTraining(itemList, 7, 0, 3)
+representative_images = parser.parseImagesToArray(calibrationSet[:representative_size])
+images = parser.parseImagesToArray(testSet)
+weights = parser.parseWeightsToArray(testSet).astype(float)
+
+# Classifier
+classifier = Classifier()
+classifier.import_model(classifier_model_path)
+classifier_int8_path = get_int8_path(classifier_model_path)
+export_int8_model(classifier.model, representative_images, classifier_int8_path)
+with open(os.path.splitext(classifier_int8_path)[0] + ".names", 'wb') as pickle_file:
+    pickle.dump(classifier.output_types, pickle_file)
+
+classifier_int8 = Classifier()
+classifier_int8.import_model(classifier_int8_path)
+
+known_items = [item for item in testSet if item.type.value in classifier.output_types]
+known_images = parser.parseImagesToArray(known_items)
+labels = get_labels(known_items, classifier.output_types)
+column_names = [ItemType(output_type).name for output_type in classifier.output_types]
+for name, model in [("float32", classifier), ("int8", classifier_int8)]:
+    table = model.evaluationTable(known_images, labels)
+    table.columns = column_names
+    table.index = column_names
+    accuracy = np.mean(np.argmax(model.predict(known_images), axis=1) == np.argmax(labels, axis=1))
+    print("Classifier " + name + ", accuracy: " + str(round(accuracy, 4)))
+    print(table.to_string())
+
+# Weight model
+weight_model = load_model(weight_model_path, custom_objects={
+    'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+weight_int8_path = get_int8_path(weight_model_path)
+export_int8_model(weight_model, representative_images, weight_int8_path)
+weight_int8 = TFLiteRunner.from_file(weight_int8_path)
+print("Evaluated on " + str(len(testSet)) + " images, quantization calibrated on " +
+      str(len(representative_images)) + " other images")
+print("Weight error float32: " + str(round(get_weight_error(weight_model.predict(images, verbose=0), weights), 2)) +
+      "%\tint8: " + str(round(get_weight_error(weight_int8.predict(images), weights), 2)) + "%")
+
+# Latency of single frame and size of models
+print_runner_comparison("Classifier latency", classifier.model, classifier_int8.model, images[:1])
+print_runner_comparison("Weight model latency", weight_model, weight_int8, images[:1])
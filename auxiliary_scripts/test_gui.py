@@ -10,16 +10,12 @@ from datetime import datetime, timedelta
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from connection.connection import Serial
+from item.classifier.weight_estimation import sum_weight_of_fields, WEIGHT_MULTIPLIER
 
 import numpy as np
 from PIL import Image as im
 
-HYP_A = 35108.0
-HYP_X0 = 0.0
-HYP_Y = 0.42
-RES = 470
 FILE_OUT_WEIGHT = "weight_test"
-WEIGHT_MULTIPLIER = 2.5740
 
 IMAGE_COUNTER = 1
 IMAGE_FOLDER = "c_img_v2"
@@ -29,20 +25,7 @@ IMAGE_ADD_CALIBRATION_MAP = True
 
 
 def weight_of_items(map_of_pressure, max_value):
-    weight = 0
-
-    for row in map_of_pressure:
-        for tile in row:
-            # Have to be rounded because otherwise have calculation errors with small weight
-            normalized_pressure = round(tile * (4095 / max_value), 1)
-            try:
-                if normalized_pressure >= 4095.0:
-                    continue
-                resistance = (RES * normalized_pressure) / (4095 - normalized_pressure)
-                weight += (HYP_X0 + (HYP_A / (resistance - HYP_Y)))
-            except ZeroDivisionError:
-                continue
-
+    weight = sum_weight_of_fields(map_of_pressure, max_value)
     if weight < 0.0:
         weight = 0.0
     return weight
@@ -212,7 +195,7 @@ class Ui_MainWindow(object):
     def updateMap(self, n_rows, n_columns, new_pressure_map):
         # TODO coś z tymi rzędami i kolumnami zrobić
         # może wyjebać?
-        self.map = new_pressure_map
+        self.map = np.array(new_pressure_map, dtype=float)
 
         if self.map_calibrated is None:
             self.recalibrateMap(new_pressure_map)
@@ -220,7 +203,8 @@ class Ui_MainWindow(object):
         self.repaintMap()
 
     def recalibrateMap(self, new_map):
-        self.map_calibrated = new_map
+        # Serial reuses its buffer for every frame, so calibration has to be copied
+        self.map_calibrated = np.array(new_map, dtype=float)
 
         for i in range(self.columns):
             for j in range(self.rows):
@@ -245,7 +229,7 @@ class Ui_MainWindow(object):
         map_255 = [[0 for x in range(self.columns)] for y in range(self.rows)]
         map_with_cabration_diff = [[0 for x in range(self.columns)] for y in range(self.rows)]
 
-        map_max_value = max(max(self.map))
+        map_max_value = np.max(self.map)
         filterA = 4000
         filterB = 3950
         filterC = 3900
@@ -0,0 +1,153 @@
+import time
+import random
+import numpy as np
+from copy import deepcopy
+
+from keras.models import load_model
+
+from item.item_utils import loadItems, selectDesiredItems, selectDesiredPlacement, rotate_item, flip_item
+from item.item import ItemType, ItemPlacement
+from item.classifier.image_utils import ImageParser, splitDataToTraining
+from item.classifier.image_recognition import Classifier
+from item.classifier.multihead_recognition import MultiheadClassifier
+from item.classifier.weight_estimation import mean_absolute_percentage_square_error
+from item.classifier.inference_backends import InferenceBackend, create_inference_runner
+from item.classifier.position_recognition import check_item_on_edge
+from sensor.params import ImageMask
+from debug.latency import LatencyStatistics
+
+# Definitions
+path = "c_img_v2"
+classifier_model_path = "item/classifier/models/classifier_model.keras"
+weight_model_path = "item/classifier/models/weight_model.keras"
+multihead_model_path = "item/classifier/models/multihead_model.keras"
+mask = ImageMask()
+parser = ImageParser()
+latency_calls = 500
+
+
+def get_accuracy(predicted_types, itemlist):
+    return np.mean([predicted == item.type for predicted, item in zip(predicted_types, itemlist)])
+
+
+def get_weight_error(predicted_weights, itemlist):
+    # Mean absolute percentage error, items without weight are skipped
+    weights = np.array([item.weight for item in itemlist], dtype=float)
+    predicted_weights = np.asarray(predicted_weights, dtype=float).ravel()
+    weighted = weights > 0
+    return np.mean(np.abs(predicted_weights[weighted] - weights[weighted]) / weights[weighted]) * 100
+
+
+def measure_latency(function, image):
+    latency = LatencyStatistics("", window=latency_calls)
+    for k in range(latency_calls):
+        start_time = time.perf_counter()
+        function(image)
+        latency.add(time.perf_counter() - start_time)
+    return latency
+
+
+# Load items
+itemList = loadItems(path, mask.getMask())
+itemList = selectDesiredItems(itemList, [ItemType.book,
+                                         ItemType.mug_full, ItemType.mug_empty,
+                                         ItemType.plate_full, ItemType.plate_empty, ItemType.phone, ItemType.drug,
+                                         ItemType.hand_any, ItemType.hand_hard, ItemType.hand_mid, ItemType.hand_light])
+itemList = selectDesiredPlacement(itemList, [ItemPlacement.center, ItemPlacement.side, ItemPlacement.edge])
+
+# Merge items of same type, the same way as for classifier
+for item in itemList:
+    if item.type == ItemType.mug_empty or item.type == ItemType.mug_full:
+        item.type = ItemType.mug_any
+    if item.type == ItemType.plate_empty or item.type == ItemType.plate_full:
+        item.type = ItemType.plate_any
+    if item.type == ItemType.hand_light or item.type == ItemType.hand_mid or item.type == ItemType.hand_hard:
+        item.type = ItemType.hand_any
+
+# Remove items that would be classified by node as on edge
+itemList = [item for item in itemList if not check_item_on_edge(item.getExtractedImage(), mask)]
+
+# Make every possible rotation and flip of items, weight stays the same
+newList = []
+for item in itemList:
+    for flip in [False, True]:
+        for angle in [0, 90, 180, 270]:
+            new_item = deepcopy(item)
+            if flip:
+                new_item = flip_item(new_item)
+            if angle > 0:
+                new_item = rotate_item(new_item, angle)
+            newList.append(new_item)
+itemList = newList
+random.shuffle(itemList)
+
+# Make every class of items same size
+labels = parser.parseLabelsToArray(itemList)
+min_sum = int(min(labels.sum(axis=0)))
+class_cnt = np.zeros(labels.shape[1], dtype=int)
+newList = []
+for i, item in enumerate(itemList, start=0):
+    if class_cnt[np.argmax(labels[i])] < min_sum:
+        class_cnt[np.argmax(labels[i])] += 1
+        newList.append(item)
+itemList = newList
+
+# Split data to training
+[trainingSet, validationSet, testSet] = splitDataToTraining(itemList, 7, 2, 1)
+
+# Parsing images, labels and weights so keras can use them
+x_train = parser.parseImagesToArray(trainingSet)
+y_train = parser.parseLabelsToArray(trainingSet)
+w_train = parser.parseWeightsToArray(trainingSet)
+x_val = parser.parseImagesToArray(validationSet)
+y_val = parser.parseLabelsToArray(validationSet)
+w_val = parser.parseWeightsToArray(validationSet)
+x_test = parser.parseImagesToArray(testSet)
+
+multihead = MultiheadClassifier()
+##############################
+# multihead.import_model(multihead_model_path)
+###############
+multihead.set_model(MultiheadClassifier.get_default_model(y_train.shape[1]),
+                    parser.parseOrdinalNumbersToItemTypes(list(range(0, y_train.shape[1]))))
+multihead.trainModel(x_train, y_train, w_train, x_val, y_val, w_val)
+##############################
+
+# Two separate models used by table node until now
+classifier = Classifier()
+classifier.import_model(classifier_model_path)
+weight_model = load_model(weight_model_path, custom_objects={
+    'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+
+# Accuracy on the same test set
+separate_types = classifier.predict_items_with_confidence(x_test, 0.0, classifier.output_types)
+separate_weights = create_inference_runner(weight_model).predict(x_test)
+multihead_types, multihead_weights = multihead.predict_items_and_weights(x_test, 0.0, multihead.output_types)
+
+separate_accuracy = get_accuracy(separate_types, testSet)
+multihead_accuracy = get_accuracy(multihead_types, testSet)
+separate_error = get_weight_error(separate_weights, testSet)
+multihead_error = get_weight_error(multihead_weights, testSet)
+
+# Latency of single frame, both setups use the same backend
+classifier_runner = create_inference_runner(classifier.model, InferenceBackend.tf_function)
+weight_runner = create_inference_runner(weight_model, InferenceBackend.tf_function)
+multihead_runner = create_inference_runner(multihead.model, InferenceBackend.tf_function)
+image = x_test[:1]
+separate_latency = measure_latency(lambda x: (classifier_runner.predict(x), weight_runner.predict(x)), image)
+multihead_latency = measure_latency(multihead_runner.predict, image)
+
+print("\t\t\tTwo models\tMultihead\tDelta")
+print("Type accuracy:\t\t" + str(round(separate_accuracy, 4)) + "\t\t" + str(round(multihead_accuracy, 4)) +
+      "\t\t" + str(round(multihead_accuracy - separate_accuracy, 4)))
+print("Weight error [%]:\t" + str(round(separate_error, 2)) + "\t\t" + str(round(multihead_error, 2)) +
+      "\t\t" + str(round(multihead_error - separate_error, 2)))
+print("Latency p50 [ms]:\t" + str(round(separate_latency.get_percentile(50) * 1e3, 3)) + "\t\t" +
+      str(round(multihead_latency.get_percentile(50) * 1e3, 3)) + "\t\t" +
+      str(round((multihead_latency.get_percentile(50) - separate_latency.get_percentile(50)) * 1e3, 3)))
+print("Latency p99 [ms]:\t" + str(round(separate_latency.get_percentile(99) * 1e3, 3)) + "\t\t" +
+      str(round(multihead_latency.get_percentile(99) * 1e3, 3)) + "\t\t" +
+      str(round((multihead_latency.get_percentile(99) - separate_latency.get_percentile(99)) * 1e3, 3)))
+
+# Export model, loaded by smart_table.py --multihead
+multihead.export_model(multihead_model_path)
@@ -0,0 +1,63 @@
+import os
+import random
+import numpy as np
+
+# Suppress tensorflow noncritical warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+from keras.models import load_model
+
+from item.item_utils import loadItems
+from item.classifier.image_recognition import Classifier
+from item.classifier.position_recognition import recognise_position
+from item.classifier.weight_estimation import mean_absolute_percentage_square_error
+from item.classifier.recognition_cache import RecognitionCache
+from sensor.params import ImageMask
+
+# Definitions
+path = "c_img_v2"
+classifier_model_path = "item/classifier/models/classifier_model.keras"
+weight_model_path = "item/classifier/models/weight_model.keras"
+frames_per_item = 5
+noise = 2.0
+mask = ImageMask()
+
+# Every item lies on the table for few frames, sensor noise makes them slightly different
+items = loadItems(path, mask.getMask())
+random.shuffle(items)
+frames = []
+for item in items:
+    for k in range(frames_per_item):
+        frame = np.array(item.getExtractedImage(), dtype=float) + np.random.normal(0, noise, size=(16, 16))
+        frames.append(np.clip(frame, 0, 255) * (mask.getMask() > 0))
+frames = np.array(frames)
+
+# Results without cache are the reference
+classifier = Classifier()
+classifier.import_model(classifier_model_path)
+weight_model = load_model(weight_model_path, custom_objects={
+    'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+types = classifier.predict_items_with_confidence(frames, 0.75, classifier.output_types)
+weights = weight_model.predict(frames, verbose=0).ravel()
+placements = [recognise_position(frame, mask.getMask(), [1.5, 2.5]) for frame in frames]
+
+print("Bits\tHit rate\tType changed\tPlacement changed\tWeight error [%]")
+for bits in range(2, 9):
+    cache = RecognitionCache(quantization_bits=bits, max_entries=len(frames), ttl=float("inf"),
+                             max_memory=1024 * 1024 * 1024)
+    type_changed = 0
+    placement_changed = 0
+    weight_errors = []
+    for k, frame in enumerate(frames):
+        key = cache.get_key(frame)
+        cached = cache.get(key, now=0.0)
+        if cached is None:
+            cache.put(key, (placements[k], types[k], weights[k]), now=0.0)
+            continue
+        type_changed += cached[1] != types[k]
+        placement_changed += cached[0] != placements[k]
+        weight_errors.append(abs(cached[2] - weights[k]) / max(abs(weights[k]), 1.0) * 100)
+
+    print(str(bits) + "\t" + str(round(cache.get_hit_rate(), 3)) + "\t\t" +
+          str(round(type_changed / len(frames), 4)) + "\t\t" + str(round(placement_changed / len(frames), 4)) +
+          "\t\t\t" + str(round(float(np.mean(weight_errors)) if weight_errors else 0.0, 2)))
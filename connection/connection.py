@@ -6,55 +6,21 @@ from sys import platform
 import serial
 import serial.tools.list_ports as list_ports
 
-from PyQt5 import QtCore
-
+from connection.frame_source import FrameSource
+from connection.frame_parsing import FrameProtocol, decode_csv_frame, decode_binary_frame, binary_frame_size, \
+    BINARY_SYNC_WORD, BINARY_HEADER, BINARY_COUNTER_MODULO
 from debug.debug import *
 
 
-class Serial(QtCore.QThread):
-    # TODO this rows and columns can't be defined here but must be taken from sensor
-    rows = 16
-    columns = 16
-    max_possible_value = 4095
-    pressure_map = None
-    ser = None
-    ui = None
-    data_receiver = None
-
-    pressureMapUpdated = QtCore.pyqtSignal(int, int, list)
-
-    def __init__(self):
-        super(Serial, self).__init__()
-        self.pressure_map = [[0 for x in range(self.columns)] for y in range(self.rows)]
-
-        self.exitFlag = False
-
-    def set_ui(self, ui):
-        self.ui = ui
-        self.start_communication_with_ui()
-
-    def set_data_receiver(self, receiver):
-        self.data_receiver = receiver
+class Serial(FrameSource):
+    receive_buffer = None
+    max_receive_buffer_size = 16384
+    frame_start_time = 0.0
 
-    def start_communication_with_ui(self):
-        if self.data_receiver is not None and self.ser is not None:
-            self.pressureMapUpdated.connect(self.data_receiver)
-            self.start()
-            return
-
-        if self.ui is not None and self.ser is not None:
-            self.pressureMapUpdated.connect(self.ui.updateMap)
-            self.start()
-            return
-
-    def send_data_explicitely(self):
-        if self.data_receiver is not None and self.ser is not None:
-            self.data_receiver(self.rows, self.columns, self.pressure_map)
-            return
-
-        if self.ui is not None and self.ser is not None:
-            self.ui.updateMap(self.rows, self.columns, self.pressure_map)
-            return
+    def __init__(self, frame_protocol=FrameProtocol.csv, rows=16, columns=16, max_possible_value=4095):
+        super(Serial, self).__init__(rows, columns, max_possible_value)
+        self.frame_protocol = frame_protocol
+        self.receive_buffer = bytearray()
 
     @staticmethod
     def get_list_of_ports():
@@ -96,63 +62,99 @@ class Serial(QtCore.QThread):
 
         return 0
 
+    def pop_csv_frame(self):
+        line_end = self.receive_buffer.find(b'\n')
+        if line_end < 0:
+            return None
+        frame = bytes(self.receive_buffer[:line_end + 1])
+        del self.receive_buffer[:line_end + 1]
+        return frame
+
+    def pop_binary_frame(self):
+        while True:
+            # Everything before sync word is dropped, that's how we get synchronized after connection or bad frame
+            sync_idx = self.receive_buffer.find(BINARY_SYNC_WORD)
+            if sync_idx < 0:
+                del self.receive_buffer[:-1]  # Last byte may be the first half of sync word
+                return None
+            del self.receive_buffer[:sync_idx]
+
+            if len(self.receive_buffer) < len(BINARY_SYNC_WORD) + BINARY_HEADER.size:
+                return None
+            sample_bits = self.receive_buffer[len(BINARY_SYNC_WORD)]
+            if sample_bits != 12 and sample_bits != 16:
+                # It was not a real sync word, look for next one
+                del self.receive_buffer[:1]
+                continue
+
+            frame_size = binary_frame_size(self.rows, self.columns, sample_bits)
+            if len(self.receive_buffer) < frame_size:
+                return None
+            frame = bytes(self.receive_buffer[:frame_size])
+            del self.receive_buffer[:frame_size]
+            return frame
+
+    def decode_frame(self, frame):
+        if self.frame_protocol is FrameProtocol.binary:
+            decoded_frame = decode_binary_frame(frame, self.rows, self.columns, self.max_possible_value,
+                                                out=self.pressure_map)
+            if decoded_frame is None:
+                return None
+            self.count_lost_frames(decoded_frame[1])
+            return decoded_frame[0]
+        return decode_csv_frame(frame, self.rows, self.columns, self.max_possible_value, out=self.pressure_map)
+
+    def receive_data(self, chunk, arrival_time):
+        if len(self.receive_buffer) == 0:
+            self.frame_start_time = arrival_time
+        self.receive_buffer += chunk
+
+        while True:
+            if self.frame_protocol is FrameProtocol.binary:
+                frame = self.pop_binary_frame()
+            else:
+                frame = self.pop_csv_frame()
+            if frame is None:
+                break
+
+            pressure_map = self.decode_frame(frame)
+            if pressure_map is not None:
+                self.frame_latency.add_since(self.frame_start_time)
+                if self.frame_recorder is not None:
+                    self.frame_recorder.record(self.pressure_map, arrival_time)
+                # self.pressureMapUpdated.emit(self.rows, self.columns, self.pressure_map)
+                self.send_data_explicitely()
+
+            # Whatever is left in buffer came with the last chunk
+            self.frame_start_time = arrival_time
+
+        # Controller is not sending frames, only garbage, do not let buffer grow forever
+        if len(self.receive_buffer) > self.max_receive_buffer_size:
+            debug(DBGLevel.ERROR, "Receive buffer overflow, dropping " + str(len(self.receive_buffer)) + " bytes")
+            self.receive_buffer.clear()
+
+    def count_lost_frames(self, frame_counter):
+        if self.last_frame_counter is not None:
+            lost = (frame_counter - self.last_frame_counter - 1) % BINARY_COUNTER_MODULO
+            if lost > 0:
+                self.lost_frames += lost
+                debug(DBGLevel.WARN, "Lost " + str(lost) + " frames from controller")
+        self.last_frame_counter = frame_counter
+
     def run(self):
         if self.ser is not None:
             self.ser.flush()
             try:
                 while not self.exitFlag:
-                    time.sleep(0.01)
-
-                    # Read values from serial and make sure it's not garbage
+                    # Block until controller sends anything, timeout of serial lets us check exit flag
                     try:
-                        input_msg = self.ser.readline().decode('utf-8')
-                        input_msg = input_msg.lstrip('\0')
+                        chunk = self.ser.read(max(1, self.ser.in_waiting))
                     except:
-                        input_msg = str()
-                        debug(DBGLevel.ERROR, "Bad read of serial: \"" + input_msg + "\"")
+                        debug(DBGLevel.ERROR, "Bad read of serial")
                         continue
 
-                    corrupted_input_msg = False
-                    if len(input_msg) > 0 and input_msg[0] != '\r' and input_msg[0] != '\n' and input_msg[0] != '\0':
-                        lines = input_msg.strip().split('|')
-                        try:
-                            lines.remove('')  # Last line is always empty
-                        except:
-                            pass
-
-                        if len(lines) is not self.rows:
-                            debug(DBGLevel.ERROR, "Bad sensor read - bad number of rows: " + str(len(lines)))
-                            corrupted_input_msg = True
-                            continue
-
-                        i = 0
-                        for line in lines:
-                            list_of_values = line.strip().split(',')
-
-                            if len(list_of_values) is not self.columns:
-                                debug(DBGLevel.ERROR,
-                                      "Bad sensor read - bad number of columns: " + str(len(list_of_values)))
-                                corrupted_input_msg = True
-                                break
-
-                            j = 0
-                            for value in list_of_values:
-                                try:
-                                    field_pressure = float(value)
-                                    if field_pressure > self.max_possible_value:
-                                        raise Exception("Read value is too high")
-                                    self.pressure_map[j][i] = field_pressure
-                                except:
-                                    corrupted_input_msg = True
-                                    debug(DBGLevel.ERROR,
-                                          "Kurwaaaaaaaaaaaaa\n" + str(i) + "\n" + str(j) + "\n" + str(value))
-                                j = j + 1
-                            i = i + 1
-                            # TODO multithreating on python
-
-                        if not corrupted_input_msg:
-                            # self.pressureMapUpdated.emit(self.rows, self.columns, self.pressure_map)
-                            self.send_data_explicitely()
+                    if len(chunk) > 0:
+                        self.receive_data(chunk, time.monotonic())
             except Exception as e:
                 print(e)
                 exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -0,0 +1,147 @@
+import struct
+import binascii
+import numpy as np
+from enum import Enum
+
+from debug.debug import *
+
+CSV_ALLOWED_CHARACTERS = b'0123456789,|'
+
+#####
+# Binary frame v1
+#   sync word           2 B     0xA5 0x5A
+#   sample bits         1 B     12 (two samples packed in 3 bytes) or 16 (little endian)
+#   frame counter       2 B     little endian, wraps around
+#   samples             384 B or 512 B for 16x16 sensor, sent row after row like in csv frame
+#   crc                 2 B     CRC-16/CCITT-FALSE of everything after sync word, little endian
+#####
+BINARY_SYNC_WORD = b'\xa5\x5a'
+BINARY_HEADER = struct.Struct('<BH')
+BINARY_CRC = struct.Struct('<H')
+BINARY_CRC_INIT = 0xFFFF
+BINARY_COUNTER_MODULO = 0x10000
+
+
+class FrameProtocol(Enum):
+    csv = 0
+    binary = 1
+
+
+def decode_csv_frame(raw_msg, rows, columns, max_possible_value, out=None):
+    # Controller sends one frame per line: ADC values separated by ',' and rows separated by '|'
+    # Returned map is indexed [column][row] exactly like the old nested list was
+    msg = raw_msg.lstrip(b'\0')
+    if len(msg) == 0 or msg[0] in b'\r\n\0':
+        return None
+
+    msg = msg.strip()
+    if msg.endswith(b'|'):
+        msg = msg[:-1]  # Last line is always empty
+
+    # Validate shape of the frame on bytes, counting is done in C so it costs almost nothing
+    lines = msg.split(b'|')
+    if len(lines) != rows:
+        debug(DBGLevel.ERROR, "Bad sensor read - bad number of rows: " + str(len(lines)))
+        return None
+    for line in lines:
+        if line.count(b',') != columns - 1:
+            debug(DBGLevel.ERROR, "Bad sensor read - bad number of columns: " + str(line.count(b',') + 1))
+            return None
+
+    # Only digits and separators are expected, and every value has to have at least one digit
+    if len(msg.translate(None, CSV_ALLOWED_CHARACTERS)) > 0 or msg.startswith(b',') or msg.endswith(b',') \
+            or b',,' in msg or b',|' in msg or b'|,' in msg:
+        debug(DBGLevel.ERROR, "Bad sensor read - corrupted values")
+        return None
+
+    # Parse all values in one pass
+    try:
+        values = np.fromstring(msg.replace(b'|', b',').decode('ascii'), dtype=np.int64, sep=',')
+    except ValueError:
+        debug(DBGLevel.ERROR, "Bad sensor read - values could not be parsed")
+        return None
+
+    if values.size != rows * columns:
+        debug(DBGLevel.ERROR, "Bad sensor read - bad number of values: " + str(values.size))
+        return None
+    if values.max() > max_possible_value:
+        debug(DBGLevel.ERROR, "Bad sensor read - read value is too high: " + str(values.max()))
+        return None
+
+    if out is None:
+        out = np.empty((columns, rows), dtype=np.uint16)
+    np.copyto(out, values.reshape(rows, columns).T, casting='unsafe')
+    return out
+
+
+def binary_payload_size(rows, columns, sample_bits):
+    if sample_bits == 12:
+        return (rows * columns + 1) // 2 * 3
+    return rows * columns * 2
+
+
+def binary_frame_size(rows, columns, sample_bits):
+    return len(BINARY_SYNC_WORD) + BINARY_HEADER.size + binary_payload_size(rows, columns,
+                                                                           sample_bits) + BINARY_CRC.size
+
+
+def encode_binary_frame(pressure_map, frame_counter, sample_bits=16):
+    # Pure python encoder (the same thing controller does), pressure map is indexed [column][row]
+    columns = len(pressure_map)
+    rows = len(pressure_map[0])
+    samples = [int(pressure_map[j][i]) for i in range(rows) for j in range(columns)]
+
+    if sample_bits == 12:
+        if len(samples) % 2:
+            samples.append(0)
+        payload = bytearray()
+        for k in range(0, len(samples), 2):
+            first = samples[k] & 0x0FFF
+            second = samples[k + 1] & 0x0FFF
+            payload += bytes([first & 0xFF, (first >> 8) | ((second & 0x0F) << 4), second >> 4])
+    elif sample_bits == 16:
+        payload = struct.pack('<' + str(len(samples)) + 'H', *samples)
+    else:
+        raise ValueError("Unsupported sample size: " + str(sample_bits))
+
+    body = BINARY_HEADER.pack(sample_bits, frame_counter % BINARY_COUNTER_MODULO) + bytes(payload)
+    return BINARY_SYNC_WORD + body + BINARY_CRC.pack(binascii.crc_hqx(body, BINARY_CRC_INIT))
+
+
+def decode_binary_frame(frame, rows, columns, max_possible_value, out=None):
+    # Frame has to start with sync word, returns (pressure map indexed [column][row], frame counter)
+    if not frame.startswith(BINARY_SYNC_WORD) or len(frame) < len(BINARY_SYNC_WORD) + BINARY_HEADER.size:
+        debug(DBGLevel.ERROR, "Bad sensor read - binary frame without sync word")
+        return None
+
+    sample_bits, frame_counter = BINARY_HEADER.unpack_from(frame, len(BINARY_SYNC_WORD))
+    if sample_bits != 12 and sample_bits != 16:
+        debug(DBGLevel.ERROR, "Bad sensor read - unsupported sample size: " + str(sample_bits))
+        return None
+    if len(frame) != binary_frame_size(rows, columns, sample_bits):
+        debug(DBGLevel.ERROR, "Bad sensor read - bad size of binary frame: " + str(len(frame)))
+        return None
+
+    body = memoryview(frame)[len(BINARY_SYNC_WORD):-BINARY_CRC.size]
+    if binascii.crc_hqx(body, BINARY_CRC_INIT) != BINARY_CRC.unpack_from(frame, len(frame) - BINARY_CRC.size)[0]:
+        debug(DBGLevel.ERROR, "Bad sensor read - CRC mismatch in frame: " + str(frame_counter))
+        return None
+
+    payload = body[BINARY_HEADER.size:]
+    if sample_bits == 16:
+        samples = np.frombuffer(payload, dtype='<u2')
+    else:
+        packed = np.frombuffer(payload, dtype=np.uint8).reshape(-1, 3).astype(np.uint16)
+        samples = np.empty(packed.shape[0] * 2, dtype=np.uint16)
+        samples[0::2] = packed[:, 0] | ((packed[:, 1] & 0x0F) << 8)
+        samples[1::2] = (packed[:, 1] >> 4) | (packed[:, 2] << 4)
+        samples = samples[:rows * columns]
+
+    if samples.max() > max_possible_value:
+        debug(DBGLevel.ERROR, "Bad sensor read - read value is too high: " + str(samples.max()))
+        return None
+
+    if out is None:
+        out = np.empty((columns, rows), dtype=np.uint16)
+    np.copyto(out, samples.reshape(rows, columns).T)
+    return out, frame_counter
@@ -0,0 +1,80 @@
+import os
+import struct
+import threading
+import numpy as np
+
+from debug.debug import *
+
+# Recording layout: header, then fixed size records, so file can be memory mapped as array of records
+#   header: magic, version, rows, columns, reserved
+#   record: monotonic timestamp in seconds (float64), pressure map [columns][rows] (uint16)
+RECORDING_MAGIC = b'STFR'
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct('<4sHHHH')
+
+
+def recording_record_dtype(rows, columns):
+    return np.dtype([('time', '<f8'), ('frame', '<u2', (columns, rows))])
+
+
+class FrameRecorder:
+    # Appends every decoded frame to the recording file, one preallocated record is reused for all of them
+    def __init__(self, filename, rows=16, columns=16):
+        self.filename = filename
+        self.rows = rows
+        self.columns = columns
+        self.frames_recorded = 0
+        self.record_buffer = np.zeros(1, dtype=recording_record_dtype(rows, columns))
+        self.lock = threading.Lock()
+
+        self.file = open(filename, 'wb')
+        self.file.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, rows, columns, 0))
+        debug(DBGLevel.CRITICAL, "Recording frames to: " + filename)
+
+    def record(self, pressure_map, frame_time):
+        with self.lock:
+            if self.file is None:
+                return
+            self.record_buffer['time'] = frame_time
+            np.copyto(self.record_buffer['frame'][0], pressure_map, casting='unsafe')
+            self.file.write(self.record_buffer.data)
+            self.frames_recorded += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                debug(DBGLevel.CRITICAL, "Recorded " + str(self.frames_recorded) + " frames to: " + self.filename)
+
+
+class FrameRecording:
+    # Read only view of recording file, frames are not loaded until they are used
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as recording_file:
+            header = recording_file.read(RECORDING_HEADER.size)
+        if len(header) < RECORDING_HEADER.size:
+            raise ValueError("Recording " + filename + " is too short")
+        magic, version, self.rows, self.columns, reserved = RECORDING_HEADER.unpack(header)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError("File " + filename + " is not a frame recording")
+
+        # Last record may be incomplete when recording was interrupted, it is skipped
+        record_dtype = recording_record_dtype(self.rows, self.columns)
+        n_records = (os.path.getsize(filename) - RECORDING_HEADER.size) // record_dtype.itemsize
+        if n_records > 0:
+            self.records = np.memmap(filename, dtype=record_dtype, mode='r', offset=RECORDING_HEADER.size,
+                                     shape=(n_records,))
+        else:
+            self.records = np.zeros(0, dtype=record_dtype)
+        self.times = self.records['time']
+        self.frames = self.records['frame']
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_duration(self):
+        if len(self.records) < 2:
+            return 0.0
+        return float(self.times[-1] - self.times[0])
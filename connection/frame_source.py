@@ -0,0 +1,66 @@
+import numpy as np
+
+from PyQt5 import QtCore
+
+from connection.frame_parsing import FrameProtocol
+from debug.latency import LatencyStatistics
+
+
+class FrameSource(QtCore.QThread):
+    # Everything shared by sources of pressure maps (controller on serial port, recording),
+    # frames are handed to data receiver (sensor) or to UI from thread of the source
+    rows = 16
+    columns = 16
+    max_possible_value = 4095
+    pressure_map = None
+    ser = None
+    ui = None
+    data_receiver = None
+
+    frame_protocol = FrameProtocol.csv
+    last_frame_counter = None
+    lost_frames = 0
+    frame_latency = None
+    frame_recorder = None
+
+    pressureMapUpdated = QtCore.pyqtSignal(int, int, object)
+
+    def __init__(self, rows=16, columns=16, max_possible_value=4095):
+        super(FrameSource, self).__init__()
+        self.rows = rows
+        self.columns = columns
+        self.max_possible_value = max_possible_value
+        self.pressure_map = np.zeros((self.columns, self.rows), dtype=np.uint16)
+        self.frame_latency = LatencyStatistics("Frame latency")
+
+        self.exitFlag = False
+
+    def set_ui(self, ui):
+        self.ui = ui
+        self.start_communication_with_ui()
+
+    def set_data_receiver(self, receiver):
+        self.data_receiver = receiver
+
+    def set_recorder(self, recorder):
+        self.frame_recorder = recorder
+
+    def start_communication_with_ui(self):
+        if self.data_receiver is not None and self.ser is not None:
+            self.pressureMapUpdated.connect(self.data_receiver)
+            self.start()
+            return
+
+        if self.ui is not None and self.ser is not None:
+            self.pressureMapUpdated.connect(self.ui.updateMap)
+            self.start()
+            return
+
+    def send_data_explicitely(self):
+        if self.data_receiver is not None and self.ser is not None:
+            self.data_receiver(self.rows, self.columns, self.pressure_map)
+            return
+
+        if self.ui is not None and self.ser is not None:
+            self.ui.updateMap(self.rows, self.columns, self.pressure_map)
+            return
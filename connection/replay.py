@@ -0,0 +1,78 @@
+import time
+import numpy as np
+
+from connection.frame_source import FrameSource
+from connection.frame_recording import FrameRecording
+from debug.debug import *
+
+
+class ReplaySerial(FrameSource):
+    # Drop-in replacement of connection.Serial which reads frames from recording instead of controller
+    # speed: 1.0 plays with original timing, 2.0 twice as fast, 0.0 as fast as possible
+    recording = None
+    flow_control = None
+    flow_control_timeout = 1.0
+    frames_replayed = 0
+
+    def __init__(self, recording_filename, speed=1.0, loop=False):
+        recording = FrameRecording(recording_filename)
+        super(ReplaySerial, self).__init__(recording.rows, recording.columns)
+        self.recording = recording
+        self.speed = speed
+        self.loop = loop
+        self.replay_finished = False
+
+    def set_flow_control(self, wait_function):
+        # Called after every frame, replay waits until it returns, e.g. until consumer took the frame
+        self.flow_control = wait_function
+
+    def connect_to_controller(self, port=None):
+        if len(self.recording) == 0:
+            debug(DBGLevel.CRITICAL, "Recording " + self.recording.filename + " has no frames")
+            return 1
+        self.ser = self.recording
+        debug(DBGLevel.CRITICAL, "Replaying: " + self.recording.filename + " (" + str(len(self.recording)) +
+              " frames, " + str(round(self.recording.get_duration(), 1)) + " s)")
+        self.start_communication_with_ui()
+        return 0
+
+    def wait_for_frame_time(self, replay_start, recording_start, frame_time):
+        if self.speed <= 0.0:
+            return
+        delay = replay_start + (frame_time - recording_start) / self.speed - time.monotonic()
+        if delay > 0.0:
+            time.sleep(delay)
+
+    def run(self):
+        times = self.recording.times
+        frames = self.recording.frames
+        while not self.exitFlag:
+            replay_start = time.monotonic()
+            recording_start = times[0]
+            for k in range(len(frames)):
+                if self.exitFlag:
+                    break
+                self.wait_for_frame_time(replay_start, recording_start, times[k])
+
+                frame_time = time.monotonic()
+                np.copyto(self.pressure_map, frames[k])
+                if self.frame_recorder is not None:
+                    self.frame_recorder.record(self.pressure_map, frame_time)
+                self.send_data_explicitely()
+                self.frames_replayed += 1
+
+                if self.flow_control is not None:
+                    self.flow_control(self.flow_control_timeout)
+
+            if not self.loop:
+                break
+        self.replay_finished = True
+        debug(DBGLevel.CRITICAL, "Replay finished after " + str(self.frames_replayed) + " frames")
+
+    @staticmethod
+    def get_list_of_ports():
+        return []
+
+    @staticmethod
+    def default_port_name():
+        return None
@@ -0,0 +1,49 @@
+import time
+import threading
+import numpy as np
+from collections import deque
+
+
+class LatencyStatistics:
+    def __init__(self, name="latency", window=1000):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, latency):
+        with self.lock:
+            self.samples.append(latency)
+            self.count += 1
+            if latency > self.max:
+                self.max = latency
+
+    def add_since(self, start_time):
+        self.add(time.monotonic() - start_time)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.count = 0
+            self.max = 0.0
+
+    def get_percentile(self, percentile):
+        with self.lock:
+            if len(self.samples) == 0:
+                return 0.0
+            return float(np.percentile(self.samples, percentile))
+
+    def get_mean(self):
+        with self.lock:
+            if len(self.samples) == 0:
+                return 0.0
+            return float(np.mean(self.samples))
+
+    def summary(self):
+        # All values in milliseconds
+        return self.name + ": n=" + str(self.count) + \
+            " mean=" + str(round(self.get_mean() * 1e3, 2)) + \
+            " p50=" + str(round(self.get_percentile(50) * 1e3, 2)) + \
+            " p99=" + str(round(self.get_percentile(99) * 1e3, 2)) + \
+            " max=" + str(round(self.max * 1e3, 2)) + " ms"
@@ -0,0 +1,207 @@
+import os
+import time
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+from PyQt5 import QtCore
+
+from item.item import ItemType
+from item.classifier.weight_estimation import estimate_weight, mean_absolute_percentage_square_error
+from item.classifier.weight_calibration import CellWeightCalibration
+from item.classifier.image_recognition import Classifier
+from item.classifier.multihead_recognition import MultiheadClassifier
+from item.classifier.inference_backends import InferenceBackend, TFLiteRunner, create_inference_runner
+from item.classifier.numpy_inference import NumpyModel
+from debug.debug import *
+
+
+class RecognitionRequest:
+    def __init__(self, image, raw_image):
+        self.image = image
+        self.raw_image = raw_image
+        self.future = Future()
+
+
+class BatchRecognizer(QtCore.QThread):
+    # One instance of models serves all tables, requests coming at the same time are predicted as one batch
+    item_classifier = None
+    weight_calculation_mode = None
+    weight_model = None
+    weight_runner = None
+    weight_calibration = None
+
+    confidence_treshold = 0.75
+    max_batch_size = 32
+    batch_window = 0.002
+    expected_batch_size = 0
+
+    def __init__(self, item_classifier, weight_calculation_mode="internal", weight_model=None, weight_calibration=None):
+        super(BatchRecognizer, self).__init__()
+        self.item_classifier = item_classifier
+        self.weight_calculation_mode = weight_calculation_mode
+        self.weight_model = weight_model
+        self.weight_calibration = weight_calibration
+        if weight_model is not None:
+            self.weight_runner = create_inference_runner(weight_model, InferenceBackend.keras_predict)
+
+        self.pending = []
+        self.condition = threading.Condition()
+        self.batches = 0
+        self.requests = 0
+
+        self.exitFlag = False
+        self.start()
+
+    def set_backend(self, backend):
+        # Must be set before first request, models are not guarded by lock
+        if self.item_classifier is not None:
+            self.item_classifier.set_backend(backend)
+        if self.weight_model is not None:
+            self.weight_runner = create_inference_runner(self.weight_model, backend)
+
+    def register_table(self):
+        # Recognizer waits a moment for every registered table before predicting not full batch
+        with self.condition:
+            self.expected_batch_size += 1
+
+    def submit(self, image, raw_image):
+        # Images are copied, caller can reuse its buffers as soon as this returns
+        request = RecognitionRequest(np.array(image), np.array(raw_image))
+        with self.condition:
+            self.pending.append(request)
+            self.condition.notify()
+        return request.future
+
+    def recognise(self, image, raw_image):
+        # Returns (item type, weight) of single image, blocks until its batch is predicted
+        return self.submit(image, raw_image).result()
+
+    def recognise_many(self, images, raw_images):
+        # Objects of one table are queued together, so they are predicted in the same batch
+        requests = [RecognitionRequest(np.array(image), np.array(raw_image))
+                    for image, raw_image in zip(images, raw_images)]
+        with self.condition:
+            self.pending.extend(requests)
+            self.condition.notify()
+        return [request.future.result() for request in requests]
+
+    def stop(self):
+        with self.condition:
+            self.exitFlag = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while not self.exitFlag:
+            with self.condition:
+                while len(self.pending) == 0 and not self.exitFlag:
+                    self.condition.wait(0.1)
+                if self.exitFlag:
+                    break
+                window_end = time.monotonic() + self.batch_window
+                while len(self.pending) < min(self.expected_batch_size, self.max_batch_size):
+                    remaining = window_end - time.monotonic()
+                    if remaining <= 0.0:
+                        break
+                    self.condition.wait(remaining)
+                requests = self.pending[:self.max_batch_size]
+                del self.pending[:len(requests)]
+
+            try:
+                results = self.recognise_batch(requests)
+            except Exception as e:
+                debug(DBGLevel.ERROR, "Batch recognition failed: " + str(e))
+                results = [(ItemType.unknown, 0) for x in requests]
+            for request, result in zip(requests, results):
+                request.future.set_result(result)
+
+    def recognise_batch(self, requests):
+        images = np.array([request.image for request in requests])
+        self.batches += 1
+        self.requests += len(requests)
+
+        if self.weight_calculation_mode == "multihead":
+            # Item type and weight come from single forward pass
+            item_types, weights = self.item_classifier.predict_items_and_weights(images, self.confidence_treshold,
+                                                                                 self.item_classifier.output_types)
+            return list(zip(item_types, weights))
+
+        if self.weight_calculation_mode == "internal" and self.weight_calibration is not None:
+            # Calibration of every field works on extracted images, the same as weight model
+            weights = [float(weight) for weight in self.weight_calibration.estimate_many(images)]
+        elif self.weight_calculation_mode == "internal":
+            weights = [estimate_weight(request.raw_image) for request in requests]
+        elif self.weight_calculation_mode == "neuron":
+            weights = [int(weight[0]) for weight in self.weight_runner.predict(images)]
+        else:
+            weights = [0] * len(requests)
+
+        if self.item_classifier is not None:
+            item_types = self.item_classifier.predict_items_with_confidence(images, self.confidence_treshold,
+                                                                            self.item_classifier.output_types)
+            if len(item_types) != len(requests) or not isinstance(item_types[0], ItemType):
+                # Failed prediction returns single nested unknown result
+                item_types = [ItemType.unknown] * len(requests)
+        else:
+            item_types = [ItemType.unknown] * len(requests)
+
+        return list(zip(item_types, weights))
+
+    def get_statistics(self):
+        with self.condition:
+            return {"batches": self.batches,
+                    "requests": self.requests}
+
+
+def load_batch_recognizer(model_path, weight_calculation_mode="internal", weight_model_path=None,
+                          inference_backend=InferenceBackend.tf_function, weight_calibration_path=None):
+    # In "multihead" mode model_path points to combined model and weight model is not used
+    # In "internal" mode fields calibration made by auxiliary_scripts/fit_weight_calibration.py is used when
+    # it exists, otherwise weight comes from the same hyperbola for every field
+    # NumPy backend loads models exported next to keras ones (.npz), so TensorFlow is never imported
+    # Quantized backend loads int8 models made by auxiliary_scripts/quantize_models.py
+    if inference_backend is InferenceBackend.numpy:
+        model_path = os.path.splitext(model_path)[0] + ".npz"
+        if weight_model_path is not None:
+            weight_model_path = os.path.splitext(weight_model_path)[0] + ".npz"
+    elif inference_backend is InferenceBackend.tflite_int8:
+        model_path = os.path.splitext(model_path)[0] + "_int8.tflite"
+        if weight_model_path is not None:
+            weight_model_path = os.path.splitext(weight_model_path)[0] + "_int8.tflite"
+
+    if not os.path.isfile(model_path):
+        message = "No classifier model in: " + model_path
+        if weight_calculation_mode == "multihead":
+            message = "No multihead model in: " + model_path + ", train it with auxiliary_scripts/train_multihead.py"
+        debug(DBGLevel.ERROR, message)
+        raise FileNotFoundError(message)
+
+    if weight_calculation_mode == "multihead":
+        item_classifier = MultiheadClassifier()
+    else:
+        item_classifier = Classifier()
+    item_classifier.import_model(model_path)
+
+    weight_model = None
+    if weight_calculation_mode == "neuron" and inference_backend is InferenceBackend.numpy:
+        weight_model = NumpyModel(weight_model_path)
+    elif weight_calculation_mode == "neuron" and inference_backend is InferenceBackend.tflite_int8:
+        weight_model = TFLiteRunner.from_file(weight_model_path)
+    elif weight_calculation_mode == "neuron":
+        from keras.models import load_model
+        weight_model = load_model(weight_model_path, custom_objects={
+            'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+    elif weight_calculation_mode != "multihead":
+        weight_calculation_mode = "internal"
+
+    weight_calibration = None
+    if weight_calculation_mode == "internal" and weight_calibration_path is not None:
+        if os.path.isfile(weight_calibration_path):
+            weight_calibration = CellWeightCalibration.from_file(weight_calibration_path)
+        else:
+            debug(DBGLevel.WARN, "No weight calibration in: " + weight_calibration_path + ", hyperbola is used")
+
+    recognizer = BatchRecognizer(item_classifier, weight_calculation_mode, weight_model, weight_calibration)
+    recognizer.set_backend(inference_backend)
+    return recognizer
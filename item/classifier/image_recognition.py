@@ -1,13 +1,11 @@
-from keras.models import Sequential, load_model
-from keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, BatchNormalization, Dropout, ReLU, DepthwiseConv2D
-from keras.optimizers import Adam
-
 import os
 import pickle
 import pandas as pd
 import numpy as np
 
 from item.item import ItemType
+from item.classifier.inference_backends import InferenceBackend, TFLiteRunner, create_inference_runner
+from item.classifier.numpy_inference import NumpyModel
 from debug.debug import *
 
 
@@ -15,6 +13,7 @@ class Classifier:
     model = None
     trained = False
     output_types = None
+    runner = None
 
     def __init__(self, num_classes=0, class_items=[]):
         if len(class_items) == num_classes and num_classes > 0:
@@ -28,10 +27,20 @@ class Classifier:
         self.model.fit(x_train, y_train, batch_size=batch_size, epochs=epochs, validation_data=(x_val, y_val))
         self.trained = True
 
+    def set_backend(self, backend=InferenceBackend.keras_predict):
+        # Backend used for predictions, model.predict has big overhead for single images
+        if self.model is not None:
+            self.runner = create_inference_runner(self.model, backend)
+
+    def run_model(self, images):
+        if self.runner is not None:
+            return self.runner.predict(images)
+        return self.model.predict(images, verbose=0)
+
     def predict(self, images):
         if self.trained:
             # For every image returns array of probabilities for that item
-            predictions = self.model.predict(images, verbose=0)
+            predictions = self.run_model(images)
             return predictions
         else:
             return []
@@ -40,7 +49,7 @@ class Classifier:
         if self.trained:
             try:
                 # For every image returns one most probable item, if probability value is greater than treshold
-                predictions = self.model.predict(images, verbose=0)
+                predictions = self.run_model(images)
                 item_predictions = []
                 for prediction in predictions:
                     max_val = np.argmax(prediction)
@@ -65,8 +74,16 @@ class Classifier:
             debug(DBGLevel.WARN, "Model successfully exported")
 
     def import_model(self, filename):
-        filename = os.path.splitext(filename)[0]
-        self.model = load_model(filename + ".keras")
+        filename, extension = os.path.splitext(filename)
+        if extension == ".npz":
+            # Model exported for NumPy engine, keras is not imported at all
+            self.model = NumpyModel(filename + ".npz")
+        elif extension == ".tflite":
+            self.model = TFLiteRunner.from_file(filename + ".tflite")
+        else:
+            from keras.models import load_model
+            self.model = load_model(filename + ".keras")
+        self.runner = None
         # self.model.summary()
         with open(str(filename + ".names"), 'rb') as pickle_file:
             self.output_types = pickle.load(pickle_file)
@@ -97,11 +114,17 @@ class Classifier:
 
     def set_model(self, model, class_items, trained=False):
         self.model = model
+        self.runner = None
         self.output_types = class_items
         self.trained = trained
 
     @staticmethod
     def get_default_model(num_classes):
+        from keras.models import Sequential
+        from keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, BatchNormalization, Dropout, ReLU, \
+            DepthwiseConv2D
+        from keras.optimizers import Adam
+
         # Define the model architecture
         model = Sequential()
 
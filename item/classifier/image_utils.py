@@ -1,8 +1,6 @@
 import numpy as np
 import pandas as pd
-import keras
 import cv2
-import matplotlib.pyplot as plt
 
 from item.item import Item, ItemType
 
@@ -70,7 +68,8 @@ class ImageParser:
 
         self.map = LabelsMap(labelList)
         labelList = self.map.mapLabelsToOrdinalNumbers(labelList)
-        labelList = np.array(keras.utils.to_categorical(labelList))
+        from keras.utils import to_categorical
+        labelList = np.array(to_categorical(labelList))
         labelList = np.hstack(labelList)
         labelList = np.array(labelList)
         return labelList
@@ -126,6 +125,8 @@ def stretch_image(image, stretch_x, stretch_y):
 
 
 def plot_learning_curve(history):
+    import matplotlib.pyplot as plt
+
     loss = history.history['loss']
     val_loss = history.history['val_loss']
     epochs = range(1, len(loss) + 1)
@@ -0,0 +1,152 @@
+from enum import Enum
+import numpy as np
+
+from item.classifier.numpy_inference import NumpyModel
+
+
+class InferenceBackend(Enum):
+    keras_predict = 0
+    keras_call = 1
+    tf_function = 2
+    tflite = 3
+    numpy = 4
+    tflite_int8 = 5
+
+
+def prepare_model_input(images, input_shape):
+    # Extracted images come as (n, 16, 16), models expect (n, 16, 16, 1) float32
+    return np.ascontiguousarray(images, dtype=np.float32).reshape((-1,) + tuple(input_shape))
+
+
+def outputs_to_numpy(outputs):
+    # Models with more heads return list of outputs, in the same order as keras model
+    if isinstance(outputs, (list, tuple)):
+        return [np.asarray(output) for output in outputs]
+    return np.asarray(outputs)
+
+
+class KerasPredictRunner:
+    # model.predict builds data pipeline on every call, it pays off only for big batches
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = model.input_shape[1:]
+
+    def predict(self, images):
+        return self.model.predict(prepare_model_input(images, self.input_shape), verbose=0)
+
+
+class KerasCallRunner:
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = model.input_shape[1:]
+
+    def predict(self, images):
+        return outputs_to_numpy(self.model(prepare_model_input(images, self.input_shape), training=False))
+
+
+class TFFunctionRunner:
+    # Graph is traced once for any batch size, next calls skip python side of keras
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        self.input_shape = model.input_shape[1:]
+        self.function = tf.function(lambda x: model(x, training=False),
+                                    input_signature=[tf.TensorSpec((None,) + tuple(self.input_shape), tf.float32)])
+
+    def predict(self, images):
+        return outputs_to_numpy(self.function(prepare_model_input(images, self.input_shape)))
+
+
+class TFLiteRunner:
+    # Model is converted to TFLite flatbuffer, or loaded from already converted one
+    # Quantized models (int8 input and output) get float images and return float results like other runners
+    # output_names: names of outputs in order of keras model, taken from converted model when it is given
+    def __init__(self, model=None, model_content=None, num_threads=1, output_names=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        if model_content is None:
+            import tensorflow as tf
+            model_content = tf.lite.TFLiteConverter.from_keras_model(model).convert()
+            if output_names is None:
+                output_names = model.output_names
+        self.model_content = model_content
+        self.interpreter = Interpreter(model_content=model_content, num_threads=num_threads)
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = get_signature_output_details(self.interpreter, output_names)
+        self.input_index = self.input_details['index']
+        self.input_shape = tuple(self.input_details['shape'][1:])
+        self.batch_size = None
+
+    @staticmethod
+    def from_file(filename, num_threads=1, output_names=None):
+        with open(filename, 'rb') as model_file:
+            return TFLiteRunner(model_content=model_file.read(), num_threads=num_threads, output_names=output_names)
+
+    def predict(self, images, verbose=0):
+        images = prepare_model_input(images, self.input_shape)
+        if images.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, images.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = images.shape[0]
+        self.interpreter.set_tensor(self.input_index, quantize_tensor(images, self.input_details))
+        self.interpreter.invoke()
+        outputs = [dequantize_tensor(self.interpreter.get_tensor(details['index']), details)
+                   for details in self.output_details]
+        if len(outputs) == 1:
+            return outputs[0]
+        return outputs
+
+
+def get_signature_output_details(interpreter, output_names=None):
+    # Tensors of outputs in order of keras model, found by names of serving signature
+    # Keras 3 names outputs of converted model output_0, output_1, ... by their position
+    if not interpreter.get_signature_list() and len(interpreter.get_output_details()) == 1:
+        return interpreter.get_output_details()
+    details = interpreter.get_signature_runner().get_output_details()
+    if len(details) == 1:
+        return list(details.values())
+    if output_names is not None and all(name in details for name in output_names):
+        return [details[name] for name in output_names]
+    positional_names = ["output_" + str(k) for k in range(len(details))]
+    if all(name in details for name in positional_names):
+        return [details[name] for name in positional_names]
+    raise ValueError("Order of model outputs " + str(list(details)) + " is unknown, output names have to be given")
+
+
+def quantize_tensor(values, details):
+    if details['dtype'] == np.float32:
+        return values
+    scale, zero_point = details['quantization']
+    info = np.iinfo(details['dtype'])
+    return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(details['dtype'])
+
+
+def dequantize_tensor(values, details):
+    if details['dtype'] == np.float32:
+        return values
+    scale, zero_point = details['quantization']
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+def create_inference_runner(model, backend=InferenceBackend.keras_predict):
+    # Model loaded from NumPy export or TFLite file can be run only by its own engine
+    if isinstance(model, (NumpyModel, TFLiteRunner)):
+        return model
+    if backend is InferenceBackend.numpy:
+        return NumpyModel.from_keras_model(model)
+    if backend is InferenceBackend.keras_call:
+        return KerasCallRunner(model)
+    if backend is InferenceBackend.tf_function:
+        return TFFunctionRunner(model)
+    if backend is InferenceBackend.tflite_int8:
+        # Quantization needs representative images, so int8 model has to be loaded from file made by quantization
+        raise ValueError("Quantized model has to be loaded from .tflite file made by "
+                         "auxiliary_scripts/quantize_models.py")
+    if backend is InferenceBackend.tflite:
+        return TFLiteRunner(model)
+    return KerasPredictRunner(model)
@@ -0,0 +1,167 @@
+import os
+import pickle
+import numpy as np
+
+from item.item import ItemType
+from item.classifier.weight_estimation import mean_absolute_percentage_square_error
+from item.classifier.inference_backends import InferenceBackend, TFLiteRunner, create_inference_runner
+from item.classifier.numpy_inference import NumpyModel
+from debug.debug import *
+
+# Weight loss is in squared percents, it would outweigh cross entropy of item type without scaling
+WEIGHT_LOSS_WEIGHT = 0.001
+# Names of output layers in order of outputs, converted models are read by them
+MULTIHEAD_OUTPUT_NAMES = ["item_type", "weight"]
+
+
+class MultiheadClassifier:
+    # One network recognizing item type and its weight, both heads share convolutional trunk
+    model = None
+    trained = False
+    output_types = None
+    runner = None
+
+    def __init__(self, num_classes=0, class_items=[]):
+        if len(class_items) == num_classes and num_classes > 0:
+            self.model = self.get_default_model(num_classes)
+            self.output_types = class_items
+            self.trained = False
+
+    def trainModel(self, x_train, y_train, w_train, x_val, y_val, w_val, batch_size=16, epochs=100):
+        if self.model is None:
+            return -1
+        history = self.model.fit(x_train, [y_train, w_train], batch_size=batch_size, epochs=epochs,
+                                 validation_data=(x_val, [y_val, w_val]))
+        self.trained = True
+        return history
+
+    def set_backend(self, backend=InferenceBackend.keras_predict):
+        if self.model is not None:
+            self.runner = create_inference_runner(self.model, backend)
+
+    def run_model(self, images):
+        if self.runner is not None:
+            return self.runner.predict(images)
+        return self.model.predict(images, verbose=0)
+
+    def predict(self, images):
+        # For every image returns array of probabilities for that item and its weight
+        if self.trained:
+            probabilities, weights = self.run_model(images)
+            return probabilities, weights
+        else:
+            return [], []
+
+    def predict_items_with_confidence(self, images, confidence_treshold, map_of_types):
+        return self.predict_items_and_weights(images, confidence_treshold, map_of_types)[0]
+
+    def predict_items_and_weights(self, images, confidence_treshold, map_of_types):
+        if self.trained:
+            try:
+                probabilities, weights = self.run_model(images)
+                item_predictions = []
+                for prediction in probabilities:
+                    max_val = np.argmax(prediction)
+                    if prediction[max_val] > confidence_treshold:
+                        item_predictions.append(ItemType(map_of_types[max_val]))
+                    else:
+                        item_predictions.append(ItemType.unknown)
+                return item_predictions, [int(weight[0]) for weight in weights]
+            except:
+                debug(DBGLevel.ERROR, "Item prediction failed")
+        return [ItemType.unknown] * len(images), [0] * len(images)
+
+    def export_model(self, filename):
+        if self.trained:
+            filename = os.path.splitext(filename)[0]
+            self.model.save(filename + ".keras")
+            with open(str(filename + ".names"), 'wb') as pickle_file:
+                pickle.dump(self.output_types, pickle_file)
+            debug(DBGLevel.WARN, "Model successfully exported")
+
+    def import_model(self, filename):
+        filename, extension = os.path.splitext(filename)
+        if extension == ".npz":
+            self.model = NumpyModel(filename + ".npz")
+        elif extension == ".tflite":
+            self.model = TFLiteRunner.from_file(filename + ".tflite", output_names=MULTIHEAD_OUTPUT_NAMES)
+        else:
+            from keras.models import load_model
+            self.model = load_model(filename + ".keras", custom_objects={
+                'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
+        self.runner = None
+        with open(str(filename + ".names"), 'rb') as pickle_file:
+            self.output_types = pickle.load(pickle_file)
+        self.trained = True
+        debug(DBGLevel.WARN, "Model successfully imported")
+
+    def evaluate(self, images, labels, weights):
+        # Returns accuracy of item type and mean absolute percentage error of weight
+        # Hands and empty table have no weight, they are left out of weight error
+        if self.trained:
+            probabilities, predicted_weights = self.predict(images)
+            accuracy = np.mean(np.argmax(probabilities, axis=1) == np.argmax(labels, axis=1))
+            weights = np.asarray(weights, dtype=float)
+            weighted = weights > 0
+            weight_error = np.mean(np.abs(np.asarray(predicted_weights, dtype=float).ravel()[weighted] -
+                                          weights[weighted]) / weights[weighted]) * 100
+            return accuracy, weight_error
+
+    def set_model(self, model, class_items, trained=False):
+        self.model = model
+        self.runner = None
+        self.output_types = class_items
+        self.trained = trained
+
+    @staticmethod
+    def get_default_model(num_classes):
+        from keras.models import Model
+        from keras.layers import Input, Conv2D, MaxPooling2D, Flatten, Dense, BatchNormalization, Dropout, ReLU, \
+            DepthwiseConv2D, AveragePooling2D
+        from keras.optimizers import Adam
+
+        images = Input(shape=(16, 16, 1))
+
+        # Shared trunk, same as first layers of both separate models
+        trunk = Conv2D(16, (3, 3), padding="same", strides=1)(images)
+        trunk = BatchNormalization()(trunk)
+        trunk = ReLU()(trunk)
+
+        # Item type head, rest of classifier model
+        item_type = MaxPooling2D((2, 2), padding="same", strides=1)(trunk)
+        item_type = DepthwiseConv2D((3, 3), padding="same", strides=1)(item_type)
+        item_type = BatchNormalization()(item_type)
+        item_type = ReLU()(item_type)
+        item_type = Conv2D(32, (3, 3), padding="same", strides=1)(item_type)
+        item_type = BatchNormalization()(item_type)
+        item_type = ReLU()(item_type)
+        item_type = MaxPooling2D((2, 2))(item_type)
+        item_type = Conv2D(64, (3, 3))(item_type)
+        item_type = BatchNormalization()(item_type)
+        item_type = ReLU()(item_type)
+        item_type = Conv2D(128, (3, 3))(item_type)
+        item_type = BatchNormalization()(item_type)
+        item_type = ReLU()(item_type)
+        item_type = Flatten()(item_type)
+        item_type = Dense(100, activation='relu')(item_type)
+        item_type = Dropout(0.1)(item_type)
+        item_type = Dense(num_classes, activation='softmax', name=MULTIHEAD_OUTPUT_NAMES[0])(item_type)
+
+        # Weight head, rest of weight estimation model
+        weight = AveragePooling2D((2, 2))(trunk)
+        weight = Conv2D(32, (3, 3))(weight)
+        weight = BatchNormalization()(weight)
+        weight = ReLU()(weight)
+        weight = Conv2D(64, (3, 3))(weight)
+        weight = BatchNormalization()(weight)
+        weight = ReLU()(weight)
+        weight = Flatten()(weight)
+        weight = Dense(100, activation='relu')(weight)
+        weight = Dense(1, activation='linear', name=MULTIHEAD_OUTPUT_NAMES[1])(weight)
+
+        model = Model(inputs=images, outputs=[item_type, weight])
+        model.compile(optimizer=Adam(learning_rate=0.001),
+                      loss=['categorical_crossentropy', mean_absolute_percentage_square_error],
+                      loss_weights=[1.0, WEIGHT_LOSS_WEIGHT])
+        # model.summary()
+        return model
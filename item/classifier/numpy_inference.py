@@ -0,0 +1,280 @@
+import io
+import json
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Engine running exported keras models with NumPy only, so TensorFlow does not have to be imported on the robot
+# Export file (.npz) holds architecture as json and weights of every layer under "<layer name>/<weight index>"
+# Supported layers are the ones used by our models, everything else is rejected while loading
+
+SUPPORTED_LAYERS = ["InputLayer", "Conv2D", "DepthwiseConv2D", "BatchNormalization", "ReLU", "MaxPooling2D",
+                    "AveragePooling2D", "Flatten", "Dense", "Dropout", "Activation"]
+
+
+def get_inbound_layer_names(layer_config):
+    # Keras 2 keeps inbound nodes as [[name, node, tensor, kwargs], ...], keras 3 as keras_history of arguments
+    names = []
+    for node in layer_config.get("inbound_nodes", []):
+        if isinstance(node, dict):
+            for argument in node.get("args", []):
+                if isinstance(argument, dict) and "keras_history" in argument.get("config", {}):
+                    names.append(argument["config"]["keras_history"][0])
+        else:
+            for inbound in node:
+                names.append(inbound[0])
+    return names
+
+
+def export_model_to_npz(model, filename):
+    model_config = model.get_config()
+    layer_configs = {layer_config["config"]["name"]: layer_config for layer_config in model_config["layers"]}
+
+    layers = []
+    weights = {}
+    previous_name = None
+    for layer in model.layers:
+        class_name = layer.__class__.__name__
+        if class_name not in SUPPORTED_LAYERS:
+            raise ValueError("Layer " + class_name + " is not supported by NumPy engine")
+
+        # Sequential model has no inbound nodes in config, every layer takes output of previous one
+        inbound = get_inbound_layer_names(layer_configs.get(layer.name, {}))
+        if len(inbound) == 0 and previous_name is not None:
+            inbound = [previous_name]
+        layers.append({"name": layer.name, "class_name": class_name, "config": layer.get_config(),
+                       "inbound": inbound})
+        for k, weight in enumerate(layer.get_weights()):
+            weights[layer.name + "/" + str(k)] = weight
+        previous_name = layer.name
+
+    architecture = {"layers": layers,
+                    "input_shape": list(model.input_shape[1:]),
+                    "outputs": [tensor_name(output) for output in model.outputs]}
+    np.savez(filename, architecture=np.array(json.dumps(architecture, default=str)), **weights)
+
+
+def tensor_name(tensor):
+    # Name of layer which produced given output tensor
+    history = getattr(tensor, "_keras_history", None)
+    if history is not None:
+        return history[0].name
+    return tensor.node.layer.name
+
+
+def get_same_padding(size, kernel, stride):
+    if size % stride == 0:
+        total = max(kernel - stride, 0)
+    else:
+        total = max(kernel - size % stride, 0)
+    return total // 2, total - total // 2
+
+
+def pad_input(x, kernel_size, strides, padding, value=0.0):
+    if padding != "same":
+        return x
+    pad_h = get_same_padding(x.shape[1], kernel_size[0], strides[0])
+    pad_w = get_same_padding(x.shape[2], kernel_size[1], strides[1])
+    if pad_h == (0, 0) and pad_w == (0, 0):
+        return x
+    return np.pad(x, ((0, 0), pad_h, pad_w, (0, 0)), mode='constant', constant_values=value)
+
+
+def get_windows(x, kernel_size, strides):
+    # (n, h, w, c) -> (n, out h, out w, c, kernel h, kernel w), no data is copied
+    windows = sliding_window_view(x, tuple(kernel_size), axis=(1, 2))
+    return windows[:, ::strides[0], ::strides[1]]
+
+
+def apply_activation(x, activation):
+    if activation == "relu":
+        return np.maximum(x, 0.0, out=x)
+    if activation == "softmax":
+        x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        return x / np.sum(x, axis=-1, keepdims=True)
+    if activation == "sigmoid":
+        return 1.0 / (1.0 + np.exp(-x))
+    if activation == "linear" or activation is None:
+        return x
+    raise ValueError("Activation " + str(activation) + " is not supported by NumPy engine")
+
+
+class NumpyLayer:
+    def __init__(self, name, config, weights):
+        self.name = name
+        self.config = config
+
+    def __call__(self, x):
+        return x
+
+
+class Conv2DLayer(NumpyLayer):
+    def __init__(self, name, config, weights):
+        super(Conv2DLayer, self).__init__(name, config, weights)
+        self.kernel_size = config["kernel_size"]
+        self.strides = config["strides"]
+        self.padding = config["padding"]
+        self.activation = config["activation"]
+        # Kernel (kh, kw, c in, c out) reordered to order of window axes (c in, kh, kw, c out)
+        self.kernel = np.ascontiguousarray(np.transpose(weights[0], (2, 0, 1, 3)), dtype=np.float32)
+        self.bias = weights[1].astype(np.float32) if config["use_bias"] else None
+
+    def __call__(self, x):
+        windows = get_windows(pad_input(x, self.kernel_size, self.strides, self.padding), self.kernel_size,
+                              self.strides)
+        y = np.tensordot(windows, self.kernel, axes=([3, 4, 5], [0, 1, 2]))
+        if self.bias is not None:
+            y += self.bias
+        return apply_activation(y, self.activation)
+
+
+class DepthwiseConv2DLayer(NumpyLayer):
+    def __init__(self, name, config, weights):
+        super(DepthwiseConv2DLayer, self).__init__(name, config, weights)
+        self.kernel_size = config["kernel_size"]
+        self.strides = config["strides"]
+        self.padding = config["padding"]
+        self.activation = config["activation"]
+        self.kernel = weights[0].astype(np.float32)  # (kh, kw, c, depth multiplier)
+        self.bias = weights[1].astype(np.float32) if config["use_bias"] else None
+
+    def __call__(self, x):
+        windows = get_windows(pad_input(x, self.kernel_size, self.strides, self.padding), self.kernel_size,
+                              self.strides)
+        y = np.einsum('nhwcij,ijcm->nhwcm', windows, self.kernel, optimize=True)
+        # Output channels are ordered as channel * depth multiplier + multiplier index, same as keras
+        y = y.reshape(y.shape[:3] + (-1,))
+        if self.bias is not None:
+            y += self.bias
+        return apply_activation(y, self.activation)
+
+
+class BatchNormalizationLayer(NumpyLayer):
+    def __init__(self, name, config, weights):
+        super(BatchNormalizationLayer, self).__init__(name, config, weights)
+        weights = list(weights)
+        gamma = weights.pop(0) if config["scale"] else 1.0
+        beta = weights.pop(0) if config["center"] else 0.0
+        moving_mean, moving_variance = weights
+        # Inference only, so whole layer folds to single multiply and add
+        self.multiplier = (gamma / np.sqrt(moving_variance + config["epsilon"])).astype(np.float32)
+        self.offset = (beta - moving_mean * self.multiplier).astype(np.float32)
+
+    def __call__(self, x):
+        y = x * self.multiplier
+        y += self.offset
+        return y
+
+
+class ReLULayer(NumpyLayer):
+    def __init__(self, name, config, weights):
+        super(ReLULayer, self).__init__(name, config, weights)
+        self.max_value = config.get("max_value")
+        if config.get("negative_slope", 0.0) or config.get("threshold", 0.0):
+            raise ValueError("Leaky or thresholded ReLU is not supported by NumPy engine")
+
+    def __call__(self, x):
+        y = np.maximum(x, 0.0)
+        if self.max_value is not None:
+            np.minimum(y, self.max_value, out=y)
+        return y
+
+
+class PoolingLayer(NumpyLayer):
+    def __init__(self, name, config, weights):
+        super(PoolingLayer, self).__init__(name, config, weights)
+        self.pool_size = config["pool_size"]
+        self.strides = config["strides"] if config["strides"] is not None else self.pool_size
+        self.padding = config["padding"]
+
+
+class MaxPooling2DLayer(PoolingLayer):
+    def __call__(self, x):
+        x = pad_input(x, self.pool_size, self.strides, self.padding, value=-np.inf)
+        return get_windows(x, self.pool_size, self.strides).max(axis=(4, 5))
+
+
+class AveragePooling2DLayer(PoolingLayer):
+    def __call__(self, x):
+        # Padded fields are not counted in average, same as in keras
+        counts = np.ones((1,) + x.shape[1:3] + (1,), dtype=np.float32)
+        counts = get_windows(pad_input(counts, self.pool_size, self.strides, self.padding), self.pool_size,
+                             self.strides).sum(axis=(4, 5))
+        sums = get_windows(pad_input(x, self.pool_size, self.strides, self.padding), self.pool_size,
+                           self.strides).sum(axis=(4, 5))
+        return sums / counts
+
+
+class FlattenLayer(NumpyLayer):
+    def __call__(self, x):
+        return x.reshape(x.shape[0], -1)
+
+
+class DenseLayer(NumpyLayer):
+    def __init__(self, name, config, weights):
+        super(DenseLayer, self).__init__(name, config, weights)
+        self.activation = config["activation"]
+        self.kernel = weights[0].astype(np.float32)
+        self.bias = weights[1].astype(np.float32) if config["use_bias"] else None
+
+    def __call__(self, x):
+        y = x @ self.kernel
+        if self.bias is not None:
+            y += self.bias
+        return apply_activation(y, self.activation)
+
+
+class ActivationLayer(NumpyLayer):
+    def __call__(self, x):
+        return apply_activation(np.array(x), self.config["activation"])
+
+
+LAYER_CLASSES = {"InputLayer": NumpyLayer,
+                 "Conv2D": Conv2DLayer,
+                 "DepthwiseConv2D": DepthwiseConv2DLayer,
+                 "BatchNormalization": BatchNormalizationLayer,
+                 "ReLU": ReLULayer,
+                 "MaxPooling2D": MaxPooling2DLayer,
+                 "AveragePooling2D": AveragePooling2DLayer,
+                 "Flatten": FlattenLayer,
+                 "Dense": DenseLayer,
+                 "Dropout": NumpyLayer,
+                 "Activation": ActivationLayer}
+
+
+class NumpyModel:
+    # Has predict() and input_shape like keras model, so it can be used in place of it for inference
+    def __init__(self, filename):
+        with np.load(filename) as export:
+            architecture = json.loads(str(export["architecture"]))
+            weights = {key: export[key] for key in export.files if key != "architecture"}
+
+        self.input_shape = (None,) + tuple(architecture["input_shape"])
+        self.output_names = architecture["outputs"]
+        self.layers = []
+        for layer in architecture["layers"]:
+            layer_weights = []
+            while layer["name"] + "/" + str(len(layer_weights)) in weights:
+                layer_weights.append(weights[layer["name"] + "/" + str(len(layer_weights))])
+            self.layers.append((LAYER_CLASSES[layer["class_name"]](layer["name"], layer["config"], layer_weights),
+                                layer["inbound"]))
+
+    @staticmethod
+    def from_keras_model(model):
+        export = io.BytesIO()
+        export_model_to_npz(model, export)
+        export.seek(0)
+        return NumpyModel(export)
+
+    def __call__(self, images, training=False):
+        x = np.ascontiguousarray(images, dtype=np.float32).reshape((-1,) + self.input_shape[1:])
+        # Layers are stored in topological order, every output is kept until the end because graph is tiny
+        outputs = {}
+        for layer, inbound in self.layers:
+            outputs[layer.name] = layer(outputs[inbound[0]] if len(inbound) > 0 else x)
+
+        if len(self.output_names) == 1:
+            return outputs[self.output_names[0]]
+        return [outputs[name] for name in self.output_names]
+
+    def predict(self, images, verbose=0):
+        return self(images)
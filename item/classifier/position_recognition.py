@@ -7,6 +7,10 @@ from debug.debug import debug, DBGLevel
 from item.classifier.image_utils import stretch_image
 
 
+# Mask of the default table, used when mask of table is not given
+default_mask = ImageMask()
+
+
 def get_image_centroid(image, output_type):
     moments = cv2.moments(image)
     centroid_x = (moments["m10"] / moments["m00"])
@@ -103,10 +107,11 @@ def sum_image_values_on_mask(image, mask_image):
     mask_shape = list(mask_image.shape)
     for i in range(0, mask_shape[0]):
         for j in range(0, mask_shape[1]):
+            # Python ints, with numpy 2 uint8 field would keep sum in uint8 and overflow it
             if mask_image[i, j] == 0:
-                sum_zeros += image[i, j]
+                sum_zeros += int(image[i, j])
             else:
-                sum_ones += image[i, j]
+                sum_ones += int(image[i, j])
     return [sum_zeros, sum_ones]
 
 
@@ -119,7 +124,7 @@ def check_item_on_edge(image, mask):
 
     # Max val is on border or next to border
     idx_max_val = np.unravel_index(np.argmax(e_image), e_image.shape)
-    if mask.e_bordered_mask[idx_max_val] == 0:
+    if mask.getEMaskWithBorder()[idx_max_val] == 0:
         # Using only the closest tactile, when using 2 detection can be as far as 5cm from edge
         return True
 
@@ -139,7 +144,7 @@ def check_item_on_edge(image, mask):
     s_centroid_point = get_image_centroid(s_image, float)
     hist = get_histogram_of_weight_from_point(s_image, s_centroid_point)
     peak = find_histogram_peak(hist, False)
-    dist_to_border = get_distance_to_mask(mask.getStretchedMask(), s_centroid_point)
+    dist_to_border = mask.getDistanceToEdge(s_centroid_point)
 
     # TODO whin histogram is wide it might mean that item is big and anyway will be close to the edge
     # filter out such items as in the center
@@ -154,7 +159,7 @@ def check_item_on_edge(image, mask):
         return True
 
     # Check weight on close to border fields and compare to all weight
-    [border_weight, center_weight] = sum_image_values_on_mask(e_image, mask.e_2bordered_mask)
+    [border_weight, center_weight] = sum_image_values_on_mask(e_image, mask.getEMaskWithDoubleBorder())
     if border_weight >= center_weight:
         return True
     return False
@@ -175,9 +180,116 @@ def find_sides_of_table(mask_image):
     return edge
 
 
-def recognise_position(image, image_mask, field_size):
+def get_linear_resize_weights(source_size, scale):
+    # Matrix of bilinear interpolation used by cv2.resize (INTER_LINEAR) along one axis, [destination, source]
+    destination_size = int(round(source_size * scale))
+    weights = np.zeros((destination_size, source_size))
+    for destination in range(destination_size):
+        source = (destination + 0.5) / scale - 0.5
+        first = int(np.floor(source))
+        fraction = source - first
+        if first < 0:
+            first, fraction = 0, 0.0
+        if first >= source_size - 1:
+            first, fraction = source_size - 1, 0.0
+        weights[destination, first] += 1.0 - fraction
+        if fraction > 0.0:
+            weights[destination, first + 1] += fraction
+    return weights
+
+
+class PositionRecognizer:
+    # Placement of item computed once per frame in real dimensions of table (cm), without stretching the image
+    # Coordinates are the same as pixels of image stretched by field size, so thresholds stay the same
+    def __init__(self, field_size=(1.5, 2.5), mask=None):
+        if mask is None:
+            mask = default_mask
+        self.field_size = field_size
+        rows, columns = mask.getMask().shape
+
+        # Moments of stretched image are linear in fields, so they are sums of fields with precomputed weights
+        self.resize_x = get_linear_resize_weights(columns, field_size[0])
+        self.resize_y = get_linear_resize_weights(rows, field_size[1])
+        self.area_x = self.resize_x.sum(axis=0)
+        self.area_y = self.resize_y.sum(axis=0)
+        self.moment_x = self.resize_x.T @ np.arange(self.resize_x.shape[0])
+        self.moment_y = self.resize_y.T @ np.arange(self.resize_y.shape[0])
+        self.point_y, self.point_x = np.indices((self.resize_y.shape[0], self.resize_x.shape[0]))
+
+        self.mask = mask
+        self.side_edges = find_sides_of_table(mask.getStretchedMask())
+
+        self.bordered_mask = mask.getEMaskWithBorder()[1:-1, 1:-1]
+        self.double_bordered_mask = mask.getEMaskWithDoubleBorder()[1:-1, 1:-1] > 0
+
+    def get_centroid(self, image):
+        total = self.area_y @ image @ self.area_x
+        if total <= 0:
+            return None
+        return [float(self.area_y @ image @ self.moment_x / total), float(self.moment_y @ image @ self.area_x / total)]
+
+    def get_radial_profile(self, image, centroid):
+        # Mean value of pressed points in every full cm of distance from centroid, empty distances are 0
+        # Values between fields are needed here, they are interpolated only in this rare case
+        values = np.rint(self.resize_y @ image @ self.resize_x.T)
+        pressed = values > 0
+        distances = np.round(np.hypot(self.point_x[pressed] - centroid[0], self.point_y[pressed] - centroid[1]))
+        distances = distances.astype(np.intp)
+        counts = np.bincount(distances)
+        sums = np.bincount(distances, weights=values[pressed])
+        return np.round(sums / np.maximum(counts, 1))
+
+    def is_on_edge(self, image, centroid):
+        # Any of conditions means edge, the cheapest ones are checked first
+        # Max value is on border or next to border
+        if self.bordered_mask[np.unravel_index(np.argmax(image), image.shape)] == 0:
+            return True
+
+        # Weight on close to border fields compared to all weight
+        if np.sum(image[~self.double_bordered_mask]) >= np.sum(image[self.double_bordered_mask]):
+            return True
+
+        # Object close to border
+        distance = self.mask.getDistanceToEdge(centroid)
+        if distance < 5.0:
+            return True
+
+        # Edge of item is close to border, peak is roughly diameter of object
+        return distance <= find_histogram_peak(self.get_radial_profile(image, centroid), False) + 2.0
+
+    def recognise(self, image):
+        image = np.asarray(image, dtype=np.float64)
+        centroid = self.get_centroid(image)
+        if centroid is None:
+            return ItemPlacement.unknown
+
+        if self.is_on_edge(image, centroid):
+            return ItemPlacement.edge
+        row = int(round(centroid[1]))
+        if row < self.side_edges[0] or row > self.side_edges[1]:
+            return ItemPlacement.side
+        return ItemPlacement.center
+
+
+position_recognizers = {}
+
+
+def recognise_position(image, image_mask, field_size, mask=None):
+    # field size = [1.5, 2.5], image_mask is kept for compatibility, mask of table (ImageMask) is used,
+    # the default table when it is not given
+    if mask is None:
+        mask = default_mask
+    key = (tuple(field_size), mask.geometry)
+    if key not in position_recognizers:
+        position_recognizers[key] = PositionRecognizer(tuple(field_size), mask)
+    return position_recognizers[key].recognise(image)
+
+
+def recognise_position_by_stretching(image, image_mask, field_size, mask=None):
+    # Previous version working on image stretched to real dimensions, kept for comparison
     # field size = [1.5, 2.5]
-    mask = ImageMask()
+    if mask is None:
+        mask = default_mask
 
     # Prepare useful data and prepare images
     s_image = stretch_image(image, field_size[0], field_size[1])  # Image stretched to real dimentions in cm
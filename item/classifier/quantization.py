@@ -0,0 +1,31 @@
+import numpy as np
+
+from item.classifier.inference_backends import prepare_model_input
+
+
+def quantize_model_to_int8(model, representative_images, max_calibration_images=500):
+    # Post-training full integer quantization, activation ranges are calibrated on given images
+    # Input and output are int8 as well, TFLiteRunner converts them from and to float
+    import tensorflow as tf
+
+    input_shape = model.input_shape[1:]
+    calibration_images = prepare_model_input(representative_images[:max_calibration_images], input_shape)
+
+    def representative_dataset():
+        for image in calibration_images:
+            yield [image[np.newaxis]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def export_int8_model(model, representative_images, filename):
+    model_content = quantize_model_to_int8(model, representative_images)
+    with open(filename, 'wb') as model_file:
+        model_file.write(model_content)
+    return model_content
@@ -0,0 +1,94 @@
+import sys
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# Dictionary node, hash entry and tuple of key and time are not counted by getsizeof of key and value
+ENTRY_OVERHEAD = 200
+
+
+class RecognitionCache:
+    # Bounded LRU cache of recognition results, keyed by extracted image coarsened to few bits per field
+    # Less bits give more hits, but different images start to share results, tune it with hit rate and accuracy
+    def __init__(self, quantization_bits=5, max_entries=1024, ttl=60.0, max_memory=1024 * 1024):
+        self.quantization_bits = quantization_bits
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_memory = max_memory
+
+        self.entries = OrderedDict()
+        self.memory = 0
+        self.lock = threading.Lock()
+        self.quantized = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get_key(self, image):
+        # Cache can be shared by tables, so buffer of quantized image is guarded as well
+        with self.lock:
+            if self.quantized is None or self.quantized.shape != np.shape(image):
+                self.quantized = np.zeros(np.shape(image), dtype=np.uint8)
+            np.clip(image, 0, 255, out=self.quantized, casting='unsafe')
+            np.right_shift(self.quantized, 8 - self.quantization_bits, out=self.quantized)
+            return hashlib.blake2b(self.quantized.tobytes(), digest_size=16).digest()
+
+    def get(self, key, now=None):
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, insert_time, size = entry
+            if now - insert_time > self.ttl:
+                self.remove(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, now=None):
+        if now is None:
+            now = time.monotonic()
+        size = sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (value, now, size)
+            self.memory += size
+            while len(self.entries) > self.max_entries or self.memory > self.max_memory:
+                self.remove(next(iter(self.entries)))
+                self.evicted += 1
+
+    def remove(self, key):
+        value, insert_time, size = self.entries.pop(key)
+        self.memory -= size
+
+    def clear(self):
+        # Has to be called when recognition would give other results, e.g. after models are changed
+        with self.lock:
+            self.entries.clear()
+            self.memory = 0
+
+    def get_hit_rate(self):
+        with self.lock:
+            if self.hits + self.misses == 0:
+                return 0.0
+            return self.hits / (self.hits + self.misses)
+
+    def get_statistics(self):
+        with self.lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "expired": self.expired,
+                    "evicted": self.evicted,
+                    "entries": len(self.entries),
+                    "memory": self.memory}
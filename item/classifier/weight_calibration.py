@@ -0,0 +1,73 @@
+import numpy as np
+
+# Every field has its own polynomial of extracted value (0-255 scaled to 0-1) without constant term,
+# so field without pressure gives no weight
+WEIGHT_CALIBRATION_DEGREE = 3
+
+
+def get_value_features(values, degree=WEIGHT_CALIBRATION_DEGREE):
+    # Powers 1..degree of every value, new last axis
+    scaled = np.asarray(values, dtype=np.float64) / 255.0
+    return np.stack([scaled ** (k + 1) for k in range(degree)], axis=-1)
+
+
+def fit_weight_calibration(images, weights, ridge=0.1, relative=True, degree=WEIGHT_CALIBRATION_DEGREE):
+    # Ridge least squares of weight = sum over fields of polynomial of the field
+    # Polynomial is split into part shared by all fields and part of every field, only the latter is penalized,
+    # so fields rarely pressed in recordings stay close to the shared curve
+    # relative: rows are scaled by 1/weight, so light and heavy items count the same (as percentage error)
+    images = np.asarray(images, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    n_images = images.shape[0]
+    field_shape = images.shape[1:]
+
+    field_features = get_value_features(images, degree)
+    shared_features = field_features.reshape(n_images, -1, degree).sum(axis=1)
+    field_features = field_features.reshape(n_images, -1)
+    features = np.concatenate([shared_features, field_features], axis=1)
+    targets = weights
+    if relative:
+        scale = 1.0 / np.maximum(weights, 1.0)
+        features = features * scale[:, np.newaxis]
+        targets = weights * scale
+
+    # ridge is relative to mean energy of field features, so it doesn't depend on units and number of images
+    gram = features.T @ features
+    field_diagonal = np.diag(gram)[degree:]
+    penalty = np.zeros(features.shape[1])
+    penalty[degree:] = ridge * np.mean(field_diagonal[field_diagonal > 0])
+    solution = np.linalg.lstsq(gram + np.diag(penalty), features.T @ targets, rcond=None)[0]
+
+    coefficients = solution[degree:].reshape(field_shape + (degree,)) + solution[:degree]
+    return coefficients
+
+
+class CellWeightCalibration:
+    # Weight of extracted image from calibration of every field
+    # Polynomials are evaluated once for all 256 possible values, so estimation is one gather and sum
+    def __init__(self, coefficients):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        field_shape = self.coefficients.shape[:-1]
+        self.n_fields = int(np.prod(field_shape))
+
+        # lut[field, value] is weight added by field with this value
+        values = get_value_features(np.arange(256), self.coefficients.shape[-1])
+        self.lut = (self.coefficients.reshape(self.n_fields, -1) @ values.T).ravel()
+        self.lut_offsets = (np.arange(self.n_fields) * 256).reshape(field_shape)
+
+    @classmethod
+    def from_file(cls, filename):
+        with np.load(filename) as data:
+            return cls(data["coefficients"])
+
+    def save(self, filename):
+        np.savez(filename, coefficients=self.coefficients)
+
+    def estimate_many(self, images):
+        # Images of extracted values, negative weights are returned as 0
+        indexes = np.clip(np.asarray(images), 0, 255).astype(np.intp) + self.lut_offsets
+        weights = self.lut[indexes].reshape(len(indexes), -1).sum(axis=1)
+        return np.maximum(weights, 0.0)
+
+    def estimate(self, image):
+        return float(self.estimate_many(np.expand_dims(image, axis=0))[0])
@@ -1,8 +1,4 @@
-import tensorflow as tf
-
-from keras.models import Sequential
-from keras.layers import Conv2D, Flatten, Dense, BatchNormalization, ReLU, AveragePooling2D
-from keras.optimizers import Adam
+import numpy as np
 
 HYPERBOLE_A = 35108.0
 HYPERBOLE_X0 = 0.0
@@ -10,22 +6,44 @@ HYPERBOLE_Y = 0.42
 DIVIDER_RESISTANCE = 470
 WEIGHT_MULTIPLIER = 2.5740
 
+# Normalized pressure is rounded to 0.1, so lookup table has entry for every tenth of ADC value
+# Last entry stands for fields without pressure (4095 and above), they don't add any weight
+WEIGHT_LUT_RESOLUTION = 10
+WEIGHT_LUT_SIZE = 4095 * WEIGHT_LUT_RESOLUTION + 1
+weight_lut = None
+
+
+def get_field_weight(normalized_pressure):
+    resistance = (DIVIDER_RESISTANCE * normalized_pressure) / (4095.0 - normalized_pressure)
+    return HYPERBOLE_X0 + (HYPERBOLE_A / (resistance - HYPERBOLE_Y))
+
+
+def get_weight_lut():
+    global weight_lut
+    if weight_lut is None:
+        lut = np.zeros(WEIGHT_LUT_SIZE, dtype=np.float64)
+        lut[:-1] = get_field_weight(np.arange(WEIGHT_LUT_SIZE - 1) / WEIGHT_LUT_RESOLUTION)
+        weight_lut = lut
+    return weight_lut
+
+
+def sum_weight_of_fields(image, max_value=4095):
+    # Sum of hyperbola of every field, shared by weight estimation and test GUI
+    normalized_pressure = np.multiply(image, 4095 / max_value, dtype=np.float64)
+    indexes = np.rint(normalized_pressure * WEIGHT_LUT_RESOLUTION)
+    # Negative values are out of table, they are rare so they are calculated directly
+    # Not finite values (NaN of field with zero calibration value) are fields without pressure
+    finite = np.isfinite(indexes)
+    negative = (indexes < 0) & finite
+    lut_indexes = np.where(negative | ~finite, WEIGHT_LUT_SIZE - 1, np.minimum(indexes, WEIGHT_LUT_SIZE - 1))
+    weight = float(np.sum(get_weight_lut()[lut_indexes.astype(np.intp)]))
+    if np.any(negative):
+        weight += float(np.sum(get_field_weight(indexes[negative] / WEIGHT_LUT_RESOLUTION)))
+    return weight
 
-def estimate_weight(raw_calibrated_image, max_value=4095):
-    weight = 0
-
-    for row in raw_calibrated_image:
-        for tile in row:
-            # Have to be rounded because otherwise have calculation errors with small weight
-            normalized_pressure = round(tile * (4095 / max_value), 1)
-            try:
-                if normalized_pressure >= 4095.0:
-                    continue
-                resistance = (DIVIDER_RESISTANCE * normalized_pressure) / (4095.0 - normalized_pressure)
-                weight += (HYPERBOLE_X0 + (HYPERBOLE_A / (resistance - HYPERBOLE_Y)))
-            except ZeroDivisionError:
-                continue
 
+def estimate_weight(raw_calibrated_image, max_value=4095):
+    weight = sum_weight_of_fields(raw_calibrated_image, max_value)
     if weight <= 0.0:
         return 0.0
 
@@ -39,12 +57,18 @@ def estimate_weight_with_model(model, images):
 
 
 def mean_absolute_percentage_square_error(y_true, y_pred):
+    import tensorflow as tf
+
     y_true = tf.cast(y_true, tf.float32)
     loss = tf.reduce_mean(tf.square(100 * (y_true - y_pred) / y_true))
     return loss
 
 
 def get_default_weight_estimation_model():
+    from keras.models import Sequential
+    from keras.layers import Conv2D, Flatten, Dense, BatchNormalization, ReLU, AveragePooling2D
+    from keras.optimizers import Adam
+
     model = Sequential()
 
     model.add(Conv2D(16, (3, 3), input_shape=(16, 16, 1), padding="same", strides=1))
@@ -130,6 +130,10 @@ class Item:
         self.image_extracted = None
         self.image_extracted_raw = None
         self.potentially_corrupted = False
+        # Filled by segmentation, objects found on the image and mask and centroid of single object
+        self.objects = []
+        self.object_mask = None
+        self.centroid = None
 
     def getLabelsFromFilename(self, path: str, filename: str, image_id: int):
         if "v2" in path:
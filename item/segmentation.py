@@ -0,0 +1,44 @@
+import numpy as np
+import cv2
+
+from sensor.params import Params
+from item.item import Item
+from item.classifier.position_recognition import get_image_centroid
+
+
+def segment_items(item, threshold=5, min_load=20, no_pressure=Params.max_value):
+    # Splits extracted image of whole table into separate objects lying on it
+    # Fields above threshold touching each other (also by corner) make one object, its weaker fields
+    # next to it are added afterwards, objects lighter than min_load are treated as noise
+    # Every object is an item with the same size of image as table, with fields of other objects zeroed,
+    # in raw image they are set to no_pressure (raw value of field without any pressure), as 0 is full pressure
+    image = item.getExtractedImage()
+    occupied = np.uint8(image > threshold)
+    count, labels, stats, centroids = cv2.connectedComponentsWithStats(occupied, connectivity=8)
+
+    # Weak fields belong to neighbouring object, when there are more of them the first one takes it
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    free = (labels == 0) & (image > 0)
+    objects = []
+    for label in range(1, count):
+        object_mask = labels == label
+        object_mask |= (cv2.dilate(np.uint8(object_mask), kernel) > 0) & free
+        free &= ~object_mask
+
+        object_image = np.where(object_mask, image, 0)
+        if np.sum(object_image) < min_load:
+            continue
+
+        object_item = Item(item.image_mask)
+        object_item.id = item.id
+        object_item.image = object_image
+        if item.image_extracted_raw is not None:
+            object_item.image_extracted_raw = np.where(object_mask, item.image_extracted_raw, no_pressure)
+        object_item.image_extracted = object_image
+        object_item.object_mask = object_mask
+        object_item.centroid = get_image_centroid(np.float32(object_image), float)
+        objects.append(object_item)
+
+    # Heaviest object goes first, it is reported on topics with single item
+    objects.sort(key=lambda x: np.sum(x.getExtractedImage()), reverse=True)
+    return objects
@@ -7,11 +7,13 @@ from debug.debug import *
 
 
 class Topic:
-    def __init__(self, name, msg_type, callback=None, queue_size=10):
+    # latch: last published message is sent to every new subscriber, used by topics published only on change
+    def __init__(self, name, msg_type, callback=None, queue_size=10, latch=False):
         self.name = name
         self.msg_type = msg_type
         self.callback = callback
         self.queue_size = queue_size
+        self.latch = latch
 
 
 class NodeStatus(Enum):
@@ -42,7 +44,11 @@ class Node(QtCore.QThread):
 
         # Initialize
         super(Node, self).__init__()
-        rospy.init_node(node_name)
+        # ROS allows only one node per process, next tables in the same process share it
+        if not rospy.core.is_initialized():
+            rospy.init_node(node_name)
+        self.subscribers = []
+        self.publishers = []
 
         # Place where you should import all translations
         self.language = language
@@ -97,7 +103,8 @@ class Node(QtCore.QThread):
 
         def __init__(self, topic):
             self.topic = topic
-            self.pub = rospy.Publisher(topic.name, topic.msg_type, queue_size=topic.queue_size)
+            self.pub = rospy.Publisher(topic.name, topic.msg_type, queue_size=topic.queue_size,
+                                       latch=topic.latch)
 
         def publish(self, message):
             if type(message) is self.topic.msg_type:
@@ -0,0 +1,121 @@
+from collections import deque, Counter
+
+from item.item import ItemPlacement, ItemType
+
+
+class PredictionSmoother:
+    # Every frame is recognized on its own, so results flicker while item is being put down
+    # Type, placement and placed status are voted over sliding window of last recognitions,
+    # weight is averaged with EMA, only settled values are reported as changed
+    # window: how many last recognitions take part in voting
+    # min_votes: how many of them have to agree before value becomes stable
+    # weight_alpha: EMA factor of the newest weight, 1.0 means no smoothing
+    # weight_tolerance, weight_min_change: stable weight changes only when EMA moves further than
+    #   relative tolerance of stable weight and at least min change in grams
+    def __init__(self, window=5, min_votes=4, weight_alpha=0.3, weight_tolerance=0.05, weight_min_change=20):
+        self.window = window
+        self.min_votes = min(min_votes, window)
+        self.weight_alpha = weight_alpha
+        self.weight_tolerance = weight_tolerance
+        self.weight_min_change = weight_min_change
+
+        self.placed_votes = deque(maxlen=window)
+        self.type_votes = deque(maxlen=window)
+        self.placement_votes = deque(maxlen=window)
+        self.objects_votes = deque(maxlen=window)
+        self.weight_ema = None
+
+        self.placed = False
+        self.type = ItemType.none
+        self.placement = ItemPlacement.unknown
+        self.weight = 0
+        self.objects = ()
+        # Placed status, type and placement of the last recognition agree with stable values
+        self.settled = False
+
+        self.updates = 0
+        self.changes = 0
+
+    @staticmethod
+    def get_vote(votes, min_votes):
+        if len(votes) < min_votes:
+            return None
+        value, count = Counter(votes).most_common(1)[0]
+        if count < min_votes:
+            return None
+        return value
+
+    def update(self, placed, item_type, placement, weight, objects=None):
+        # Returns names of stable values changed by this recognition: "placed", "type", "placement", "weight",
+        # "objects" (objects is any hashable description of all items on the table, e.g. tuple of their types)
+        self.updates += 1
+        changed = []
+
+        self.placed_votes.append(placed)
+        self.type_votes.append(item_type)
+        self.placement_votes.append(placement)
+
+        placed_vote = self.get_vote(self.placed_votes, self.min_votes)
+        type_vote = self.get_vote(self.type_votes, self.min_votes)
+        placement_vote = self.get_vote(self.placement_votes, self.min_votes)
+        # Item is reported as placed only after its type and placement settled, so they can be read together
+        if placed_vote and (type_vote is None or placement_vote is None):
+            placed_vote = None
+
+        if type_vote is not None and type_vote != self.type:
+            self.type = type_vote
+            # Weight of previous item should not leak into the new one
+            self.weight_ema = None
+            changed.append("type")
+
+        if placement_vote is not None and placement_vote != self.placement:
+            self.placement = placement_vote
+            changed.append("placement")
+
+        if objects is not None:
+            self.objects_votes.append(objects)
+            objects_vote = self.get_vote(self.objects_votes, self.min_votes)
+            if objects_vote is not None and objects_vote != self.objects:
+                self.objects = objects_vote
+                changed.append("objects")
+
+        self.settled = placed_vote is not None and type_vote is not None and placement_vote is not None
+
+        if placed_vote is not None and placed_vote != self.placed:
+            self.placed = placed_vote
+            changed.append("placed")
+
+        # Weight is averaged only while item stably lies on the table, hand pressing it is left out by voting
+        if not self.placed:
+            self.weight_ema = None
+            if self.weight != 0:
+                self.weight = 0
+                changed.append("weight")
+        elif placed:
+            if self.weight_ema is None:
+                self.weight_ema = float(weight)
+            else:
+                self.weight_ema += self.weight_alpha * (float(weight) - self.weight_ema)
+            if abs(self.weight_ema - self.weight) >= max(self.weight_min_change, self.weight_tolerance * self.weight):
+                self.weight = max(int(round(self.weight_ema)), 0)
+                changed.append("weight")
+
+        if changed:
+            self.changes += 1
+        return changed
+
+    def is_settled(self):
+        # Recognition has to go on until this is true, otherwise item may never be reported as placed
+        return self.settled
+
+    def reset(self):
+        self.settled = False
+        self.placed_votes.clear()
+        self.type_votes.clear()
+        self.placement_votes.clear()
+        self.objects_votes.clear()
+        self.weight_ema = None
+
+    def get_statistics(self):
+        return {"updates": self.updates,
+                "changes": self.changes}
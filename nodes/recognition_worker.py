@@ -0,0 +1,82 @@
+import time
+import threading
+from collections import deque
+
+from PyQt5 import QtCore
+
+from debug.debug import *
+
+
+class RecognitionJob:
+    def __init__(self, item, frame_time, placed=False):
+        self.item = item
+        self.frame_time = frame_time
+        self.placed = placed
+        self.finish_time = None
+
+
+class RecognitionWorker(QtCore.QThread):
+    # Runs recognition next to node publish loop, only the newest waiting job is kept
+    # When recognition is slower than sensor, older frames are dropped instead of building a queue
+    def __init__(self, recognise_function, result_callback=None):
+        super(RecognitionWorker, self).__init__()
+        self.recognise_function = recognise_function
+        self.result_callback = result_callback
+
+        self.condition = threading.Condition()
+        self.pending_job = None
+        self.results = deque()
+
+        self.jobs_done = 0
+        self.jobs_dropped = 0
+
+        self.exitFlag = False
+        self.start()
+
+    def submit(self, job):
+        with self.condition:
+            if self.pending_job is not None:
+                self.jobs_dropped += 1
+            self.pending_job = job
+            self.condition.notify()
+
+    def pop_results(self):
+        # Finished jobs in order of their frames
+        with self.condition:
+            results = list(self.results)
+            self.results.clear()
+        return results
+
+    def stop(self):
+        with self.condition:
+            self.exitFlag = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while not self.exitFlag:
+            with self.condition:
+                while self.pending_job is None and not self.exitFlag:
+                    self.condition.wait(0.1)
+                if self.exitFlag:
+                    break
+                job = self.pending_job
+                self.pending_job = None
+
+            try:
+                self.recognise_function(job)
+            except Exception as e:
+                debug(DBGLevel.ERROR, "Recognition of frame " + str(job.item.id) + " failed: " + str(e))
+                continue
+            job.finish_time = time.monotonic()
+
+            with self.condition:
+                self.results.append(job)
+                self.jobs_done += 1
+            if self.result_callback is not None:
+                self.result_callback()
+
+    def get_statistics(self):
+        with self.condition:
+            return {"done": self.jobs_done,
+                    "dropped": self.jobs_dropped}
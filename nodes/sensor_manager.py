@@ -0,0 +1,96 @@
+import os
+import rospkg
+
+from nodes.table import TableNode
+from sensor.sensor import Sensor
+from sensor.params import Params
+from connection.frame_parsing import FrameProtocol
+from connection.replay import ReplaySerial
+from item.classifier.batch_recognition import load_batch_recognizer
+from item.classifier.inference_backends import InferenceBackend
+from item.classifier.recognition_cache import RecognitionCache
+from debug.debug import *
+
+
+class SensorManager:
+    # Drives many tables from one process, every table has its own serial reader, calibration and topics,
+    # but all of them share one instance of recognition models
+    sensors = None
+    nodes = None
+    recognizer = None
+    recognition_cache = None
+
+    def __init__(self, usb_ports, table_names=None, field_params=Params, frame_protocol=FrameProtocol.csv,
+                 model_path="item/classifier/models/classifier_model.keras",
+                 weight_calculation_mode="internal",
+                 weight_calculation_model_path="item/classifier/models/weight_model.keras",
+                 weight_calibration_path="item/classifier/models/weight_calibration.npz",
+                 default_turn_on=False,
+                 record_path=None, replay_speed=None, replay_lockstep=False,
+                 inference_backend=InferenceBackend.tf_function):
+        # When replay_speed is given, usb_ports are names of recordings which are replayed instead of controllers
+        if table_names is None:
+            table_names = self.default_table_names(len(usb_ports))
+        if len(table_names) != len(usb_ports):
+            raise ValueError("Every USB port needs its own table name")
+
+        rp = rospkg.RosPack()
+        share_path = rp.get_path('smart_table') + '/'
+        self.recognizer = load_batch_recognizer(share_path + model_path, weight_calculation_mode,
+                                                share_path + weight_calculation_model_path,
+                                                inference_backend, share_path + weight_calibration_path)
+        # The same items are placed on all tables, so they share recognition results as well
+        self.recognition_cache = RecognitionCache()
+
+        self.sensors = []
+        self.nodes = []
+        for usb_port, table_name in zip(usb_ports, table_names):
+            ser = None
+            if replay_speed is not None:
+                ser = ReplaySerial(usb_port, replay_speed)
+            sensor = Sensor(usb_port, field_params=field_params, frame_protocol=frame_protocol, ser=ser)
+            if replay_lockstep:
+                sensor.set_lockstep(True)
+            if record_path is not None:
+                sensor.start_recording(self.get_recording_filename(record_path, table_name, len(usb_ports)))
+            node = TableNode(node_name="SmartTable",
+                             topic_prefix=self.get_topic_prefix(table_name, len(usb_ports)),
+                             default_turn_on=default_turn_on,
+                             recognizer=self.recognizer,
+                             recognition_cache=self.recognition_cache,
+                             field_params=field_params)
+            node.set_sensor(sensor)
+            self.sensors.append(sensor)
+            self.nodes.append(node)
+            debug(DBGLevel.CRITICAL, "Table " + table_name + " uses port " + usb_port)
+
+    @staticmethod
+    def default_table_names(n_tables):
+        if n_tables == 1:
+            return ["table"]
+        return ["table" + str(i) for i in range(n_tables)]
+
+    @staticmethod
+    def get_topic_prefix(table_name, n_tables):
+        # Single table keeps old topics, so nodes listening on them work without changes
+        if n_tables == 1:
+            return "/table"
+        return "/table/" + table_name
+
+    @staticmethod
+    def get_recording_filename(record_path, table_name, n_tables):
+        if n_tables == 1:
+            return record_path
+        base, extension = os.path.splitext(record_path)
+        return base + "_" + table_name + extension
+
+    def connect_to_controllers(self):
+        for sensor in self.sensors:
+            sensor.connect_to_controller()
+
+    def stop_recording(self):
+        for sensor in self.sensors:
+            sensor.stop_recording()
+
+    def get_connected_ports(self):
+        return [sensor.usb_port for sensor in self.sensors if sensor.get_usb_connected()]
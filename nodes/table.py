@@ -1,22 +1,27 @@
 import time
+import json
+import threading
 import numpy as np
 
 import rospkg
 from sensor_msgs.msg import Image
 from std_msgs.msg import Bool, String, Int32
 
-from keras.models import load_model
-
 from nodes.messages import prepare_bool_msg, prepare_image_msg, prepare_string_msg, prepare_int32_msg
 from nodes.node_core import NodeStatus, Topic, Node
-from sensor.params import ImageMask
-from sensor.data_parsing import flatten
+from nodes.recognition_worker import RecognitionWorker, RecognitionJob
+from nodes.prediction_smoother import PredictionSmoother
+from sensor.params import Params, ImageMask
+from sensor.frame_change import FrameChangeDetector
+from sensor.placement_events import PlacementEventDetector
 from item.item import Item, ItemPlacement, ItemType
+from item.segmentation import segment_items
 from item.classifier.position_recognition import recognise_position
-from item.classifier.weight_estimation import estimate_weight, estimate_weight_with_model, \
-    mean_absolute_percentage_square_error
-from item.classifier.image_recognition import Classifier
+from item.classifier.batch_recognition import load_batch_recognizer
+from item.classifier.inference_backends import InferenceBackend
+from item.classifier.recognition_cache import RecognitionCache
 from debug.debug import *
+from debug.latency import LatencyStatistics
 
 
 class TableStatus(NodeStatus, Enum):
@@ -31,11 +36,25 @@ class TableNode(Node):
     on_flag = False
     calibrate_flag = False
     new_image_flag = False
+    reset_flag = False
 
     mask = ImageMask()
     actual_item = None
+    recognized_item = None
     item_cnt = 1
-
+    reset_item_id = 0
+    calibration_version = 0
+    change_detector = None
+    event_detector = None
+    recognition_cache = None
+    smoother = None
+
+    recognition_worker = None
+    recognition_latency = None
+    wakeup = None
+    status_period = 0.1
+
+    recognizer = None
     item_classifier = None
     classifier_model_path = None
 
@@ -43,7 +62,7 @@ class TableNode(Node):
     weight_model_path = None
     weight_model = None
 
-    # weight_calculation: "internal", "neuron"
+    # weight_calculation: "internal", "neuron", "multihead" (model_path has to point to multihead model)
     def __init__(self,
                  node_name="SmartTable",
                  language="en",
@@ -51,7 +70,17 @@ class TableNode(Node):
                  topic_prefix="/table",
                  weight_calculation_mode="internal",
                  weight_calculation_model_path="item/classifier/models/weight_model.keras",
-                 default_turn_on=False
+                 weight_calibration_path="item/classifier/models/weight_calibration.npz",
+                 default_turn_on=False,
+                 recognizer=None,
+                 inference_backend=InferenceBackend.tf_function,
+                 change_tolerance=8,
+                 change_max_fields=0,
+                 use_recognition_cache=True,
+                 recognition_cache=None,
+                 smoothing_window=5,
+                 smoothing_min_votes=4,
+                 field_params=Params
                  ):
         # Set status
         self.node_status = TableStatus.initializing
@@ -69,32 +98,58 @@ class TableNode(Node):
         published_topics.append(ret)
         ret = Topic(topic_prefix + "/status", String)
         published_topics.append(ret)
-        ret = Topic(topic_prefix + "/is_placed", Bool)
+        ret = Topic(topic_prefix + "/is_placed", Bool, latch=True)
+        published_topics.append(ret)
+        ret = Topic(topic_prefix + "/weight", Int32, latch=True)
+        published_topics.append(ret)
+        ret = Topic(topic_prefix + "/predicted_item", String, latch=True)
         published_topics.append(ret)
-        ret = Topic(topic_prefix + "/weight", Int32)
+        ret = Topic(topic_prefix + "/location", String, latch=True)
         published_topics.append(ret)
-        ret = Topic(topic_prefix + "/predicted_item", String)
+        ret = Topic(topic_prefix + "/items", String, latch=True)
         published_topics.append(ret)
-        ret = Topic(topic_prefix + "/location", String)
+        ret = Topic(topic_prefix + "/frame_stats", String)
         published_topics.append(ret)
+        ret = Topic(topic_prefix + "/recognized_frame", Int32)
+        published_topics.append(ret)
+
+        # Outline of the table, its masks are computed on first use and shared by tables of the same outline
+        self.mask = ImageMask(field_params)
+
+        # Recognition runs only when item is placed, removed or shifted and until its load settles
+        self.event_detector = PlacementEventDetector()
 
-        # Localize path to resources
-        rp = rospkg.RosPack()
-        share_path = rp.get_path('smart_table') + '/'
+        # Recognition is skipped while extracted image stays the same as the last recognized one
+        self.change_detector = FrameChangeDetector(tolerance=change_tolerance, max_changed_fields=change_max_fields)
 
-        # Item classifier model initialization section
-        self.classifier_model_path = share_path + model_path
-        self.item_classifier = Classifier()
-        self.item_classifier.import_model(self.classifier_model_path)
+        # Results of recognition are reused for similar images, cache can be shared by many tables
+        if use_recognition_cache:
+            self.recognition_cache = recognition_cache if recognition_cache is not None else RecognitionCache()
 
-        # Item weight variants
-        if weight_calculation_mode == "neuron":
-            self.weight_calculation_mode = weight_calculation_mode
+        # Item, location, weight and placed status are published only when they settle on new values
+        self.smoother = PredictionSmoother(window=smoothing_window, min_votes=smoothing_min_votes)
+
+        # Models are loaded only when recognizer is not shared with other tables
+        if recognizer is None:
+            # Localize path to resources
+            rp = rospkg.RosPack()
+            share_path = rp.get_path('smart_table') + '/'
+
+            self.classifier_model_path = share_path + model_path
             self.weight_model_path = share_path + weight_calculation_model_path
-            self.weight_model = load_model(self.weight_model_path, custom_objects={
-                'mean_absolute_percentage_square_error': mean_absolute_percentage_square_error})
-        else:
-            self.weight_calculation_mode = "internal"
+            recognizer = load_batch_recognizer(self.classifier_model_path, weight_calculation_mode,
+                                               self.weight_model_path, inference_backend,
+                                               share_path + weight_calibration_path)
+        self.recognizer = recognizer
+        self.recognizer.register_table()
+        self.item_classifier = recognizer.item_classifier
+        self.weight_calculation_mode = recognizer.weight_calculation_mode
+        self.weight_model = recognizer.weight_model
+
+        # Recognition runs in its own thread, publish loop is woken up by new frames and finished recognitions
+        self.wakeup = threading.Event()
+        self.recognition_latency = LatencyStatistics("Recognition latency")
+        self.recognition_worker = RecognitionWorker(self.recognise_job, result_callback=self.wakeup.set)
 
         # Run node
         self.topic_prefix = topic_prefix
@@ -114,6 +169,8 @@ class TableNode(Node):
         if type(data) is Bool:
             self.on_flag = data.data
             self.new_image_flag = False
+            # Votes and reference frames from before turning off don't describe the table anymore
+            self.reset_flag = True
 
         if self.on_flag and self.node_status is TableStatus.table_off:
             self.node_status = TableStatus.table_working
@@ -124,6 +181,7 @@ class TableNode(Node):
     def sgn_calibrate_callback(self, data=None):
         if type(data) is Bool:
             self.calibrate_flag = data.data
+            self.reset_flag = True
 
         if self.calibrate_flag and self.node_status is TableStatus.table_working:
             self.node_status = TableStatus.table_calibrating
@@ -151,69 +209,190 @@ class TableNode(Node):
     def publish_location(self, string):
         self.publish_msg_on_topic(self.topic_prefix + "/location", prepare_string_msg(string))
 
+    def publish_items(self, string):
+        self.publish_msg_on_topic(self.topic_prefix + "/items", prepare_string_msg(string))
+
     def publish_weight(self, int32):
         self.publish_msg_on_topic(self.topic_prefix + "/weight", prepare_int32_msg(int32))
 
+    def publish_recognized_frame(self, int32):
+        self.publish_msg_on_topic(self.topic_prefix + "/recognized_frame", prepare_int32_msg(int32))
+
+    def publish_frame_statistics(self, string):
+        self.publish_msg_on_topic(self.topic_prefix + "/frame_stats", prepare_string_msg(string))
+
     def publish_image(self, image):
         self.publish_msg_on_topic(self.topic_prefix + "/raw_image", prepare_image_msg("Smart table node", image))
 
     def new_image_from_sensor(self):
         self.new_image_flag = True
-
-    def is_item_placed(self):
-        for i in flatten(self.actual_item.getExtractedImage()):
-            if i > 10:
-                return True
-        else:
-            return False
-
-    def get_predicted_item(self):
-        if self.actual_item.type is not ItemType.none:
-            return self.translation.itemTranslationDict[self.actual_item.type]
+        self.wakeup.set()
+
+    def is_item_placed(self, item=None):
+        # Placed status of actual frame is already known from event detector
+        if item is None:
+            return self.event_detector.placed
+        return bool(np.any(item.getExtractedImage() > 10))
+
+    def get_predicted_item(self, item=None):
+        if item is None:
+            item = self.actual_item
+        if item.type is not ItemType.none:
+            return self.translation.itemTranslationDict[item.type]
         else:
             return self.translation.itemTranslationDict[ItemType.none]
 
-    def get_predicted_location(self):
-        if self.actual_item.placement is not ItemPlacement.unknown:
-            return self.translation.itemPlacementTranslationDict[self.actual_item.placement]
+    def get_predicted_location(self, item=None):
+        if item is None:
+            item = self.actual_item
+        if item.placement is not ItemPlacement.unknown:
+            return self.translation.itemPlacementTranslationDict[item.placement]
         else:
             return self.translation.itemPlacementTranslationDict[ItemPlacement.unknown]
 
-    def get_predicted_weight(self):
-        if self.actual_item.weight > 0.0:
-            return int(round(self.actual_item.weight))
+    def get_predicted_weight(self, item=None):
+        if item is None:
+            item = self.actual_item
+        if item.weight > 0.0:
+            return int(round(item.weight))
         else:
             return 0
 
+    def get_items_description(self, item=None):
+        # JSON list of all objects on the table, the heaviest one first
+        if item is None:
+            item = self.actual_item
+        items = []
+        for k, object_item in enumerate(item.objects):
+            items.append({"id": k,
+                          "type": self.get_predicted_item(object_item),
+                          "location": self.get_predicted_location(object_item),
+                          "weight": self.get_predicted_weight(object_item),
+                          "centroid": object_item.centroid,
+                          "fields": int(np.count_nonzero(object_item.object_mask))})
+        return json.dumps(items)
+
+    def get_frame_statistics(self):
+        # When dropped frames grow, recognition can't keep up with the sensor
+        stats = self.sensor.get_frame_statistics()
+        change_stats = self.change_detector.get_statistics()
+        event_stats = self.event_detector.get_statistics()
+        return "produced: " + str(stats["produced"]) + ", consumed: " + str(stats["consumed"]) + \
+            ", dropped: " + str(stats["dropped"]) + ", placed: " + str(event_stats["placed"]) + \
+            ", removed: " + str(event_stats["removed"]) + ", shifted: " + str(event_stats["shifted"]) + \
+            ", settling: " + str(event_stats["settling"]) + ", unchanged: " + str(change_stats["hits"]) + \
+            ", recognized: " + str(change_stats["misses"]) + self.get_cache_statistics() + \
+            ", recognition dropped: " + str(self.recognition_worker.get_statistics()["dropped"]) + \
+            ", results published: " + str(self.smoother.get_statistics()["changes"]) + \
+            ", " + self.recognition_latency.summary()
+
+    def get_cache_statistics(self):
+        if self.recognition_cache is None:
+            return ""
+        return ", cache hit rate: " + str(round(self.recognition_cache.get_hit_rate(), 3)) + \
+            ", cache entries: " + str(self.recognition_cache.get_statistics()["entries"])
+
+    def reset_recognition(self):
+        # Published values stay as they are, new ones are published when recognition settles again
+        # Results of frames from before reset which are still being recognized are dropped
+        self.reset_item_id = self.item_cnt
+        self.event_detector.reset()
+        self.change_detector.reset()
+        self.smoother.reset()
+
+    def clear_recognition_results(self):
+        # Extracted images of the same item differ after new calibration, so remembered results don't match them
+        # Cache can be shared by more tables, their entries are recognized again as well
+        self.change_detector.reset()
+        if self.recognition_cache is not None:
+            self.recognition_cache.clear()
+
     def exstract_image_from_sensor_data(self):
         # Calibration image is not nessecarry, because sensor calibrated this data on its own
+        # Sensor buffers are reused by next frame, item is recognized in other thread so it needs own copy
         self.actual_item = Item(self.mask.getMask())
-        self.actual_item.image = self.sensor.image_actual_calibrated
-        self.actual_item.image_extracted_raw = self.sensor.image_actual_calibrated_raw
+        self.actual_item.image = np.array(self.sensor.image_actual_calibrated)
+        self.actual_item.image_extracted_raw = np.array(self.sensor.image_actual_calibrated_raw)
         self.actual_item.setExtractedImage()
         self.actual_item.id = self.item_cnt
         self.item_cnt += 1
 
-    def make_recognition_of_image(self):
-        if self.is_item_placed():
-            self.actual_item.placement = recognise_position(self.actual_item.getExtractedImage(), self.mask.getMask(),
-                                                            [1.5, 2.5])
-
-            if self.weight_calculation_mode == "internal":
-                self.actual_item.weight = estimate_weight(self.actual_item.image_extracted_raw)
-            elif self.weight_calculation_mode == "neuron":
-                weight_estimated = estimate_weight_with_model(self.weight_model,
-                                                              np.array([self.actual_item.getExtractedImage()]))
-                self.actual_item.weight = int(weight_estimated[0])
-            else:
-                self.actual_item.weight = 0
+    def recognise_job(self, job):
+        # Called from recognition worker
+        self.recognise_changed_image(job.item, job.placed)
+
+    def recognise_changed_image(self, item, placed=None):
+        # Unchanged image gets results of the last recognized one, so they are still published every frame
+        if not self.change_detector.is_changed(item.getExtractedImage()):
+            item.type = self.recognized_item.type
+            item.weight = self.recognized_item.weight
+            item.placement = self.recognized_item.placement
+            item.objects = self.recognized_item.objects
+            return False
 
-            if self.item_classifier is not None:
-                prediction = self.item_classifier.predict_items_with_confidence(
-                    np.array([self.actual_item.getExtractedImage()]), 0.75, self.item_classifier.output_types)
-                self.actual_item.type = prediction[0]
-            else:
-                self.actual_item.type = ItemType.unknown
+        self.make_recognition_of_image(item, placed)
+        self.change_detector.update(item.getExtractedImage())
+        self.recognized_item = item
+        return True
+
+    def make_recognition_of_image(self, item, placed=None):
+        if placed is None:
+            placed = self.is_item_placed(item)
+        if not placed:
+            return
+
+        # Every object on the table is recognized on its own, the heaviest one describes whole table
+        item.objects = segment_items(item)
+        not_cached = []
+        for object_item in item.objects:
+            cache_key = None
+            if self.recognition_cache is not None:
+                cache_key = self.recognition_cache.get_key(object_item.getExtractedImage())
+                cached = self.recognition_cache.get(cache_key)
+                if cached is not None:
+                    object_item.placement, object_item.type, object_item.weight = cached
+                    continue
+            object_item.placement = recognise_position(object_item.getExtractedImage(), self.mask.getMask(),
+                                                       self.mask.getFieldSize(), self.mask)
+            not_cached.append((object_item, cache_key))
+
+        if not_cached:
+            # Shared recognizer predicts objects of this table together with images from other tables
+            results = self.recognizer.recognise_many([x[0].getExtractedImage() for x in not_cached],
+                                                     [x[0].image_extracted_raw for x in not_cached])
+            for (object_item, cache_key), (item_type, weight) in zip(not_cached, results):
+                object_item.type, object_item.weight = item_type, weight
+                if cache_key is not None:
+                    self.recognition_cache.put(cache_key, (object_item.placement, object_item.type,
+                                                           object_item.weight))
+
+        if item.objects:
+            item.placement = item.objects[0].placement
+            item.type = item.objects[0].type
+            item.weight = item.objects[0].weight
+
+    def publish_recognition_results(self, job):
+        # Results are tagged with id of the frame they come from, only values which settled are published
+        self.recognition_latency.add_since(job.frame_time)
+        if job.item.id < self.reset_item_id:
+            return
+        objects = tuple((x.type, x.placement) for x in job.item.objects)
+        changed = self.smoother.update(job.placed, job.item.type, job.item.placement,
+                                       self.get_predicted_weight(job.item), objects)
+        if not changed:
+            return
+        self.publish_recognized_frame(job.item.id)
+        if "type" in changed:
+            self.publish_predicted_item(self.translation.itemTranslationDict[self.smoother.type])
+        if "placement" in changed:
+            self.publish_location(self.translation.itemPlacementTranslationDict[self.smoother.placement])
+        if "weight" in changed:
+            self.publish_weight(self.smoother.weight)
+        if "objects" in changed or "weight" in changed:
+            # Weights of single objects are not smoothed, they come from this frame
+            self.publish_items(self.get_items_description(job.item))
+        if "placed" in changed:
+            self.publish_is_placed(self.smoother.placed)
 
     def check_node_work_properly(self):
         # Check status of connection
@@ -234,30 +413,42 @@ class TableNode(Node):
         return True
 
     def run(self):
-        i = 0
+        last_status_time = 0.0
         while not self.exitFlag:
-            time.sleep(0.01)
+            # Woken up by new frame or finished recognition, timeout keeps status going when nothing comes
+            self.wakeup.wait(self.status_period)
+            self.wakeup.clear()
+
+            # Reset is done here, event detector and smoother are used only by this thread
+            if self.reset_flag:
+                self.reset_flag = False
+                self.reset_recognition()
 
             if self.check_node_work_properly():
                 # Check for new image and handle it
                 if self.new_image_flag:
-                    if self.calibrate_flag:
-                        self.sensor.calibrate_sensor(self.sensor.image_actual)
-                    self.exstract_image_from_sensor_data()
-                    self.make_recognition_of_image()
-
-                    #####
-                    self.publish_image(self.sensor.image_actual)
-                    self.publish_is_placed(self.is_item_placed())
-                    self.publish_predicted_item(self.get_predicted_item())
-                    self.publish_location(self.get_predicted_location())
-                    self.publish_weight(self.get_predicted_weight())
-                    #####
-
                     self.new_image_flag = False
-
-            # TODO Make it simpler and better (slow down publishing status msgs)
-            i += 1
-            if i == 10:
+                    if self.sensor.process_new_frame():
+                        if self.calibrate_flag:
+                            self.sensor.calibrate_sensor(self.sensor.image_actual_raw)
+                        if self.sensor.calibration.version != self.calibration_version:
+                            self.calibration_version = self.sensor.calibration.version
+                            self.clear_recognition_results()
+                        self.exstract_image_from_sensor_data()
+                        self.event_detector.update(self.actual_item.getExtractedImage())
+                        # Recognized also after load settled, until enough results agree (jobs can be dropped)
+                        if self.event_detector.needs_recognition() or not self.smoother.is_settled():
+                            self.recognition_worker.submit(RecognitionJob(self.actual_item, self.sensor.frame_time,
+                                                                          self.event_detector.placed))
+
+                        self.publish_image(self.sensor.image_actual)
+
+                for job in self.recognition_worker.pop_results():
+                    self.publish_recognition_results(job)
+
+            now = time.monotonic()
+            if now - last_status_time >= self.status_period:
                 self.publish_status(self.get_node_status())
-                i = 0
+                if self.sensor is not None:
+                    self.publish_frame_statistics(self.get_frame_statistics())
+                last_status_time = now
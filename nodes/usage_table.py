@@ -23,6 +23,7 @@ class UsageTableNode(Node):
     move_status = 0
     command_arrived = False
     command = ""
+    wait_period = 0.1
 
     language_usage_table = "en"
     translation_usage_table = Node
@@ -265,15 +266,10 @@ class UsageTableNode(Node):
         self.robot_say_sth(self.translation_usage_table.usageIntelligentTableDictionary["give"] + item_translate)
 
         # TODO check weight and item type
-        i = 0
+        # Table publishes only settled values, placed status comes after location and weight of the item
         while 1:
-            time.sleep(1)
+            time.sleep(self.wait_period)
             if self.item_placed_status:
-                # Drop first measurement
-                if i == 0:
-                    i = 1
-                    continue
-                i = 0
                 if self.check_item_inside_table(item) != 0:
                     continue
                 if self.check_item_in_weight_range(item) != 0:
@@ -301,7 +297,7 @@ class UsageTableNode(Node):
                 self.robot_say_sth(self.translation_usage_table.usageIntelligentTableDictionary["thanks"])
                 time.sleep(2)
                 return 0
-            time.sleep(1)
+            time.sleep(self.wait_period)
 
     def handle_give_tea_command(self):
         # Go to kitchen
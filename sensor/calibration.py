@@ -0,0 +1,66 @@
+import numpy as np
+
+from sensor.data_parsing import ImageCompensationMethod, compensate_raw_image, get_calibration_factors, \
+    cast_data_to_uint8
+from debug.debug import *
+
+ADC_CODES = 4096
+
+
+class SensorCalibration:
+    # Everything that depends only on calibration image is computed here once per calibration
+    # Any change of calibration has to go through update(), that's the only place where cached data is invalidated
+    def __init__(self, columns, rows,
+                 compensation_method=ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A,
+                 use_lut=False):
+        self.columns = columns
+        self.rows = rows
+        self.compensation_method = compensation_method
+        self.use_lut = use_lut and compensation_method != ImageCompensationMethod.input_shifted_by_max_value
+
+        self.raw = np.zeros((columns, rows), dtype=np.uint16)
+        self.display = np.zeros((columns, rows), dtype=np.uint8)
+        self.calibrated = False
+        self.version = 0
+
+        self.threshold = None
+        self.scale = None
+
+        # Optional table mapping every 12 bit ADC code of every field directly to compensated value
+        self.lut = None
+        self.lut_offsets = np.arange(columns * rows, dtype=np.intp) * ADC_CODES
+        self.lut_indexes = np.zeros(columns * rows, dtype=np.intp)
+
+    def is_calibrated(self):
+        return self.calibrated
+
+    def update(self, raw_image):
+        np.copyto(self.raw, raw_image, casting='unsafe')
+        cast_data_to_uint8(self.rows, self.columns, self.raw, out=self.display)
+        self.threshold, self.scale = get_calibration_factors(self.raw, self.compensation_method)
+        if self.use_lut:
+            self.build_lut()
+
+        self.calibrated = True
+        self.version += 1
+        debug(DBGLevel.INFO, "Calibration updated, version " + str(self.version))
+
+    def build_lut(self):
+        # Compensation of every field is independent from other fields, so it can be done for all codes at once
+        codes = np.arange(ADC_CODES, dtype=np.float64).reshape(-1, 1)
+        calibration = self.raw.reshape(1, -1)
+        threshold = None if self.threshold is None else self.threshold.reshape(1, -1)
+        scale = None if self.scale is None else self.scale.reshape(1, -1)
+
+        lut = np.empty((ADC_CODES, self.columns * self.rows), dtype=np.float32)
+        compensate_raw_image(self.rows, self.columns, codes, calibration, self.compensation_method, out=lut,
+                             calibration_factors=(threshold, scale))
+        self.lut = np.ascontiguousarray(lut.T).ravel()
+
+    def compensate(self, raw_image, out):
+        if self.lut is not None:
+            np.add(self.lut_offsets, raw_image.ravel(), out=self.lut_indexes)
+            np.take(self.lut, self.lut_indexes, out=out.reshape(-1))
+            return out
+        return compensate_raw_image(self.rows, self.columns, raw_image, self.raw, self.compensation_method, out=out,
+                                    calibration_factors=(self.threshold, self.scale))
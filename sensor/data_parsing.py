@@ -15,40 +15,52 @@ class ImageCompensationMethod(Enum):
 
 
 def flatten(seq):
+    # Arrays are flattened by numpy, other nested sequences are walked without recursion
+    if type(seq) is np.ndarray:
+        return seq.ravel().tolist()
+
     out_list = []
-    for element in seq:
-        element_type = type(element)
-        if element_type is tuple or element_type is list or element_type is np.ndarray:
-            for element_in_element in flatten(element):
-                out_list.append(element_in_element)
+    iterators = [iter(seq)]
+    while iterators:
+        for element in iterators[-1]:
+            element_type = type(element)
+            if element_type is np.ndarray:
+                out_list.extend(element.ravel().tolist())
+            elif element_type is tuple or element_type is list:
+                iterators.append(iter(element))
+                break
+            else:
+                out_list.append(element)
         else:
-            out_list.append(element)
+            iterators.pop()
     return out_list
 
 
-def cast_data_to_uint8(rows, columns, raw_data):
-    data_uint8 = [[0 for x in range(columns)] for y in range(rows)]
-
-    for i in range(columns):
-        for j in range(rows):
-            val_uint8 = int(255 - raw_data[i][j] * 255 / 4095)
+def cast_data_to_uint8(rows, columns, raw_data, out=None, scratch=None):
+    # Same as int(255 - value * 255 / 4095) clipped to 0..255 for every field, done in place when buffers are given
+    if out is None:
+        out = np.empty((columns, rows), dtype=np.uint8)
+    if scratch is None:
+        scratch = np.empty((columns, rows), dtype=np.float64)
 
-            if val_uint8 > 255:
-                val_uint8 = 255
-            if val_uint8 < 0:
-                val_uint8 = 0
+    np.copyto(scratch, raw_data)
+    np.multiply(scratch, 255, out=scratch)
+    np.divide(scratch, 4095, out=scratch)
+    np.subtract(255, scratch, out=scratch)
+    np.trunc(scratch, out=scratch)
+    np.clip(scratch, 0, 255, out=scratch)
+    np.copyto(out, scratch, casting='unsafe')
+    return out
 
-            data_uint8[i][j] = val_uint8
-    return data_uint8
 
+def parse_data_to_np_image(rows, columns, raw_data, out=None, scratch=None):
+    if np.max(raw_data) > 255:
+        return cast_data_to_uint8(rows, columns, raw_data, out, scratch)
 
-def parse_data_to_np_image(rows, columns, raw_data):
-    for i in flatten(raw_data):
-        if not i <= 255:
-            raw_data = cast_data_to_uint8(rows, columns, raw_data)
-            break
-    np_image = np.array(raw_data, dtype=np.uint8)
-    return np_image
+    if out is None:
+        return np.array(raw_data, dtype=np.uint8)
+    np.copyto(out, raw_data, casting='unsafe')
+    return out
 
 
 def mask_np_image(np_image, mask):
@@ -56,59 +68,68 @@ def mask_np_image(np_image, mask):
     pass
 
 
-def compensate_raw_image(rows, columns, image_to_compensate, calibration_image,
-                         compensation_method=ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A):
-    compensated_image = [[0 for x in range(columns)] for y in range(rows)]
+def get_filter_value(compensation_method):
+    if compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_A:
+        return 4000  # A
+    elif compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_B:
+        return 3950  # B
+    return 3900  # C
+
+
+def get_mult_value(compensation_method):
+    if compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A:
+        return 0.99  # A
+    return 0.98  # B
+
+
+def get_calibration_factors(calibration_image, compensation_method):
+    # Per field clamp threshold and scale depend only on calibration, so they can be computed once per calibration
+    calibration_image = np.asarray(calibration_image, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        if compensation_method == ImageCompensationMethod.input_scaled_by_calibration_value:
+            return None, 4095 / calibration_image
 
+        if compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A \
+                or compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_B:
+            threshold = get_mult_value(compensation_method) * calibration_image
+            return threshold, 4095 / threshold
+    return None, None
+
+
+def compensate_raw_image(rows, columns, image_to_compensate, calibration_image,
+                         compensation_method=ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A,
+                         out=None, calibration_factors=None):
+    if out is None:
+        out = np.empty((columns, rows), dtype=np.float32)
+    if calibration_factors is None:
+        calibration_factors = get_calibration_factors(calibration_image, compensation_method)
+    threshold, scale = calibration_factors
+
+    # Serial delivers uint16 arrays, so every calculation is forced to floats to not overflow
     if compensation_method == ImageCompensationMethod.input_shifted_by_max_value:
-        image_max_value = max(max(image_to_compensate))
-        for i in range(columns):
-            for j in range(rows):
-                compensated_image[i][j] = image_to_compensate[i][j] + 4095 - image_max_value
+        np.add(image_to_compensate, 4095 - float(np.max(image_to_compensate)), out=out, dtype=np.float64)
 
     elif compensation_method == ImageCompensationMethod.input_shifted_by_calibration_value:
-        for i in range(columns):
-            for j in range(rows):
-                compensated_image[i][j] = image_to_compensate[i][j] + 4095 - calibration_image[i][j]
+        np.subtract(image_to_compensate, calibration_image, out=out, dtype=np.float64)
+        np.add(out, 4095, out=out)
 
     elif compensation_method == ImageCompensationMethod.input_scaled_by_calibration_value:
-        for i in range(columns):
-            for j in range(rows):
-                compensated_image[i][j] = image_to_compensate[i][j] * (4095 / calibration_image[i][j])
+        np.multiply(image_to_compensate, scale, out=out, dtype=np.float64)
 
     elif compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_A \
             or compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_B \
             or compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_C:
-        if compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_A:
-            filter_value = 4000  # A
-        elif compensation_method == ImageCompensationMethod.input_scaled_to_fixed_value_B:
-            filter_value = 3950  # B
-        else:
-            filter_value = 3900  # C
-
-        for i in range(columns):
-            for j in range(rows):
-                compensated_image[i][j] = image_to_compensate[i][j]
-                if compensated_image[i][j] > filter_value:
-                    compensated_image[i][j] = filter_value
-                compensated_image[i][j] = int(compensated_image[i][j] * 4095 / filter_value)
+        filter_value = get_filter_value(compensation_method)
+        # Products are integers lower than 2^24 so they are exact, floor division gives the same as int()
+        np.minimum(image_to_compensate, filter_value, out=out, dtype=np.float64)
+        np.multiply(out, 4095, out=out)
+        np.floor_divide(out, filter_value, out=out)
 
     elif compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A \
             or compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_B:
-        if compensation_method == ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A:
-            mult_value = 0.99  # A
-        else:
-            mult_value = 0.98  # B
-
-        for i in range(columns):
-            for j in range(rows):
-                compensated_image[i][j] = image_to_compensate[i][j]
-                if compensated_image[i][j] > mult_value * calibration_image[i][j]:
-                    compensated_image[i][j] = mult_value * calibration_image[i][j]
-                compensated_image[i][j] = compensated_image[i][j] * 4095 / (mult_value * calibration_image[i][j])
+        np.minimum(image_to_compensate, threshold, out=out, dtype=np.float64)
+        np.multiply(out, scale, out=out, dtype=np.float64)
 
     else:
-        for i in range(columns):
-            for j in range(rows):
-                compensated_image[i][j] = image_to_compensate[i][j]
-    return compensated_image
+        np.copyto(out, image_to_compensate, casting='unsafe')
+    return out
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+class FrameBuffers:
+    # Every frame goes through the same buffers, so steady state processing does not allocate anything
+    def __init__(self, columns, rows):
+        shape = (columns, rows)
+        self.raw = np.zeros(shape, dtype=np.uint16)
+        self.compensated = np.zeros(shape, dtype=np.float32)
+
+        self.display = np.zeros(shape, dtype=np.uint8)
+        self.compensated_display = np.zeros(shape, dtype=np.uint8)
+
+        # Intermediate results of casting to uint8
+        self.scratch = np.zeros(shape, dtype=np.float64)
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class FrameChangeDetector:
+    # Tells whether extracted image changed enough since the last recognized one to run recognition again
+    # Image is compared with last recognized image, not with previous frame, so slow drift is noticed as well
+    # tolerance: difference of single field (in 0-255 image values) which is still treated as noise
+    # max_changed_fields: how many fields may exceed tolerance before image is treated as changed
+    def __init__(self, columns=16, rows=16, tolerance=8, max_changed_fields=0):
+        self.tolerance = tolerance
+        self.max_changed_fields = max_changed_fields
+
+        self.reference = np.zeros((columns, rows), dtype=np.int16)
+        self.difference = np.zeros((columns, rows), dtype=np.int16)
+        self.exceeded = np.zeros((columns, rows), dtype=bool)
+        self.reference_valid = False
+
+        self.hits = 0
+        self.misses = 0
+
+    def is_changed(self, image):
+        if not self.reference_valid:
+            self.misses += 1
+            return True
+
+        np.subtract(image, self.reference, out=self.difference, casting='unsafe')
+        np.abs(self.difference, out=self.difference)
+        np.greater(self.difference, self.tolerance, out=self.exceeded)
+        if np.count_nonzero(self.exceeded) > self.max_changed_fields:
+            self.misses += 1
+            return True
+
+        self.hits += 1
+        return False
+
+    def update(self, image):
+        # Called after recognition of image, next images are compared with it
+        np.copyto(self.reference, image, casting='unsafe')
+        self.reference_valid = True
+
+    def reset(self):
+        self.reference_valid = False
+
+    def get_hit_rate(self):
+        if self.hits + self.misses == 0:
+            return 0.0
+        return self.hits / (self.hits + self.misses)
+
+    def get_statistics(self):
+        return {"hits": self.hits,
+                "misses": self.misses}
@@ -0,0 +1,67 @@
+import time
+import threading
+import numpy as np
+
+
+class FrameMailbox:
+    # Single slot between serial thread (producer) and node thread (consumer), the newest frame always wins
+    # Three buffers are rotated: producer writes to back one, slot holds ready one, consumer reads front one,
+    # so copying happens outside of the lock and nobody ever sees half written frame
+    def __init__(self, shape, dtype=np.uint16):
+        self.back_buffer = np.zeros(shape, dtype=dtype)
+        self.ready_buffer = np.zeros(shape, dtype=dtype)
+        self.front_buffer = np.zeros(shape, dtype=dtype)
+        self.ready_full = False
+        self.ready_frame_id = 0
+        self.ready_frame_time = 0.0
+        self.front_frame_id = 0
+        self.front_frame_time = 0.0
+        self.lock = threading.Condition()
+
+        self.frames_produced = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+
+    def put(self, frame, frame_time=None):
+        if frame_time is None:
+            frame_time = time.monotonic()
+        np.copyto(self.back_buffer, frame, casting='unsafe')
+
+        with self.lock:
+            self.back_buffer, self.ready_buffer = self.ready_buffer, self.back_buffer
+            if self.ready_full:
+                # Consumer did not manage to take previous frame
+                self.frames_dropped += 1
+            self.frames_produced += 1
+            self.ready_full = True
+            self.ready_frame_id = self.frames_produced
+            self.ready_frame_time = frame_time
+            self.lock.notify_all()
+
+    def take(self):
+        # Returned buffer belongs to consumer until next take
+        with self.lock:
+            if not self.ready_full:
+                return None
+            self.front_buffer, self.ready_buffer = self.ready_buffer, self.front_buffer
+            self.front_frame_id = self.ready_frame_id
+            self.front_frame_time = self.ready_frame_time
+            self.ready_full = False
+            self.frames_consumed += 1
+            self.lock.notify_all()
+        return self.front_buffer
+
+    def wait_for_frame(self, timeout=None):
+        with self.lock:
+            return self.lock.wait_for(lambda: self.ready_full, timeout)
+
+    def wait_until_taken(self, timeout=None):
+        # Lets producer go in lockstep with consumer, so no frame is dropped (e.g. when replaying recording)
+        with self.lock:
+            return self.lock.wait_for(lambda: not self.ready_full, timeout)
+
+    def get_statistics(self):
+        with self.lock:
+            return {"produced": self.frames_produced,
+                    "consumed": self.frames_consumed,
+                    "dropped":  self.frames_dropped}
@@ -1,67 +1,191 @@
+import math
 import cv2
 import numpy as np
 
 
 class Params:
+    rows = 16
+    columns = 16
+    max_value = 4095
+
     field_dim1 = 10
     field_dim2 = 20
     field_cover_dim1 = 15
     field_cover_dim2 = 25
     field_cover_area = field_cover_dim1 * field_cover_dim2
 
+    # Size of field in cm [x, y] and outline of table, points [x, y] of image before rotating it by 90 degrees
+    # Stretched outline is drawn on image stretched by field size, when it is None outline is stretched
+    field_size = (1.5, 2.5)
+    table_outline = ((0, 7), (4, 0), (11, 0), (15, 7), (15, 15), (0, 15))
+    stretched_table_outline = ((0, 10), (10, 0), (29, 0), (39, 10), (39, 23), (0, 23))
+
 
 def mask_borderer(mask):
+    # Fields next to zero fields (also by corner) are zeroed, zero fields on the outer frame are not taken into
+    # account, the second frame is always zeroed
+    zero = mask == 0
+    zero[[0, -1], :] = False
+    zero[:, [0, -1]] = False
     bordered_mask = np.copy(mask)
-    for i in range(1, mask.shape[0] - 1):
-        for j in range(1, mask.shape[1] - 1):
-            if not mask[i, j]:
-                bordered_mask[i - 1, j] = 0
-                bordered_mask[i, j - 1] = 0
-                bordered_mask[i - 1, j - 1] = 0
-                bordered_mask[i, j] = 0
-                bordered_mask[i + 1, j] = 0
-                bordered_mask[i, j + 1] = 0
-                bordered_mask[i + 1, j + 1] = 0
-                bordered_mask[i - 1, j + 1] = 0
-                bordered_mask[i + 1, j - 1] = 0
-            if i == 1 or j == 1 or i == mask.shape[0] - 2 or j == mask.shape[1] - 2:
-                bordered_mask[i, j] = 0
+    bordered_mask[cv2.dilate(np.uint8(zero), np.ones((3, 3), dtype=np.uint8)) > 0] = 0
+    bordered_mask[[1, -2], 1:-1] = 0
+    bordered_mask[1:-1, [1, -2]] = 0
     return bordered_mask
 
 
-class ImageMask:
-    mask = np.zeros([16, 16])
-    roi_points = np.array([[0, 7], [4, 0], [11, 0], [15, 7], [15, 15], [0, 15]])
-    cv2.fillPoly(mask, [roi_points], int(1))
+def stretch_outline(outline, rows, columns, field_size):
+    # The first and the last field of stretched image stay on the first and the last field,
+    # image before rotation has rows along x of the table
+    scale_x = (round(rows * field_size[1]) - 1) / max(rows - 1, 1)
+    scale_y = (round(columns * field_size[0]) - 1) / max(columns - 1, 1)
+    return tuple((int(round(x * scale_x)), int(round(y * scale_y))) for x, y in outline)
+
+
+def draw_outline(rows, columns, outline):
+    # Outline is drawn on image before rotation, shape [columns, rows]
+    mask = np.zeros([columns, rows])
+    cv2.fillPoly(mask, [np.array(outline)], int(1))
     mask = np.rot90(mask, 3)
-    mask = mask.astype(int)
+    return mask.astype(int)
+
+
+# Cells of edge lookup per field of stretched mask along every axis
+EDGE_LOOKUP_SUBDIVISION = 4
+
+
+def get_edge_candidates(mask, subdivision=EDGE_LOOKUP_SUBDIVISION):
+    # For every cell of grid finer than fields, zero fields which can be the closest one to any point inside
+    # Points for which a zero field is the closest one make convex area, so when it is the closest one for all
+    # corners of the cell, it is the only candidate, that's the case of most cells
+    # In other cells the closest zero field is not further than the closest one of any corner + cell diagonal
+    zero_rows, zero_columns = np.where(mask == 0)
+    points = [(float(column - 1), float(row - 1)) for row, column in zip(zero_rows, zero_columns)]
+    grid_rows = (mask.shape[0] - 1) * subdivision + 1
+    grid_columns = (mask.shape[1] - 1) * subdivision + 1
+    corner_y = np.arange(grid_rows) / subdivision
+    corner_x = np.arange(grid_columns) / subdivision
+    diagonal = np.sqrt(2) / subdivision + 1e-6
+    # Squared distances along axes of all corners to all zero fields
+    corner_dy = (corner_y[:, np.newaxis] - zero_rows) ** 2
+    corner_dx = (corner_x[:, np.newaxis] - zero_columns) ** 2
+
+    candidates = []
+    for row in range(grid_rows - 1):
+        # Squared distances of corners of this row of cells, [corner row, corner column, zero field]
+        distances = corner_dy[row:row + 2, np.newaxis, :] + corner_dx[np.newaxis, :, :]
+        closest = distances.min(axis=2)
+        nearest = distances <= closest[:, :, np.newaxis] + 1e-9
+        nearest = nearest[0, :-1] & nearest[0, 1:] & nearest[1, :-1] & nearest[1, 1:]
 
-    e_mask = np.pad(mask, [(1, 1), (1, 1)], mode='constant', constant_values=0)
-    e_mask = e_mask.astype(int)
+        # Coordinates [x, y] without margin, the same as stretched mask
+        candidates_row = [[points[k]] for k in np.argmax(nearest, axis=1).tolist()]
+        for column in np.flatnonzero(~np.any(nearest, axis=1)).tolist():
+            limit = np.sqrt(np.min(closest[:, column:column + 2])) + diagonal
+            dy = np.maximum(np.maximum(corner_y[row] - zero_rows, zero_rows - corner_y[row + 1]), 0)
+            dx = np.maximum(np.maximum(corner_x[column] - zero_columns, zero_columns - corner_x[column + 1]), 0)
+            candidates_row[column] = [points[k] for k in np.flatnonzero(np.hypot(dx, dy) <= limit).tolist()]
+        candidates.append(candidates_row)
+    return candidates
 
-    e_bordered_mask = mask_borderer(e_mask)
-    e_bordered_mask = e_bordered_mask.astype(int)
 
-    e_2bordered_mask = mask_borderer(e_bordered_mask)
-    e_2bordered_mask = e_2bordered_mask.astype(int)
+# Masks computed for table geometry, shared by all ImageMask objects of the same geometry
+mask_variants = {}
+mask_geometries = {}
 
-    stretched_mask = np.zeros([24, 40])
-    roi_points = np.array([[0, 10], [10, 0], [29, 0], [39, 10], [39, 23], [0, 23]])
-    cv2.fillPoly(stretched_mask, [roi_points], int(1))
-    stretched_mask = np.rot90(stretched_mask, 3)
-    stretched_mask = stretched_mask.astype(int)
+
+class ImageMask:
+    # Every mask is computed on first use only and then taken from mask_variants
+    geometry = None
+    variants = None
+
+    def __init__(self, field_params=Params):
+        # Geometry is normalized once for every set of parameters
+        key = (field_params.rows, field_params.columns, field_params.field_size, field_params.table_outline,
+               field_params.stretched_table_outline)
+        try:
+            self.geometry = mask_geometries.get(key)
+        except TypeError:
+            # Lists in parameters can't be used as key
+            key = None
+            self.geometry = None
+        if self.geometry is None:
+            self.geometry = self.get_geometry(field_params)
+            if key is not None:
+                mask_geometries[key] = self.geometry
+        self.variants = mask_variants.setdefault(self.geometry, {})
+
+    @staticmethod
+    def get_geometry(field_params):
+        rows = int(field_params.rows)
+        columns = int(field_params.columns)
+        field_size = tuple(float(size) for size in field_params.field_size)
+        outline = tuple(tuple(int(v) for v in point) for point in field_params.table_outline)
+        stretched_outline = field_params.stretched_table_outline
+        if stretched_outline is None:
+            stretched_outline = stretch_outline(outline, rows, columns, field_size)
+        stretched_outline = tuple(tuple(int(v) for v in point) for point in stretched_outline)
+        return rows, columns, field_size, outline, stretched_outline
+
+    def get_variant(self, name, compute):
+        # Computed twice at worst when two threads ask at once, both results are the same
+        variant = self.variants.get(name)
+        if variant is None:
+            variant = compute()
+            self.variants[name] = variant
+        return variant
+
+    def getFieldSize(self):
+        return self.geometry[2]
 
     def getMask(self):
-        return self.mask
+        rows, columns, field_size, outline, stretched_outline = self.geometry
+        return self.get_variant("mask", lambda: draw_outline(rows, columns, outline))
 
     def getEMask(self):
-        return self.e_mask
+        return self.get_variant("e_mask", lambda: np.pad(self.getMask(), [(1, 1), (1, 1)], mode='constant',
+                                                         constant_values=0))
 
     def getEMaskWithBorder(self):
-        return self.e_bordered_mask
+        return self.get_variant("e_bordered_mask", lambda: mask_borderer(self.getEMask()))
 
     def getEMaskWithDoubleBorder(self):
-        return self.e_2bordered_mask
+        return self.get_variant("e_2bordered_mask", lambda: mask_borderer(self.getEMaskWithBorder()))
 
     def getStretchedMask(self):
-        return self.stretched_mask
+        rows, columns, field_size, outline, stretched_outline = self.geometry
+        return self.get_variant("stretched_mask", lambda: draw_outline(int(round(rows * field_size[1])),
+                                                                       int(round(columns * field_size[0])),
+                                                                       stretched_outline))
+
+    def getEStretchedMask(self):
+        return self.get_variant("e_stretched_mask", lambda: np.pad(self.getStretchedMask(), [(1, 1), (1, 1)],
+                                                                   mode='constant', constant_values=0))
+
+    def getEdgeCandidates(self):
+        return self.get_variant("e_stretched_edge_candidates", lambda: get_edge_candidates(
+            self.getEStretchedMask()))
+
+    def getNearestEdgePoint(self, point):
+        # point is [x, y] in stretched mask coordinates, the closest point outside of the table is returned
+        # Exact for points of stretched image with margin, points further away are looked up in the closest cell
+        # For 95% of cells of the default table it is one index, in the others up to 14 candidates are compared,
+        # 2-6 us per query either way (auxiliary_scripts/check_edge_distance.py)
+        candidates = self.getEdgeCandidates()
+        row = min(max(math.floor((point[1] + 1.0) * EDGE_LOOKUP_SUBDIVISION), 0), len(candidates) - 1)
+        column = min(max(math.floor((point[0] + 1.0) * EDGE_LOOKUP_SUBDIVISION), 0), len(candidates[0]) - 1)
+        cell = candidates[row][column]
+        if len(cell) == 1:
+            return list(cell[0])
+        nearest = None
+        nearest_distance = None
+        for candidate in cell:
+            distance = (candidate[0] - point[0]) ** 2 + (candidate[1] - point[1]) ** 2
+            if nearest is None or distance < nearest_distance:
+                nearest = candidate
+                nearest_distance = distance
+        return list(nearest)
+
+    def getDistanceToEdge(self, point):
+        nearest = self.getNearestEdgePoint(point)
+        return round(math.hypot(nearest[0] - point[0], nearest[1] - point[1]), 2)
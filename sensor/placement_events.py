@@ -0,0 +1,109 @@
+from enum import Enum
+
+import numpy as np
+
+
+class PlacementEvent(Enum):
+    none = 0
+    placed = 1
+    removed = 2
+    shifted = 3
+
+
+class PlacementEventDetector:
+    # Tracks total load and number of occupied fields of extracted image and tells when item was placed,
+    # removed or shifted, so recognition has to run only on those events and until load settles
+    # Thresholds come in pairs (on/off) to keep light items on noise level from toggling every frame
+    # field_on: value of field (0-255) which at least one field has to exceed to place item
+    # field_off: value of field above which it is counted as occupied, item is removed when none is
+    # load_on, load_off: total load of extracted image needed to place item and to keep it placed
+    # shift_load, shift_fields: relative load change or number of fields which became occupied or free since
+    #   last settled state, above which placed item is treated as shifted
+    # settle_frames, settle_tolerance: frames in row with relative load change below tolerance to settle
+    def __init__(self, columns=16, rows=16, field_on=10, field_off=5, load_on=20, load_off=10,
+                 shift_load=0.15, shift_fields=3, settle_frames=5, settle_tolerance=0.05):
+        self.field_on = field_on
+        self.field_off = field_off
+        self.load_on = load_on
+        self.load_off = load_off
+        self.shift_load = shift_load
+        self.shift_fields = shift_fields
+        self.settle_frames = settle_frames
+        self.settle_tolerance = settle_tolerance
+
+        self.occupied_buffer = np.zeros((columns, rows), dtype=bool)
+        self.reference_occupied = np.zeros((columns, rows), dtype=bool)
+        self.moved_buffer = np.zeros((columns, rows), dtype=bool)
+
+        self.placed = False
+        self.load = 0.0
+        self.occupied = 0
+        self.reference_load = 0.0
+        self.settled_frames = 0
+        self.settling = False
+        self.event = PlacementEvent.none
+
+        self.events = {event: 0 for event in PlacementEvent}
+        self.settling_count = 0
+
+    def update(self, image):
+        # Called once per frame with extracted image, returns event of this frame
+        previous_load = self.load
+        self.load = float(np.sum(image))
+        np.greater(image, self.field_off, out=self.occupied_buffer)
+        self.occupied = int(np.count_nonzero(self.occupied_buffer))
+
+        event = PlacementEvent.none
+        if not self.placed:
+            if self.occupied > 0 and self.load >= self.load_on and np.any(image > self.field_on):
+                self.placed = True
+                event = PlacementEvent.placed
+        elif self.occupied == 0 or self.load < self.load_off:
+            self.placed = False
+            event = PlacementEvent.removed
+        else:
+            np.not_equal(self.occupied_buffer, self.reference_occupied, out=self.moved_buffer)
+            if abs(self.load - self.reference_load) > self.shift_load * self.reference_load or \
+                    np.count_nonzero(self.moved_buffer) > self.shift_fields:
+                event = PlacementEvent.shifted
+
+        if event is not PlacementEvent.none:
+            self.settling = True
+            self.settled_frames = 0
+        elif self.settling:
+            if abs(self.load - previous_load) <= self.settle_tolerance * max(previous_load, self.load_on):
+                self.settled_frames += 1
+            else:
+                self.settled_frames = 0
+            if self.settled_frames >= self.settle_frames:
+                self.settling = False
+
+        # Shifts are measured from the last settled state, not from previous frame
+        if event is not PlacementEvent.none or self.settling:
+            self.reference_load = self.load
+            np.copyto(self.reference_occupied, self.occupied_buffer)
+
+        self.event = event
+        self.events[event] += 1
+        if self.settling:
+            self.settling_count += 1
+        return event
+
+    def needs_recognition(self):
+        return self.event is not PlacementEvent.none or self.settling
+
+    def reset(self):
+        self.placed = False
+        self.load = 0.0
+        self.occupied = 0
+        self.reference_load = 0.0
+        self.reference_occupied.fill(False)
+        self.settled_frames = 0
+        self.settling = False
+        self.event = PlacementEvent.none
+
+    def get_statistics(self):
+        return {"placed": self.events[PlacementEvent.placed],
+                "removed": self.events[PlacementEvent.removed],
+                "shifted": self.events[PlacementEvent.shifted],
+                "settling": self.settling_count}
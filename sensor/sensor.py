@@ -1,8 +1,13 @@
 from connection.connection import Serial
-import copy
+from connection.frame_parsing import FrameProtocol
+from connection.frame_recording import FrameRecorder
+import numpy as np
 
-from sensor.data_parsing import parse_data_to_np_image, cast_data_to_uint8, compensate_raw_image
+from sensor.data_parsing import parse_data_to_np_image, ImageCompensationMethod
+from sensor.calibration import SensorCalibration
 from sensor.params import Params
+from sensor.frame_mailbox import FrameMailbox
+from sensor.frame_buffers import FrameBuffers
 from debug.debug import *
 
 
@@ -14,6 +19,13 @@ class Sensor:
     field_params = None
 
     parent_node = None
+    frame_mailbox = None
+    frame_buffers = None
+
+    calibration = None
+    frame_recorder = None
+    frame_id = 0
+    frame_time = 0.0
 
     image_calibrated = None
     image_calibrated_raw = None
@@ -22,10 +34,19 @@ class Sensor:
     image_actual_calibrated = None
     image_actual_calibrated_raw = None
 
-    def __init__(self, usb_port="/dev/ttyUSB0", field_params=Params):
+    def __init__(self, usb_port="/dev/ttyUSB0", field_params=Params, frame_protocol=FrameProtocol.csv,
+                 compensation_method=ImageCompensationMethod.input_scaled_to_calibration_value_reduced_by_A,
+                 use_calibration_lut=False, ser=None):
+        # Any source with interface of connection.Serial can be given in ser, e.g. connection.replay.ReplaySerial
         self.usb_port = usb_port
         self.field_params = field_params
-        self.ser = Serial()
+        if ser is None:
+            ser = Serial(frame_protocol, field_params.rows, field_params.columns, field_params.max_value)
+        self.ser = ser
+        self.frame_mailbox = FrameMailbox((self.ser.columns, self.ser.rows))
+        self.frame_buffers = FrameBuffers(self.ser.columns, self.ser.rows)
+        self.calibration = SensorCalibration(self.ser.columns, self.ser.rows, compensation_method,
+                                             use_calibration_lut)
         self.ser.set_data_receiver(self.new_data_received)
 
     def set_usb_port(self, usb_port):
@@ -37,6 +58,22 @@ class Sensor:
         else:
             self.usb_connected = False
 
+    def start_recording(self, filename):
+        self.stop_recording()
+        self.frame_recorder = FrameRecorder(filename, self.ser.rows, self.ser.columns)
+        self.ser.set_recorder(self.frame_recorder)
+
+    def stop_recording(self):
+        if self.frame_recorder is not None:
+            self.ser.set_recorder(None)
+            self.frame_recorder.close()
+            self.frame_recorder = None
+
+    def set_lockstep(self, enabled):
+        # Replayed frames are sent only after previous one was taken, so no frame is dropped in mailbox
+        if hasattr(self.ser, "set_flow_control"):
+            self.ser.set_flow_control(self.frame_mailbox.wait_until_taken if enabled else None)
+
     def connection_crashed(self):
         # TODO make usage of this function
         self.usb_connected = False
@@ -48,23 +85,47 @@ class Sensor:
         return self.usb_connected
 
     def new_data_received(self, n_rows, n_columns, new_pressure_map):
+        # Called from serial thread, only store the frame so reader is never blocked by processing
+        self.frame_mailbox.put(new_pressure_map)
+
+        if self.parent_node is not None:
+            self.parent_node.new_image_from_sensor()
+
+    def process_new_frame(self):
+        # Called from node thread, returns True when there is new compensated image to work on
         # TODO sometimes incoming data are corrupted (values like 4). It has to be filtered out
         # It is no longer a problem when reading from USB is no longer clogged
-        self.image_actual_raw = new_pressure_map
-        self.image_actual = parse_data_to_np_image(n_rows, n_columns, new_pressure_map)
-
-        if self.image_calibrated is None:
-            self.image_calibrated = self.image_actual.copy()
-            self.image_calibrated_raw = copy.deepcopy(self.image_actual_raw)
-            return
-        self.image_actual_calibrated_raw = compensate_raw_image(n_rows, n_columns, self.image_actual_raw,
-                                                                self.image_calibrated_raw)
-        self.image_actual_calibrated = parse_data_to_np_image(n_rows, n_columns, self.image_actual_calibrated_raw)
+        new_pressure_map = self.frame_mailbox.take()
+        if new_pressure_map is None:
+            return False
+        # Time when frame came from controller, used to measure latency of whole processing
+        self.frame_id = self.frame_mailbox.front_frame_id
+        self.frame_time = self.frame_mailbox.front_frame_time
+        n_rows = self.ser.rows
+        n_columns = self.ser.columns
+        buffers = self.frame_buffers
+
+        np.copyto(buffers.raw, new_pressure_map)
+        self.image_actual_raw = buffers.raw
+        self.image_actual = parse_data_to_np_image(n_rows, n_columns, buffers.raw, out=buffers.display,
+                                                   scratch=buffers.scratch)
+
+        if not self.calibration.is_calibrated():
+            self.calibrate_sensor(buffers.raw)
+            return False
+        self.image_actual_calibrated_raw = self.calibration.compensate(self.image_actual_raw, buffers.compensated)
+        self.image_actual_calibrated = parse_data_to_np_image(n_rows, n_columns, self.image_actual_calibrated_raw,
+                                                              out=buffers.compensated_display,
+                                                              scratch=buffers.scratch)
         debug(DBGLevel.INFO, "New data received from controller")
+        return True
 
-        if self.parent_node is not None:
-            self.parent_node.new_image_from_sensor()
+    def get_frame_statistics(self):
+        return self.frame_mailbox.get_statistics()
 
     def calibrate_sensor(self, raw_data):
+        # Raw data from sensor is required, compensation of next frames is based on them
         debug(DBGLevel.INFO, "Calibrate sensor")
-        self.image_calibrated = raw_data
+        self.calibration.update(raw_data)
+        self.image_calibrated_raw = self.calibration.raw
+        self.image_calibrated = self.calibration.display
@@ -7,20 +7,48 @@ import argparse
 # Suppress tensorflow noncritical warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
-from nodes.table import TableNode
-from sensor.sensor import Sensor
+from nodes.sensor_manager import SensorManager
 from connection.connection import Serial
+from connection.frame_parsing import FrameProtocol
+from item.classifier.inference_backends import InferenceBackend
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("-p", metavar="PORT", help="USB port where intelligent skin is connected",
-                        default=Serial.default_port_name())
+    parser.add_argument("-p", metavar="PORT", nargs="+", help="USB ports where intelligent skins are connected",
+                        default=[Serial.default_port_name()])
+    parser.add_argument("-n", metavar="NAME", nargs="+",
+                        help="Names of tables, used in topic prefix /table/NAME when there is more than one table")
+    parser.add_argument("-b", action="store_true", help="Controller sends binary frames instead of csv lines")
+    parser.add_argument("--record", metavar="FILE", help="Record every received frame to given file")
+    parser.add_argument("--replay", metavar="FILE", nargs="+", help="Replay recordings instead of reading ports")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Replay speed, 1.0 keeps original timing, 0 replays as fast as possible")
+    parser.add_argument("--backend", choices=[backend.name for backend in InferenceBackend],
+                        default=InferenceBackend.tf_function.name, help="Inference backend of recognition models")
+    parser.add_argument("--multihead", action="store_true",
+                        help="Recognize item type and weight with one combined model")
     args = parser.parse_args()
 
-    sensor = Sensor(args.p)
-    sensor.connect_to_controller()
-    node = TableNode(weight_calculation_mode="neuron", default_turn_on=True)
-    node.set_sensor(sensor)
+    replay_speed = None
+    sources = args.p
+    if args.replay is not None:
+        replay_speed = args.speed
+        sources = args.replay
 
-    while 1:
-        time.sleep(60)
+    if args.multihead:
+        recognition_models = {"weight_calculation_mode": "multihead",
+                              "model_path": "item/classifier/models/multihead_model.keras"}
+    else:
+        recognition_models = {"weight_calculation_mode": "neuron"}
+
+    manager = SensorManager(sources, args.n, frame_protocol=FrameProtocol.binary if args.b else FrameProtocol.csv,
+                            default_turn_on=True, **recognition_models,
+                            record_path=args.record, replay_speed=replay_speed,
+                            inference_backend=InferenceBackend[args.backend])
+    manager.connect_to_controllers()
+
+    try:
+        while 1:
+            time.sleep(60)
+    finally:
+        manager.stop_recording()